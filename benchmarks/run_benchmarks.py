@@ -0,0 +1,343 @@
+"""
+Benchmark harness for the solver, damage and locator hot paths.
+
+Times a fixed set of standard cases, writes the results with environment
+metadata as JSON and compares them against a stored baseline, so that
+performance regressions can be caught before deploying.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+
+The exit status is 1 if any case is slower than the baseline by more than
+the threshold factor (default 1.25), and 2 if a baseline given with
+``--baseline`` does not exist. Without ``--baseline``, a missing
+benchmarks/baseline.json is reported and the comparison skipped. The
+deepimpact package must be installed (``pip install -e .``) or on
+PYTHONPATH.
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import scipy
+
+import deepimpact
+from deepimpact.damage import calculate_damage_radius
+from deepimpact.synthetic import synthetic_census, synthetic_postcodes
+
+BASE_PATH = os.path.dirname(os.path.abspath(__file__))
+RESOURCES = os.sep.join((BASE_PATH, "..", "resources"))
+DEFAULT_BASELINE = os.sep.join((BASE_PATH, "baseline.json"))
+
+# Standard scenario used for the solver and damage cases
+SCENARIO = {
+    "radius": 35.0,
+    "velocity": 19e3,
+    "density": 3000.0,
+    "strength": 1e7,
+    "angle": 45.0,
+}
+
+
+def metadata():
+    """
+    Return a dictionary describing the environment the benchmarks ran in.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=BASE_PATH,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "date": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def time_case(func, repeat, warmup=None):
+    """
+    Call func repeat times (after one untimed warm-up call of warmup, or
+    of func itself) and return summary statistics of the run times in
+    seconds.
+    """
+    (warmup or func)()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if repeat > 1 else 0.0,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def make_locator(scale=None):
+    """
+    Return a locator on the real postcode and census data when it has been
+    downloaded (and no scale is given), otherwise on synthetic data scale
+    times the size of the UK data.
+    """
+    if scale is None and os.path.isfile(os.sep.join((RESOURCES, "full_postcodes.csv"))):
+        return deepimpact.GeospatialLocator(), "uk"
+
+    scale = 1.0 if scale is None else scale
+    lat, lon, population = synthetic_census(scale=scale, seed=0)
+    postcodes = synthetic_postcodes(lat, lon, population, seed=1)
+    valid = population.ravel() >= 0
+    locator = deepimpact.GeospatialLocator.from_arrays(
+        postcode_names=postcodes["Postcode"].to_numpy(dtype=str),
+        postcode_coords=postcodes[["Latitude", "Longitude"]].to_numpy(),
+        census_coords=np.stack([lat.ravel(), lon.ravel()], axis=1)[valid],
+        census_population=population.ravel()[valid],
+    )
+    return locator, f"synthetic x{scale:g}"
+
+
+def cases(quick=False, scale=None):
+    """
+    Generate the standard benchmark cases as (name, function, repeat,
+    warmup) tuples, setting up their inputs lazily.
+    """
+    locator = functools.partial(make_locator, scale)
+    repeat = 3 if quick else 10
+
+    # import deepimpact in a fresh interpreter (includes interpreter startup)
+    yield (
+        "import/deepimpact",
+        lambda: subprocess.run(
+            [sys.executable, "-c", "import deepimpact"],
+            cwd=os.sep.join((BASE_PATH, "..")),
+            check=True,
+        ),
+        repeat,
+        None,
+    )
+
+    # solve_atmospheric_entry for each atmosphere model and several dt
+    for atmos_func in ("exponential", "tabular", "constant"):
+        planet = deepimpact.Planet(atmos_func=atmos_func)
+        for dt in (0.05, 0.25, 1.0):
+            yield (
+                f"solve/{atmos_func}/dt={dt}",
+                lambda planet=planet, dt=dt: planet.solve_atmospheric_entry(
+                    **SCENARIO, dt=dt
+                ),
+                max(1, repeat // 2),
+                None,
+            )
+
+    # solve_atmospheric_entry with events located within larger steps
+    planet = deepimpact.Planet()
+    for max_step in (0.01, 0.05):
+        yield (
+            f"solve/events/max_step={max_step}",
+            lambda max_step=max_step: planet.solve_atmospheric_entry(
+                **SCENARIO, max_step=max_step, events=True
+            ),
+            max(1, repeat // 2),
+            None,
+        )
+
+    # calculate_damage_radius over pressure sweeps
+    for npressures in (4, 32, 256):
+        pressures = np.geomspace(1e3, 1e6, npressures)
+        yield (
+            f"damage_radius/pressures={npressures}",
+            lambda pressures=pressures: calculate_damage_radius(pressures, 8e3, 7e3),
+            repeat,
+            None,
+        )
+
+    # batch_damage_zones over an ensemble of outcomes
+    rng = np.random.default_rng(0)
+    for nsamples in (1000, 100_000):
+        outcomes = pd.DataFrame(
+            {
+                "burst_altitude": rng.uniform(5e3, 30e3, nsamples),
+                "burst_energy": rng.uniform(1e2, 1e4, nsamples),
+                "burst_distance": rng.uniform(0, 200e3, nsamples),
+            }
+        )
+        yield (
+            f"batch_damage_zones/samples={nsamples}",
+            lambda outcomes=outcomes: deepimpact.batch_damage_zones(
+                outcomes, 52.79, -2.95, 135, [1e3, 3.5e3, 27e3, 43e3]
+            ),
+            repeat,
+            None,
+        )
+
+    # great_circle_distance at varied n x m
+    rng = np.random.default_rng(0)
+    for n, m in ((1000, 1), (100_000, 1), (1000, 1000)):
+        latlon1 = np.stack([rng.uniform(50, 58, n), rng.uniform(-6, 2, n)], axis=1)
+        latlon2 = np.stack([rng.uniform(50, 58, m), rng.uniform(-6, 2, m)], axis=1)
+        yield (
+            f"great_circle_distance/{n}x{m}",
+            lambda a=latlon1, b=latlon2: deepimpact.great_circle_distance(a, b),
+            repeat,
+            None,
+        )
+
+    # postcode and population queries at several radii (the locator is
+    # loaded by the untimed warm-up call of the first case using it)
+    X = (51.4981, -0.1773)
+    for radius in (300.0, 800.0, 5e3, 50e3):
+        yield (
+            f"postcodes_by_radius/r={radius:g}",
+            lambda r=radius: locator()[0].get_postcodes_by_radius(X, [r]),
+            repeat,
+            None,
+        )
+        yield (
+            f"population_by_radius/r={radius:g}",
+            lambda r=radius: locator()[0].get_population_by_radius(X, [r]),
+            repeat,
+            None,
+        )
+
+    # impact_risk over 10, 100 and 1000 samples drawn from the standard list
+    planet = deepimpact.Planet()
+    impacts = pd.read_csv(os.sep.join((RESOURCES, "impact_parameter_list.csv")))
+    directory = tempfile.mkdtemp()
+    for nsamples in (10, 100) if quick else (10, 100, 1000):
+        impact_file = os.sep.join((directory, f"impacts_{nsamples}.csv"))
+        impacts.sample(nsamples, replace=True, random_state=0).to_csv(
+            impact_file, index=False
+        )
+        yield (
+            f"impact_risk/nsamples={nsamples}",
+            lambda f=impact_file: deepimpact.impact_risk(
+                planet, impact_file=f, locator=locator()[0]
+            ),
+            1,
+            # a single run is timed, after loading the data untimed
+            locator,
+        )
+
+
+def compare(results, baseline, threshold):
+    """
+    Print a comparison of the median times against a baseline and return
+    the names of the cases slower than the baseline by more than threshold.
+    """
+    regressions = []
+    print(f"\n{'case':<40} {'baseline (s)':>13} {'now (s)':>11} {'ratio':>7}")
+    print("-" * 74)
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<40} {'-':>13} {result['median']:>11.4g} {'-':>7}")
+            continue
+        ratio = result["median"] / baseline[name]["median"]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(
+            f"{name:<40} {baseline[name]['median']:>13.4g}"
+            f" {result['median']:>11.4g} {ratio:>7.2f}{flag}"
+        )
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="file to write the JSON results to")
+    parser.add_argument(
+        "--baseline",
+        help=f"baseline JSON to compare with (default {DEFAULT_BASELINE})",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store these results as the new baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="slowdown factor (median time) counted as a regression",
+    )
+    parser.add_argument(
+        "--filter", default="", help="only run cases whose name contains this"
+    )
+    parser.add_argument("--quick", action="store_true", help="fewer repeats")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        help="use synthetic geodata this many times the size of the UK data",
+    )
+    args = parser.parse_args(argv)
+    baseline_file = args.baseline or DEFAULT_BASELINE
+    if not (args.save_baseline or os.path.isfile(baseline_file)):
+        if args.baseline is not None:
+            parser.exit(2, f"error: no baseline {baseline_file}\n")
+        print(
+            f"warning: no baseline {baseline_file}, the results are not compared "
+            "(record one with --save-baseline)",
+            file=sys.stderr,
+        )
+
+    results = {}
+    for name, func, repeat, warmup in cases(quick=args.quick, scale=args.scale):
+        if args.filter not in name:
+            continue
+        results[name] = time_case(func, repeat, warmup)
+        print(f"{name:<40} {results[name]['median']:.4g} s", flush=True)
+
+    report = {"metadata": metadata(), "results": results}
+    if any(name.startswith(("postcodes", "population", "impact")) for name in results):
+        report["metadata"]["geodata"] = make_locator(args.scale)[1]
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.save_baseline:
+        with open(baseline_file, "w") as file:
+            json.dump(report, file, indent=2)
+        return 0
+
+    if os.path.isfile(baseline_file):
+        with open(baseline_file) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
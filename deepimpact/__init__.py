@@ -1,6 +1,45 @@
 """Python asteroid airburst calculator"""
 
+import importlib
+
+from .atmosphere import *  # noqa
 from .solver import *  # noqa
+from .trajectory import *  # noqa
 from .damage import *  # noqa
 from .locator import *  # noqa
 from .mapping import *  # noqa
+from .emulator import *  # noqa
+from .profiling import *  # noqa
+from .sampling import *  # noqa
+
+# Opt-in submodules, which pull in dask, http.server, asyncio and process
+# pools, are only imported on first use of one of their names
+_LAZY_NAMES = {
+    "parallel": ("DaskTallier", "dask_impact_risk"),
+    "synthetic": (
+        "synthetic_census",
+        "synthetic_postcodes",
+        "write_census",
+        "write_postcodes",
+        "generate_synthetic_data",
+    ),
+    "service": ("RiskService",),
+    "aio": ("AsyncPipeline",),
+    "calibration": ("load_energy_curve", "Calibration"),
+    "sensitivity": ("sobol_design", "sobol_indices", "sensitivity_analysis"),
+}
+_LAZY = {name: module for module, names in _LAZY_NAMES.items() for name in names}
+
+
+def __getattr__(name):
+    if name in _LAZY_NAMES:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _LAZY:
+        value = getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY) | set(_LAZY_NAMES))
@@ -0,0 +1,6 @@
+"""Run the deepimpact command line interface with python -m deepimpact"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
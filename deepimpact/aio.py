@@ -0,0 +1,337 @@
+"""
+Module providing asyncio counterparts of the solve, outcome, damage and
+locate pipeline, which run the CPU work on a managed executor so that an
+event loop is never blocked
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from .damage import damage_zones, empty_tally, finalise_tally, merge_tallies
+from .damage import impact_risk, read_impacts, tally_impacts
+from .locator import GeospatialLocator
+from .solver import Planet
+
+__all__ = ["AsyncPipeline"]
+
+# Planet and locator of this worker process (set by _init_worker)
+_worker_state = {}
+
+
+def _init_worker(planet, handle):
+    """
+    Initialise a process pool worker with the planet and, if the parent
+    shared one, a locator attached to the shared postcode and census data.
+    """
+    _worker_state["planet"] = planet
+    _worker_state["handle"] = handle
+    _worker_state["locator"] = None
+    _worker_state["lock"] = threading.Lock()
+
+
+def _get_locator(state):
+    """
+    Return the locator of a worker state, attaching to the shared data or
+    loading the default data on first use.
+    """
+    with state["lock"]:
+        if state["locator"] is None:
+            if state["handle"] is not None:
+                state["locator"] = GeospatialLocator.attach(state["handle"])
+            else:
+                state["locator"] = GeospatialLocator()
+        return state["locator"]
+
+
+def _solve(state, *args, **kwargs):
+    return state["planet"].solve_atmospheric_entry(*args, **kwargs)
+
+
+def _outcome(state, *args, **kwargs):
+    planet = state["planet"]
+    if planet.emulator is not None:
+        return planet.emulate_outcome(*args)
+    result = planet.solve_atmospheric_entry(*args, **kwargs)
+    return planet.analyse_outcome(planet.calculate_energy(result))
+
+
+def _damage_zones(state, *args):
+    return damage_zones(*args)
+
+
+def _postcodes(state, X, radii):
+    return _get_locator(state).get_postcodes_by_radius(X, radii)
+
+
+def _population(state, X, radii):
+    return _get_locator(state).get_population_by_radius(X, radii)
+
+
+def _tally(state, data, pressure):
+    return tally_impacts(state["planet"], _get_locator(state), data, pressure)
+
+
+_TASKS = {
+    "solve": _solve,
+    "outcome": _outcome,
+    "damage_zones": _damage_zones,
+    "postcodes": _postcodes,
+    "population": _population,
+    "tally": _tally,
+}
+
+
+def _process_task(name, args, kwargs):
+    """
+    Run a task in a process pool worker.
+    """
+    return _TASKS[name](_worker_state, *args, **kwargs)
+
+
+class AsyncPipeline(object):
+    """
+    Asynchronous interface to a Planet and GeospatialLocator.
+
+    Each call is run on an executor owned by the pipeline, with at most
+    ``max_concurrency`` calls in flight; the rest wait (cancellably) on the
+    event loop rather than queueing inside the executor. Cancelling a call
+    which has not started means it never runs. A call already running on
+    the executor cannot be interrupted, but `impact_risk` is split into
+    chunks, and cancelling it stops the chunks which have not started.
+
+    Examples
+    --------
+    >>> import asyncio, deepimpact
+    >>> async def main():
+    ...     async with deepimpact.AsyncPipeline(max_workers=4) as pipeline:
+    ...         outcomes = await asyncio.gather(
+    ...             *(pipeline.outcome(r, 20e3, 3000, 1e5, 45) for r in (10, 20, 30))
+    ...         )
+    ...         return await pipeline.get_population_by_radius((51.5, -0.1), [5e3])
+    >>> asyncio.run(main())
+    """
+
+    def __init__(
+        self,
+        planet=None,
+        locator=None,
+        executor="process",
+        max_workers=None,
+        max_concurrency=None,
+    ):
+        """
+        Parameters
+        ----------
+        planet : Planet, optional
+            The planet to solve scenarios for. Default is Planet().
+
+        locator : GeospatialLocator, optional
+            The locator for postcode and population queries. If None, the
+            default data is loaded on first use (by every process worker).
+            With the process executor, the locator's arrays are shared with
+            the workers through shared memory rather than copied.
+
+        executor : str or concurrent.futures.Executor, optional
+            'process' (default) to run calls on a pool of worker processes,
+            which solves scenarios in parallel, or 'thread' for a thread
+            pool in this process. An Executor instance is used as given
+            (and not shut down by `close`); it must be a thread pool.
+
+        max_workers : int, optional
+            Number of workers of the executor. Default is os.cpu_count().
+
+        max_concurrency : int, optional
+            Maximum number of calls in flight. Default is max_workers, so
+            the cores are never oversubscribed.
+        """
+        self.planet = Planet() if planet is None else planet
+        self.locator = locator
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.max_workers
+        self._executor_type = executor
+        self._executor = executor if isinstance(executor, Executor) else None
+        self._owns_executor = self._executor is None
+        self._owns_shared = False
+        self._state = {
+            "planet": self.planet,
+            "handle": None,
+            "locator": locator,
+            "lock": threading.Lock(),
+        }
+        self._semaphore = None
+
+    def _get_executor(self):
+        """
+        Return the executor, starting it on first use.
+        """
+        if self._executor is None:
+            if self._executor_type == "process":
+                handle = None
+                if self.locator is not None:
+                    # data the caller already shared stays theirs to release
+                    self._owns_shared = getattr(self.locator, "_shared", None) is None
+                    handle = self.locator.share()
+                self._executor = ProcessPoolExecutor(
+                    self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.planet, handle),
+                )
+            elif self._executor_type == "thread":
+                self._executor = ThreadPoolExecutor(self.max_workers)
+            else:
+                raise ValueError("executor must be 'process', 'thread' or an Executor")
+        return self._executor
+
+    async def run(self, name, *args, **kwargs):
+        """
+        Run a pipeline task on the executor, waiting for a free slot first.
+
+        Parameters
+        ----------
+        name : str
+            One of 'solve', 'outcome', 'damage_zones', 'postcodes',
+            'population' and 'tally'.
+
+        *args, **kwargs
+            Arguments of the task.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+
+        await self._semaphore.acquire()
+        try:
+            executor = self._get_executor()
+            if self._executor_type == "process":
+                future = executor.submit(_process_task, name, args, kwargs)
+            else:
+                future = executor.submit(_TASKS[name], self._state, *args, **kwargs)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        # the slot is only freed when the work has finished (or was cancelled
+        # before starting), even if the awaiting task is cancelled meanwhile
+        semaphore = self._semaphore
+
+        def release(_):
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(semaphore.release)
+
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future, loop=loop)
+
+    async def solve_atmospheric_entry(
+        self,
+        radius,
+        velocity,
+        density,
+        strength,
+        angle,
+        init_altitude=100e3,
+        dt=0.25,
+        radians=False,
+    ):
+        """
+        Asynchronous `Planet.solve_atmospheric_entry`.
+        """
+        return await self.run(
+            "solve",
+            radius,
+            velocity,
+            density,
+            strength,
+            angle,
+            init_altitude=init_altitude,
+            dt=dt,
+            radians=radians,
+        )
+
+    async def outcome(
+        self, radius, velocity, density, strength, angle, init_altitude=100e3, dt=0.25
+    ):
+        """
+        Solve a scenario and return its outcome dictionary (see
+        `Planet.analyse_outcome`) in a single executor call. Uses the
+        planet's outcome emulator if it has one.
+        """
+        return await self.run(
+            "outcome",
+            radius,
+            velocity,
+            density,
+            strength,
+            angle,
+            init_altitude=init_altitude,
+            dt=dt,
+        )
+
+    async def damage_zones(self, outcome, lat, lon, bearing, pressures):
+        """
+        Asynchronous `deepimpact.damage_zones`.
+        """
+        return await self.run("damage_zones", outcome, lat, lon, bearing, pressures)
+
+    async def get_postcodes_by_radius(self, X, radii):
+        """
+        Asynchronous `GeospatialLocator.get_postcodes_by_radius`.
+        """
+        return await self.run("postcodes", X, radii)
+
+    async def get_population_by_radius(self, X, radii):
+        """
+        Asynchronous `GeospatialLocator.get_population_by_radius`.
+        """
+        return await self.run("population", X, radii)
+
+    async def impact_risk(
+        self,
+        impact_file=impact_risk.__defaults__[0],
+        pressure=30.0e3,
+        nsamples=None,
+        chunksize=10,
+    ):
+        """
+        Asynchronous `deepimpact.impact_risk`. The impacts are tallied in
+        chunks of ``chunksize``, run concurrently on the executor.
+
+        Returns
+        -------
+        probability: DataFrame
+        population: dict
+            As returned by `deepimpact.impact_risk`.
+        """
+        data = read_impacts(impact_file).iloc[:nsamples]
+        tasks = [
+            self.run("tally", data.iloc[slice(start, start + chunksize)], pressure)
+            for start in range(0, data.shape[0], chunksize)
+        ]
+        tally = empty_tally()
+        # gather cancels the chunks still waiting if this call is cancelled
+        for chunk in await asyncio.gather(*tasks):
+            tally = merge_tallies(tally, chunk)
+        return finalise_tally(tally)
+
+    async def close(self):
+        """
+        Shut down the executor (if the pipeline created it) and release
+        the locator data shared with the workers (if the pipeline shared
+        it).
+        """
+        executor, self._executor = self._executor, None
+        if executor is not None and self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: executor.shutdown(cancel_futures=True)
+            )
+        if self._owns_shared:
+            self.locator.close_shared()
+            self._owns_shared = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
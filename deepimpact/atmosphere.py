@@ -0,0 +1,136 @@
+"""
+This module contains the atmospheric density models used by the Planet
+class for the Deep Impact project
+"""
+import numpy as np
+
+__all__ = ["ExponentialAtmosphere", "TabularAtmosphere", "ConstantAtmosphere"]
+
+
+class ExponentialAtmosphere:
+    """
+    Exponential atmosphere, rho = rho0 exp(-z/H)
+    """
+
+    def __init__(self, rho0=1.2, H=8000.0):
+        """
+        Parameters
+        ----------
+        rho0 : float, optional
+            Air density at zero altitude (kg/m^3)
+
+        H : float, optional
+            Atmospheric scale height (m)
+        """
+        self.rho0 = rho0
+        self.H = H
+
+    def __call__(self, z):
+        """
+        Return the atmospheric density (kg/m^3) at altitude z (m).
+
+        Examples
+        --------
+        >>> rhoa = ExponentialAtmosphere(rho0=1.2, H=8000.0)
+        >>> rhoa(0.0)
+        1.2
+        """
+        return self.rho0 * np.exp(-z / self.H)
+
+
+class ConstantAtmosphere:
+    """
+    Constant density atmosphere, rho = rho0
+    """
+
+    def __init__(self, rho0=1.2):
+        """
+        Parameters
+        ----------
+        rho0 : float, optional
+            Air density at all altitudes (kg/m^3)
+        """
+        self.rho0 = rho0
+
+    def __call__(self, z):
+        """
+        Return the atmospheric density (kg/m^3) at altitude z (m).
+
+        Examples
+        --------
+        >>> rhoa = ConstantAtmosphere(rho0=1.2)
+        >>> rhoa(1e4)
+        1.2
+        """
+        if np.ndim(z) == 0:
+            return self.rho0
+        return np.full(np.shape(z), self.rho0)
+
+
+class TabularAtmosphere:
+    """
+    Tabulated atmosphere, cubically interpolated (and extrapolated) between
+    altitude-density pairs.
+
+    Only the table itself is pickled; the interpolator is rebuilt when the
+    object is unpickled, so copies sent to worker processes are small and
+    never need to re-read the table from disk.
+    """
+
+    def __init__(self, altitudes, densities):
+        """
+        Parameters
+        ----------
+        altitudes : array_like
+            Tabulated altitudes (m)
+
+        densities : array_like
+            Atmospheric density (kg/m^3) at each tabulated altitude
+        """
+        self.altitudes = np.asarray(altitudes, dtype=float)
+        self.densities = np.asarray(densities, dtype=float)
+
+        from scipy.interpolate import interp1d
+
+        self.interpolator = interp1d(
+            self.altitudes,
+            self.densities,
+            kind="cubic",
+            bounds_error=False,
+            fill_value="extrapolate",
+        )
+
+    @classmethod
+    def from_csv(cls, filename):
+        """
+        Read the table from a file with a header line followed by two
+        whitespace separated columns: altitude and density.
+
+        Parameters
+        ----------
+        filename : string
+            Name of the file to read.
+
+        Returns
+        -------
+        TabularAtmosphere
+        """
+        with open(filename, "r") as file:
+            next(file)  # Skip the header line
+            data = np.loadtxt(file)
+        return cls(data[:, 0], data[:, 1])
+
+    def __call__(self, z):
+        """
+        Return the atmospheric density (kg/m^3) at altitude z (m).
+
+        Examples
+        --------
+        >>> rhoa = TabularAtmosphere([0.0, 1e3, 2e3, 3e3], [1.2, 1.1, 1.0, 0.9])
+        >>> float(rhoa(500.0))
+        1.15
+        """
+        return self.interpolator(z)
+
+    def __reduce__(self):
+        return (self.__class__, (self.altitudes, self.densities))
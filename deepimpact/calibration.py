@@ -0,0 +1,318 @@
+"""
+Module to fit the unknown entry parameters of an observed airburst (by
+default the Chelyabinsk event) to its inferred energy deposition curve
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .solver import Planet
+
+__all__ = ["load_energy_curve", "Calibration"]
+
+CHELYABINSK_FILE = os.sep.join(
+    (os.path.dirname(__file__), "..", "resources", "ChelyabinskEnergyAltitude.csv")
+)
+
+# Parameters of the Chelyabinsk event known from observations (Popova et
+# al., 2013): velocity (m/s), density (kg/m^3) and angle (degrees)
+CHELYABINSK = {"velocity": 19.2e3, "density": 3300.0, "angle": 18.3}
+
+# Default search ranges of the fitted parameters
+DEFAULT_BOUNDS = {"radius": (5.0, 20.0), "strength": (1e5, 1e8)}
+
+
+def load_energy_curve(filename=CHELYABINSK_FILE):
+    """
+    Read an energy deposition curve in the format of
+    resources/ChelyabinskEnergyAltitude.csv.
+
+    Parameters
+    ----------
+    filename : string, optional
+        Name of a .csv file with the height (km) in the first column and
+        the energy deposited per unit length (kt/km) in the second.
+
+    Returns
+    -------
+    DataFrame
+        DataFrame with columns 'altitude' (m) and 'dedz' (kt/km), sorted
+        by decreasing altitude.
+    """
+    data = pd.read_csv(filename)
+    curve = pd.DataFrame(
+        {
+            "altitude": data.iloc[:, 0].to_numpy(dtype=float) * 1e3,
+            "dedz": data.iloc[:, 1].to_numpy(dtype=float),
+        }
+    )
+    return curve.sort_values("altitude", ascending=False, ignore_index=True)
+
+
+def _solve_curves(planet, candidates, fixed, altitudes, init_altitude, dt, max_step):
+    """
+    Solve each (radius, strength) candidate and return its dE/dz at the
+    given (decreasing) altitudes, stopping each solve once it has passed
+    below the lowest altitude.
+    """
+    curves = np.zeros((len(candidates), len(altitudes)))
+    for i, (radius, strength) in enumerate(candidates):
+        blocks = []
+        for block in planet.iter_atmospheric_entry(
+            radius,
+            fixed["velocity"],
+            fixed["density"],
+            strength,
+            fixed["angle"],
+            init_altitude=init_altitude,
+            dt=dt,
+            max_step=max_step,
+            chunksize=64,
+        ):
+            blocks.append(block)
+            if block[-1, 4] < altitudes[-1]:
+                break
+        trajectory = np.concatenate(blocks)
+        # np.interp needs increasing abscissae, and the altitude decreases
+        curves[i] = np.interp(
+            -altitudes, -trajectory[:, 4], trajectory[:, 7], left=0.0, right=0.0
+        )
+    return curves
+
+
+class Calibration(object):
+    """
+    Fits the radius and strength of an impactor to an observed energy
+    deposition curve, with the other entry parameters held fixed.
+
+    Candidate parameter sets are solved in batches, split between worker
+    processes, and the misfit of every candidate solved is cached, so a
+    candidate proposed again is never solved again. The fit is a
+    differential evolution search in log radius and log strength, which
+    passes each generation to the solver as one batch.
+
+    Examples
+    --------
+    >>> calibration = Calibration()
+    >>> fit = calibration.fit(workers=4, seed=0)
+    >>> fit["radius"], fit["strength"]
+    """
+
+    def __init__(
+        self,
+        planet=None,
+        observed=None,
+        velocity=CHELYABINSK["velocity"],
+        density=CHELYABINSK["density"],
+        angle=CHELYABINSK["angle"],
+        init_altitude=100e3,
+        dt=0.05,
+        max_step=0.01,
+        naltitudes=100,
+    ):
+        """
+        Parameters
+        ----------
+        planet : Planet, optional
+            The planet to solve with. Default is Planet().
+
+        observed : DataFrame, optional
+            Observed curve with columns 'altitude' (m) and 'dedz' (kt/km).
+            Default is the Chelyabinsk curve (see `load_energy_curve`).
+
+        velocity, density, angle : float, optional
+            Known entry parameters (m/s, kg/m^3 and degrees). Default are
+            those of the Chelyabinsk event.
+
+        init_altitude, dt, max_step : float, optional
+            Passed on to the solver. The output interval dt must be short
+            enough to resolve the curve.
+
+        naltitudes : int, optional
+            Number of points of the common altitude grid, spanning the
+            observed curve, on which the curves are compared.
+        """
+        self.planet = Planet() if planet is None else planet
+        self.observed = load_energy_curve() if observed is None else observed
+        self.fixed = {"velocity": velocity, "density": density, "angle": angle}
+        self.init_altitude = init_altitude
+        self.dt = dt
+        self.max_step = max_step
+
+        altitude = np.asarray(self.observed["altitude"], dtype=float)
+        dedz = np.asarray(self.observed["dedz"], dtype=float)
+        order = np.argsort(altitude)
+        self.altitudes = np.linspace(altitude.max(), altitude.min(), naltitudes)
+        self.target = np.interp(self.altitudes, altitude[order], dedz[order])
+
+        self.cache = {}
+        self.nsolves = 0
+
+    def curves(self, radius, strength, map=map, nchunks=1):
+        """
+        Solve candidates and return their dE/dz on the altitude grid.
+
+        Parameters
+        ----------
+        radius, strength : array_like
+            Candidate radii (m) and strengths (Pa), broadcast together.
+
+        map : callable, optional
+            Map function used to solve the batch in chunks, e.g. the map
+            method of an Executor.
+
+        nchunks : int, optional
+            Number of chunks to split the batch into, e.g. the number of
+            workers of the map. If None, each candidate is a chunk.
+
+        Returns
+        -------
+        numpy.ndarray
+            (n, naltitudes) energy deposited per unit altitude (kt/km).
+        """
+        candidates = np.stack(np.broadcast_arrays(radius, strength), axis=-1)
+        candidates = candidates.reshape(-1, 2)
+        chunks = np.array_split(candidates, nchunks or len(candidates) or 1)
+        chunks = [chunk for chunk in chunks if len(chunk)]
+        if not chunks:
+            return np.zeros((0, len(self.altitudes)))
+        nchunks = len(chunks)
+        results = map(
+            _solve_curves,
+            [self.planet] * nchunks,
+            chunks,
+            [self.fixed] * nchunks,
+            [self.altitudes] * nchunks,
+            [self.init_altitude] * nchunks,
+            [self.dt] * nchunks,
+            [self.max_step] * nchunks,
+        )
+        self.nsolves += len(candidates)
+        return np.concatenate(list(results))
+
+    def misfit(self, radius, strength, map=map, nchunks=1):
+        """
+        Return the root mean square difference (kt/km) between the model
+        and observed curves of each candidate, solving only the candidates
+        not already in the cache.
+
+        Parameters
+        ----------
+        radius, strength : array_like
+            Candidate radii (m) and strengths (Pa), broadcast together.
+
+        map, nchunks : optional
+            As for `curves`.
+
+        Returns
+        -------
+        numpy.ndarray
+            Misfit of each candidate.
+        """
+        radius, strength = np.broadcast_arrays(
+            np.asarray(radius, dtype=float), np.asarray(strength, dtype=float)
+        )
+        keys = list(zip(radius.ravel().tolist(), strength.ravel().tolist()))
+        missing = list(dict.fromkeys(key for key in keys if key not in self.cache))
+        if missing:
+            new = np.array(missing)
+            curves = self.curves(new[:, 0], new[:, 1], map=map, nchunks=nchunks)
+            errors = np.sqrt(np.mean((curves - self.target) ** 2, axis=1))
+            self.cache.update(zip(missing, errors.tolist()))
+        return np.array([self.cache[key] for key in keys]).reshape(radius.shape)
+
+    def fit(
+        self,
+        bounds=None,
+        workers=1,
+        seed=None,
+        popsize=10,
+        maxiter=30,
+        tol=1e-3,
+        polish=True,
+    ):
+        """
+        Find the radius and strength which best fit the observed curve.
+
+        Parameters
+        ----------
+        bounds : dict, optional
+            (low, high) ranges of 'radius' (m) and 'strength' (Pa).
+            Missing parameters use `DEFAULT_BOUNDS`.
+
+        workers : int or callable, optional
+            Number of worker processes solving each batch of candidates, or
+            a map-like callable to use instead (as for scipy's optimisers).
+            The default solves in this process.
+
+        seed : int, optional
+            Seed of the optimiser.
+
+        popsize, maxiter, tol, polish : optional
+            Passed on to `scipy.optimize.differential_evolution`.
+
+        Returns
+        -------
+        dict
+            The best 'radius', 'strength' and 'misfit', the number of
+            candidates evaluated ('nfev') and solved ('nsolves'), and
+            the optimiser 'result'.
+        """
+        from scipy.optimize import differential_evolution
+
+        bounds = dict(DEFAULT_BOUNDS, **(bounds or {}))
+        log_bounds = [tuple(np.log10(bounds[key])) for key in ("radius", "strength")]
+
+        executor = None
+        if callable(workers):
+            mapper, nchunks = workers, None
+        elif workers > 1:
+            executor = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            mapper, nchunks = executor.map, workers
+        else:
+            mapper, nchunks = map, 1
+
+        nfev = 0
+
+        def objective(x):
+            # a (2, S) batch of candidates, or a single (2,) candidate
+            # when polishing
+            nonlocal nfev
+            x = np.asarray(x, dtype=float)
+            batch = x.reshape(2, -1)
+            nfev += batch.shape[1]
+            errors = self.misfit(
+                10 ** batch[0], 10 ** batch[1], map=mapper, nchunks=nchunks
+            )
+            return errors if x.ndim > 1 else errors[0]
+
+        nsolves = self.nsolves
+        try:
+            result = differential_evolution(
+                objective,
+                log_bounds,
+                popsize=popsize,
+                maxiter=maxiter,
+                tol=tol,
+                seed=seed,
+                polish=polish,
+                vectorized=True,
+                updating="deferred",
+            )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return {
+            "radius": 10 ** result.x[0],
+            "strength": 10 ** result.x[1],
+            "misfit": result.fun,
+            "nfev": nfev,
+            "nsolves": self.nsolves - nsolves,
+            "result": result,
+        }
@@ -0,0 +1,439 @@
+"""
+Command line interface for batch runs of the Deep Impact tools.
+
+The ``deepimpact`` command has four subcommands::
+
+    deepimpact solve --radius 35 --velocity 19e3 --density 3000 \\
+        --strength 1e7 --angle 45 --format json
+    deepimpact damage --radius 35 --velocity 19e3 --density 3000 \\
+        --strength 1e7 --angle 45 --lat 52.79 --lon -2.95 --bearing 135
+    deepimpact risk impacts_a.csv impacts_b.csv --workers 4 \\
+        --cache-dir ~/.cache/deepimpact --timings timings.json
+    deepimpact serve --port 8765 --cache-dir ~/.cache/deepimpact
+
+The risk subcommand loads the postcode and census data once (from the cache
+directory, if given) and reuses it, and any worker cluster, for every
+impact file listed. The serve subcommand keeps it loaded in a long-lived
+local HTTP/JSON service (see `deepimpact.service`).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+from .damage import batch_damage_zones, impact_risk
+from .locator import GeospatialLocator
+from .profiling import get_profiler, profile
+from .service import RiskService, json_default
+from .solver import Planet
+
+__all__ = ["main"]
+
+DEFAULT_PRESSURES = [1e3, 3.5e3, 27e3, 43e3]
+
+
+def build_parser():
+    """
+    Return the argument parser for the ``deepimpact`` command.
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "-o", "--output", default="-", help="file to write results to (default stdout)"
+    )
+    common.add_argument(
+        "--format", choices=("csv", "json"), default="csv", help="output format"
+    )
+    common.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the time spent in each stage to stderr",
+    )
+    common.add_argument("--timings", help="file to write a JSON timing summary to")
+    common.add_argument(
+        "--atmos-func",
+        choices=("exponential", "tabular", "constant"),
+        default="exponential",
+        help="atmospheric density model",
+    )
+
+    scenario = argparse.ArgumentParser(add_help=False)
+    for name, unit in (
+        ("radius", "m"),
+        ("velocity", "m/s"),
+        ("density", "kg/m^3"),
+        ("strength", "Pa"),
+        ("angle", "degrees"),
+    ):
+        scenario.add_argument(
+            f"--{name}", type=float, required=True, help=f"{name} ({unit})"
+        )
+    scenario.add_argument(
+        "--init-altitude", type=float, default=100e3, help="initial altitude (m)"
+    )
+    scenario.add_argument("--dt", type=float, default=0.25, help="output timestep (s)")
+
+    emulated = argparse.ArgumentParser(add_help=False)
+    emulated.add_argument(
+        "--emulator", help="outcome emulator table (.npz) to use instead of solving"
+    )
+
+    geodata = argparse.ArgumentParser(add_help=False)
+    geodata.add_argument(
+        "--cache-dir", help="directory to cache the parsed postcode and census data"
+    )
+    geodata.add_argument("--postcode-file", help="postcode .csv file")
+    geodata.add_argument("--census-file", help="census .asc file")
+
+    parser = argparse.ArgumentParser(
+        prog="deepimpact", description=__doc__.split("\n\n")[0].strip()
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser(
+        "solve",
+        parents=[common, scenario],
+        help="solve the atmospheric entry of a single scenario",
+    )
+
+    damage = subparsers.add_parser(
+        "damage",
+        parents=[common, scenario, emulated],
+        help="calculate the damage zones of a single scenario",
+    )
+    damage.add_argument(
+        "--lat", type=float, required=True, help="entry latitude (degrees)"
+    )
+    damage.add_argument(
+        "--lon", type=float, required=True, help="entry longitude (degrees)"
+    )
+    damage.add_argument(
+        "--bearing", type=float, required=True, help="bearing (degrees)"
+    )
+    damage.add_argument(
+        "--pressures",
+        type=float,
+        nargs="+",
+        default=DEFAULT_PRESSURES,
+        help="damage threshold pressures (Pa)",
+    )
+
+    risk = subparsers.add_parser(
+        "risk",
+        parents=[common, geodata, emulated],
+        help="calculate the postcode risk of one or more impact parameter lists",
+    )
+    risk.add_argument(
+        "impact_files",
+        nargs="*",
+        help="impact parameter .csv files (default: the standard list)",
+    )
+    risk.add_argument(
+        "--pressure", type=float, default=30e3, help="damage pressure (Pa)"
+    )
+    risk.add_argument("--nsamples", type=int, help="use the first nsamples impacts")
+    risk.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of dask worker processes (1 runs serially)",
+    )
+    risk.add_argument(
+        "--chunksize", type=int, default=100, help="impacts per worker task"
+    )
+    risk.add_argument(
+        "--checkpoint-dir",
+        help="directory of checkpoints to resume interrupted runs from",
+    )
+    risk.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=100,
+        help="impacts processed between checkpoints",
+    )
+
+    serve = subparsers.add_parser(
+        "serve",
+        parents=[geodata, emulated],
+        help="run a local HTTP/JSON service keeping the data warm",
+    )
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on")
+    serve.add_argument(
+        "--cache-size", type=int, default=4096, help="number of outcomes to cache"
+    )
+    serve.add_argument(
+        "--atmos-func",
+        choices=("exponential", "tabular", "constant"),
+        default="exponential",
+        help="atmospheric density model",
+    )
+
+    return parser
+
+
+def load_locator(postcode_file=None, census_file=None, cache_dir=None):
+    """
+    Load a locator, reading the parsed arrays from the cache directory when
+    the source files have been loaded before and have not changed since.
+
+    Parameters
+    ----------
+    postcode_file, census_file : str, optional
+        Postcode .csv and census .asc files (default: the standard data).
+
+    cache_dir : str, optional
+        Directory holding the cached arrays. No cache is used if None.
+
+    Returns
+    -------
+    GeospatialLocator
+    """
+    files = {}
+    if postcode_file is not None:
+        files["postcode_file"] = postcode_file
+    if census_file is not None:
+        files["census_file"] = census_file
+    if cache_dir is None:
+        return GeospatialLocator(**files)
+
+    # key the cache on the paths, sizes and modification times of the sources
+    defaults = GeospatialLocator.__init__.__defaults__
+    sources = [files.get("postcode_file", defaults[0])]
+    sources.append(files.get("census_file", defaults[1]))
+    key = hashlib.sha1()
+    for source in sources:
+        stat = os.stat(source)
+        key.update(
+            f"{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns};".encode()
+        )
+    cache_file = os.sep.join((cache_dir, f"locator-{key.hexdigest()[:16]}.npz"))
+
+    if os.path.isfile(cache_file):
+        return GeospatialLocator.load(cache_file)
+
+    locator = GeospatialLocator(**files)
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temporary file first so that concurrent jobs never read
+    # a partly written cache
+    partial = f"{cache_file}.{os.getpid()}.npz"
+    locator.save(partial)
+    os.replace(partial, cache_file)
+    return locator
+
+
+def _solve(planet, args):
+    profiler = get_profiler()
+    with profiler.stage("solve"):
+        result = planet.solve_atmospheric_entry(
+            args.radius,
+            args.velocity,
+            args.density,
+            args.strength,
+            args.angle,
+            init_altitude=args.init_altitude,
+            dt=args.dt,
+        )
+    with profiler.stage("energy"):
+        result = planet.calculate_energy(result)
+    with profiler.stage("outcome"):
+        outcome = planet.analyse_outcome(result)
+    return result, outcome
+
+
+def run_solve(planet, args, output):
+    result, outcome = _solve(planet, args)
+    if args.format == "json":
+        json.dump(
+            {"outcome": outcome, "trajectory": result.to_dict(orient="list")},
+            output,
+            default=json_default,
+            indent=2,
+        )
+        output.write("\n")
+    else:
+        result.to_csv(output, index=False)
+    return [{"job": "solve"}]
+
+
+def run_damage(planet, args, output):
+    if planet.emulator is not None:
+        outcome = planet.emulate_outcome(
+            args.radius, args.velocity, args.density, args.strength, args.angle
+        )
+    else:
+        outcome = _solve(planet, args)[1]
+    with get_profiler().stage("damage_radii"):
+        # one radius per requested pressure, NaN where it isn't reached
+        blat, blon, radii = batch_damage_zones(
+            {key: [value] for key, value in outcome.items()},
+            args.lat,
+            args.lon,
+            args.bearing,
+            args.pressures,
+        )
+        blat, blon, radii = float(blat[0]), float(blon[0]), radii[0]
+    if args.format == "json":
+        json.dump(
+            {
+                "outcome": outcome,
+                "blast_lat": blat,
+                "blast_lon": blon,
+                "pressures": args.pressures,
+                "damage_radii": [None if np.isnan(r) else float(r) for r in radii],
+            },
+            output,
+            default=json_default,
+            indent=2,
+        )
+        output.write("\n")
+    else:
+        output.write("pressure,damage_radius,blast_lat,blast_lon\n")
+        for pressure, radius in zip(args.pressures, radii):
+            output.write(f"{pressure!r},{float(radius)!r},{blat!r},{blon!r}\n")
+    return [{"job": "damage"}]
+
+
+def run_risk(planet, args, output):
+    locator = load_locator(args.postcode_file, args.census_file, args.cache_dir)
+    impact_files = args.impact_files or [impact_risk.__defaults__[0]]
+
+    if args.workers > 1:
+        import distributed
+
+        cluster = distributed.LocalCluster(
+            n_workers=args.workers, threads_per_worker=1, dashboard_address=None
+        )
+        client = distributed.Client(cluster)
+        backend = "dask"
+    else:
+        cluster = client = None
+        backend = "serial"
+
+    jobs, results = [], []
+    try:
+        for impact_file in impact_files:
+            start = time.perf_counter()
+            checkpoint = None
+            if args.checkpoint_dir is not None:
+                os.makedirs(args.checkpoint_dir, exist_ok=True)
+                name = os.path.splitext(os.path.basename(impact_file))[0]
+                checkpoint = os.sep.join(
+                    (args.checkpoint_dir, f"{name}.checkpoint.json")
+                )
+            probability, population = impact_risk(
+                planet,
+                impact_file=impact_file,
+                pressure=args.pressure,
+                nsamples=args.nsamples,
+                locator=locator,
+                backend=backend,
+                client=client,
+                chunksize=args.chunksize,
+                checkpoint=checkpoint,
+                checkpoint_every=args.checkpoint_every,
+            )
+            jobs.append(
+                {"impact_file": impact_file, "wall_time": time.perf_counter() - start}
+            )
+            results.append((impact_file, probability, population))
+    finally:
+        if client is not None:
+            client.close()
+            cluster.close()
+
+    if args.format == "json":
+        json.dump(
+            [
+                {
+                    "impact_file": impact_file,
+                    "population": population,
+                    "probability": dict(
+                        zip(probability["Postcode"], probability["probability"])
+                    ),
+                }
+                for impact_file, probability, population in results
+            ],
+            output,
+            default=json_default,
+            indent=2,
+        )
+        output.write("\n")
+    else:
+        # the population statistics don't fit the postcode table, so
+        # they are reported on stderr
+        for i, (impact_file, probability, population) in enumerate(results):
+            probability.insert(0, "impact_file", impact_file)
+            probability.to_csv(output, index=False, header=i == 0)
+            print(
+                f"{impact_file}: population affected "
+                f"{population['mean']:.0f} +/- {population['stdev']:.0f}",
+                file=sys.stderr,
+            )
+    return jobs
+
+
+COMMANDS = {"solve": run_solve, "damage": run_damage, "risk": run_risk}
+
+
+def main(argv=None):
+    """
+    Run the ``deepimpact`` command.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        Command line arguments (default: sys.argv[1:]).
+
+    Returns
+    -------
+    int
+        The exit status.
+    """
+    args = build_parser().parse_args(argv)
+    start = time.perf_counter()
+
+    if args.command == "serve":
+        service = RiskService(
+            planet=Planet(atmos_func=args.atmos_func, emulator=args.emulator),
+            locator=load_locator(args.postcode_file, args.census_file, args.cache_dir),
+            cache_size=args.cache_size,
+        )
+        print(f"Serving on http://{args.host}:{args.port}", file=sys.stderr)
+        service.serve(args.host, args.port)
+        return 0
+
+    profiled = args.profile or args.timings is not None
+    with profile() if profiled else nullcontext() as profiler:
+        planet = Planet(
+            atmos_func=args.atmos_func, emulator=getattr(args, "emulator", None)
+        )
+        if args.output == "-":
+            jobs = COMMANDS[args.command](planet, args, sys.stdout)
+        else:
+            with open(args.output, "w", newline="") as output:
+                jobs = COMMANDS[args.command](planet, args, output)
+
+    if profiled:
+        report = profiler.report()
+        if args.profile:
+            print(report, file=sys.stderr)
+        if args.timings is not None:
+            summary = {
+                "command": args.command,
+                "wall_time": time.perf_counter() - start,
+                "jobs": jobs,
+                "profile": report.to_dict(),
+            }
+            with open(args.timings, "w") as file:
+                json.dump(summary, file, indent=2)
+                file.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
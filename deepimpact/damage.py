@@ -1,14 +1,16 @@
 """Module to calculate the damage and impact risk for given scenarios"""
 from collections import Counter
-from folium.plugins import HeatMap
+from contextlib import nullcontext
+import hashlib
+import json
 import os
 import math
 import pandas as pd
-import folium
 import numpy as np
 import deepimpact
+from .profiling import get_profiler
 
-__all__ = ["damage_zones", "impact_risk"]
+__all__ = ["damage_zones", "batch_damage_zones", "impact_risk"]
 
 
 def damage_zones(outcome, lat, lon, bearing, pressures):
@@ -66,6 +68,154 @@ def damage_zones(outcome, lat, lon, bearing, pressures):
     return blat, blon, damrad
 
 
+def batch_damage_zones(
+    outcomes, lat, lon, bearing, pressures, fill_value=np.nan, model=None
+):
+    """
+    Calculate the surface zero locations and airblast damage radii of a
+    whole table of impact scenarios at once.
+
+    Parameters
+    ----------
+
+    outcomes: DataFrame or dict of arraylike
+        Columnar outcomes, with columns 'burst_altitude', 'burst_energy'
+        and (optionally, default 0) 'burst_distance'
+    lat: float or arraylike
+        latitudes of the meteoroid entry points (degrees)
+    lon: float or arraylike
+        longitudes of the meteoroid entry points (degrees)
+    bearing: float or arraylike
+        Bearings (azimuth) relative to north of the meteoroid trajectories
+        (degrees)
+    pressures: float, arraylike
+        List of threshold pressures to define airblast damage levels
+    fill_value: float
+        Radius reported where a damage level isn't reached, e.g. NaN
+        (default) or 0
+    model: callable, optional
+        Alternative vectorized overpressure model, model(r, z_b, E_k)
+        (see `blast_radii`)
+
+    Returns
+    -------
+
+    blat: numpy.ndarray
+        (n,) latitudes of the surface zero points (degrees)
+    blon: numpy.ndarray
+        (n,) longitudes of the surface zero points (degrees)
+    damrad: numpy.ndarray
+        (n, m) blast radii (m) of the n scenarios for the m damage levels,
+        in the order of pressures, with fill_value where a level isn't
+        reached
+
+    Examples
+    --------
+
+    >>> import pandas as pd, deepimpact
+    >>> outcomes = pd.DataFrame({'burst_altitude': [8e3, 9e3], 'burst_energy': [7e3, 6e3],
+    ...                          'burst_distance': [90e3, 80e3]})
+    >>> blat, blon, damrad = deepimpact.batch_damage_zones(
+    ...     outcomes, 52.79, -2.95, 135, pressures=[1e3, 3.5e3, 27e3, 43e3])
+    >>> damrad.shape
+    (2, 4)
+    """
+    burst_altitude = np.asarray(outcomes["burst_altitude"], dtype=float)
+    burst_energy = np.asarray(outcomes["burst_energy"], dtype=float)
+    if "burst_distance" in outcomes:
+        burst_distance = np.asarray(outcomes["burst_distance"], dtype=float)
+    else:
+        burst_distance = np.zeros_like(burst_altitude)
+
+    blat, blon = find_destinations(lat, lon, bearing, burst_distance)
+    damrad = blast_radii(pressures, burst_altitude, burst_energy, fill_value, model)
+
+    return blat, blon, damrad
+
+
+def blast_radii(pressures, z_b, E_k, fill_value=np.nan, model=None):
+    """
+    Vectorized damage radii of the airblast model for arrays of bursts.
+
+    The airblast overpressure depends on the radius and burst altitude only
+    through the scaled distance s = (r**2 + z_b**2) / E_k**(2/3), so one
+    root in s is found per pressure, and the radii of every burst follow
+    from it directly.
+
+    Parameters
+    ----------
+
+    pressures: float, arraylike
+        (m,) target pressures (Pa)
+    z_b: float, arraylike
+        (n,) burst altitudes (m)
+    E_k: float, arraylike
+        (n,) burst energies (kt TNT)
+    fill_value: float
+        Radius reported where a pressure isn't reached on the ground
+    model: callable, optional
+        Alternative vectorized overpressure model, model(r, z_b, E_k),
+        returning the overpressure (Pa) at arrays of radii r (m), which
+        must decrease with r. Its radii are found with `brent_roots` on
+        the bracket 0 < r < 1e9 m. Default is the airblast model of
+        `airblast_func`.
+
+    Returns
+    -------
+
+    numpy.ndarray
+        (n, m) damage radii (m)
+
+    Examples
+    --------
+
+    >>> blast_radii([1e3, 30e3], z_b=[8e3, 20e3], E_k=[7e3, 7e3])
+    array([[117474.6...,   8643.0...],
+           [116035.7...,        nan]])
+    """
+    pressures = np.atleast_1d(np.asarray(pressures, dtype=float))
+    z_b = np.atleast_1d(np.asarray(z_b, dtype=float))
+    E_k = np.atleast_1d(np.asarray(E_k, dtype=float))
+
+    if model is not None:
+        radii, _ = brent_roots(
+            lambda r, z_b, E_k, pressure: model(r, z_b, E_k) - pressure,
+            0.0,
+            1e9,
+            args=(z_b[:, None], E_k[:, None], pressures[None, :]),
+        )
+        return np.where(radii > 0, radii, fill_value)
+
+    scaled = _scaled_blast_distance(pressures)
+    with np.errstate(invalid="ignore"):
+        r2 = scaled[None, :] * np.power(E_k, 2 / 3)[:, None] - z_b[:, None] ** 2
+        return np.where(r2 > 0, np.sqrt(r2), fill_value)
+
+
+def _scaled_blast_distance(pressures):
+    """
+    Scaled distances s at which the airblast overpressure
+    3e11 s**-1.3 + 2e7 s**-0.57 equals each of the given pressures (NaN
+    for pressures which are not positive).
+    """
+    positive = pressures > 0
+    logp = np.log(np.where(positive, pressures, 1.0))
+
+    # Newton's method on u = log(s). The log pressure is a convex,
+    # decreasing function of u, so starting from the largest single-term
+    # solution (below the root) the iterates increase monotonically to it.
+    u = np.maximum((np.log(3e11) - logp) / 1.3, (np.log(2e7) - logp) / 0.57)
+    for _ in range(50):
+        a = 3e11 * np.exp(-1.3 * u)
+        b = 2e7 * np.exp(-0.57 * u)
+        step = (np.log(a + b) - logp) * (a + b) / (1.3 * a + 0.57 * b)
+        u = u + step
+        if np.all(np.abs(step) < 1e-13 * np.maximum(np.abs(u), 1.0)):
+            break
+
+    return np.where(positive, np.exp(u), np.nan)
+
+
 def find_destination(lat, lon, bearing, distance):
     """
     Calculate the latitude and longitude of the surface zero location point,
@@ -145,6 +295,92 @@ def find_destination(lat, lon, bearing, distance):
     return math.degrees(lat2), math.degrees(lon2)
 
 
+def find_destinations(lat, lon, bearing, distance):
+    """
+    Vectorized version of `find_destination`: calculate the latitudes and
+    longitudes of the surface zero points of whole arrays of entry points,
+    bearings and burst distances in a single pass.
+
+    Parameters
+    ----------
+
+    lat : float or arraylike
+        The latitudes of the entry points in degrees.
+    lon : float or arraylike
+        The longitudes of the entry points in degrees.
+    bearing : float or arraylike
+        The bearings from the entry points in degrees, clockwise from north.
+    distance : float or arraylike
+        The distances to the destinations from the entry points in meters.
+
+    The inputs are broadcast against one another.
+
+    Returns
+    -------
+
+    zero_lat : numpy.ndarray
+        The latitudes of the surface zero location points in degrees.
+    zero_lon : numpy.ndarray
+        The longitudes of the surface zero location points in degrees,
+        wrapped into [-180, 180].
+
+    Notes
+    -----
+
+    As in `find_destination`, entries at a pole keep their latitude and
+    have their longitude rotated by the bearing. The longitude change uses
+    arctan2, so it is in the correct quadrant wherever the denominator of
+    the arctan of `find_destination` is negative: near the poles (e.g. 50
+    km on a bearing of 45 degrees from (89.9, 179.9) is at longitude
+    -55.67, where `find_destination` gives 124.33) and for destinations
+    more than a quarter of the way around the Earth. Elsewhere the two
+    agree to rounding. `batch_damage_zones`, and so `impact_risk`, use
+    this version.
+
+    Examples
+    --------
+    >>> from deepimpact.damage import find_destinations
+    >>> find_destinations([52.79, 89.0], [-2.95, 179.0], [135, 90], [90e3, 50e3])
+    (array([52.21..., 88.90...]), array([-2.01..., -156.78...]))
+    """
+    R = 6371000  # Radius of the Earth in meters
+
+    lat, lon, bearing, distance = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (lat, lon, bearing, distance))
+    )
+
+    # Check for edge cases
+    if np.any((lat < -90) | (lat > 90)):
+        raise ValueError("The entry latitude is out of range.")
+    if np.any((lon < -180) | (lon > 180)):
+        raise ValueError("The entry longitude is out of range.")
+
+    bearing = np.radians(bearing)
+    phi1 = np.radians(lat)
+    delta = distance / R
+
+    sin_phi2 = np.sin(phi1) * np.cos(delta) + np.cos(phi1) * np.sin(delta) * np.cos(
+        bearing
+    )
+    lat2 = np.arcsin(np.clip(sin_phi2, -1.0, 1.0))
+
+    lon2 = np.radians(lon) + np.arctan2(
+        np.sin(bearing) * np.sin(delta) * np.cos(phi1),
+        np.cos(delta) - np.sin(phi1) * np.sin(lat2),
+    )
+
+    # Entries at the poles keep their latitude, rotated by the bearing
+    pole = np.abs(lat) == 90
+    lat2 = np.where(pole, phi1, lat2)
+    lon2 = np.where(pole, np.radians(lon) + bearing, lon2)
+
+    # Adjust longitudes outside the range (across the antimeridian)
+    outside = (lon2 < -np.pi) | (lon2 > np.pi)
+    lon2 = np.where(outside, (lon2 + np.pi) % (2 * np.pi) - np.pi, lon2)
+
+    return np.degrees(lat2), np.degrees(lon2)
+
+
 def airblast_func(r, z_b, E_k, pressure):
     """
     The airblast function used to calculate the damage radius for a target
@@ -256,6 +492,142 @@ def brents_method(z_b, E_k, pressure, x0, x1, max_iter=100, tolerance=1e-5):
     return x1
 
 
+def brent_roots(f, a, b, args=(), xtol=1e-5, rtol=4 * np.finfo(float).eps, maxiter=100):
+    """
+    Vectorized bracketed root finder (Brent's method) for many problems at
+    once.
+
+    Each element is iterated until its own bracket is smaller than the
+    tolerance, and is then masked out, so f is only evaluated once per
+    iteration, and only for the elements still converging. The function
+    values at the ends of each bracket are cached rather than recomputed.
+
+    Parameters
+    ----------
+    f : callable
+        Vectorized function f(x, *args) returning an array of the same
+        shape as x. It is called with 1D arrays of the unconverged
+        elements of x and of each array in args.
+    a, b : float or arraylike
+        The ends of the brackets. f(a) and f(b) must differ in sign.
+    args : tuple, optional
+        Extra arguments of f, broadcast against a and b.
+    xtol, rtol : float, optional
+        Absolute and relative tolerance on the root.
+    maxiter : int, optional
+        Maximum number of iterations.
+
+    Returns
+    -------
+    roots : numpy.ndarray
+        The roots, with the broadcast shape of a, b and args. NaN where
+        f(a) and f(b) have the same sign.
+    converged : numpy.ndarray
+        Boolean mask of the roots which converged within maxiter.
+
+    Notes
+    -----
+    The iteration follows Brent's method as implemented in scipy's brentq,
+    applied element by element with masks.
+
+    Examples
+    --------
+    >>> f = lambda x, c: x**2 - c
+    >>> roots, converged = brent_roots(f, 0, 10, args=([2.0, 9.0],), xtol=1e-12)
+    >>> roots
+    array([1.41421356, 3.        ])
+    """
+    arrays = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (a, b) + tuple(args))
+    )
+    shape = arrays[0].shape
+    xpre, xcur, *args = (np.array(x).ravel() for x in arrays)
+
+    fpre = np.asarray(f(xpre, *args), dtype=float)
+    fcur = np.asarray(f(xcur, *args), dtype=float)
+
+    roots = np.full(xcur.shape, np.nan)
+    converged = np.zeros(xcur.shape, dtype=bool)
+
+    # roots at the ends of the brackets, and brackets without a sign change
+    at_a, at_b = fpre == 0, (fcur == 0) & (fpre != 0)
+    roots[at_a], roots[at_b] = xpre[at_a], xcur[at_b]
+    converged[at_a | at_b] = True
+    index = np.flatnonzero(~converged & (np.sign(fpre) != np.sign(fcur)))
+
+    xpre, xcur, fpre, fcur = xpre[index], xcur[index], fpre[index], fcur[index]
+    args = [arg[index] for arg in args]
+    xblk, fblk = np.zeros_like(xcur), np.zeros_like(xcur)
+    spre, scur = np.zeros_like(xcur), np.zeros_like(xcur)
+
+    for _ in range(maxiter):
+        # keep the bracket [xcur, xblk] around the root
+        change = (fpre != 0) & (fcur != 0) & (np.signbit(fpre) != np.signbit(fcur))
+        xblk = np.where(change, xpre, xblk)
+        fblk = np.where(change, fpre, fblk)
+        spre = np.where(change, xcur - xpre, spre)
+        scur = np.where(change, xcur - xpre, scur)
+
+        # make xcur the better of the two ends
+        swap = np.abs(fblk) < np.abs(fcur)
+        xpre, xcur, xblk = (
+            np.where(swap, xcur, xpre),
+            np.where(swap, xblk, xcur),
+            np.where(swap, xcur, xblk),
+        )
+        fpre, fcur, fblk = (
+            np.where(swap, fcur, fpre),
+            np.where(swap, fblk, fcur),
+            np.where(swap, fcur, fblk),
+        )
+
+        delta = (xtol + rtol * np.abs(xcur)) / 2
+        sbis = (xblk - xcur) / 2
+
+        # mask out the converged elements
+        done = (fcur == 0) | (np.abs(sbis) < delta)
+        if np.any(done):
+            roots[index[done]] = xcur[done]
+            converged[index[done]] = True
+            keep = ~done
+            index = index[keep]
+            xpre, xcur, xblk = xpre[keep], xcur[keep], xblk[keep]
+            fpre, fcur, fblk = fpre[keep], fcur[keep], fblk[keep]
+            spre, scur = spre[keep], scur[keep]
+            delta, sbis = delta[keep], sbis[keep]
+            args = [arg[keep] for arg in args]
+        if index.size == 0:
+            break
+
+        # try inverse quadratic interpolation (or the secant method)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            secant = -fcur * (xcur - xpre) / (fcur - fpre)
+            dpre = (fpre - fcur) / (xpre - xcur)
+            dblk = (fblk - fcur) / (xblk - xcur)
+            quadratic = (
+                -fcur * (fblk * dblk - fpre * dpre) / (dblk * dpre * (fblk - fpre))
+            )
+        stry = np.where(xpre == xblk, secant, quadratic)
+
+        interpolate = (np.abs(spre) > delta) & (np.abs(fcur) < np.abs(fpre))
+        good = interpolate & (
+            2 * np.abs(stry) < np.minimum(np.abs(spre), 3 * np.abs(sbis) - delta)
+        )
+        # fall back on bisection when interpolation isn't good enough
+        spre, scur = np.where(good, scur, sbis), np.where(good, stry, sbis)
+
+        xpre, fpre = xcur, fcur
+        xcur = xcur + np.where(
+            np.abs(scur) > delta, scur, np.where(sbis > 0, delta, -delta)
+        )
+        fcur = np.asarray(f(xcur, *args), dtype=float)
+
+    # elements which ran out of iterations return their best estimate
+    roots[index] = xcur
+
+    return roots.reshape(shape), converged.reshape(shape)
+
+
 def calculate_damage_radius(target_pressures, z_b, E_k):
     """
     Calculate the damage radius for a given set of target pressures, depth
@@ -271,19 +643,14 @@ def calculate_damage_radius(target_pressures, z_b, E_k):
 
     Examples:
     >>> calculate_damage_radius([1e3, 4e3, 30e3, 50e3], z_b=8e3, E_k=7e3)
-    [0.0, 0.0, 0.0, 0.0]
+    [117474.6..., 39031.7..., 8643.0..., 4436.2...]
     """
 
-    # Create an empty list to store the radii and iterate through the target_pressures
-    radii = []
-    for i in target_pressures:
-        radius = brents_method(z_b, E_k, i, 0, 1e9)
-        if radius == 0:
-            pass
-        else:
-            radii.append(radius)
+    # Solve for every target pressure at once (see `blast_radii`), dropping
+    # the pressures which aren't reached
+    radii = blast_radii(target_pressures, z_b, E_k)[0]
 
-    return radii
+    return [float(radius) for radius in radii if radius > 0]
 
 
 def impact_risk(
@@ -293,6 +660,12 @@ def impact_risk(
     ),
     pressure=30.0e3,
     nsamples=None,
+    locator=None,
+    backend="serial",
+    client=None,
+    chunksize=100,
+    checkpoint=None,
+    checkpoint_every=100,
 ):
     """
     Perform an uncertainty analysis to calculate the probability for
@@ -303,10 +676,12 @@ def impact_risk(
     planet: deepimpact.Planet instance
         The Planet instance from which to solve the atmospheric entry
 
-    impact_file: str
+    impact_file: str, DataFrame or dict
         Filename of a .csv file containing the impact parameter list
         with columns for 'radius', 'angle', 'velocity', 'strength',
-        'density', 'entry latitude', 'entry longitude', 'bearing'
+        'density', 'entry latitude', 'entry longitude', 'bearing', or
+        the impact parameters themselves as a DataFrame or dictionary of
+        arrays with those columns (e.g. from `deepimpact.sample_impacts`)
 
     pressure: float
         A single pressure at which to calculate the damage zone for each impact
@@ -316,6 +691,48 @@ def impact_risk(
         If None, the full set of impact parameters provided in impact_file
         is used.
 
+    locator: deepimpact.GeospatialLocator instance or None
+        The locator used to find the postcodes and population inside each
+        damage zone. If None, one is created from the default data files.
+
+    backend: str
+        Either 'serial', to process the impacts one after another in this
+        process, or 'dask', to partition them into dask tasks (see
+        `deepimpact.parallel.dask_impact_risk`).
+
+    client: distributed.Client or None
+        The dask client to submit tasks to with the 'dask' backend. If
+        None, the current client is used, or a temporary LocalCluster is
+        started for the call.
+
+    chunksize: int
+        The number of impacts in each dask task.
+
+    checkpoint: str or None
+        Filename of a checkpoint file. If given, the tally of the impacts
+        processed so far is written to it (atomically) after every
+        ``checkpoint_every`` impacts, and if it already exists, the
+        analysis continues from the impacts after those it records. The
+        final result is identical to that of an uninterrupted run. The
+        file is removed once the analysis completes, so a later run with
+        a different planet or locator starts afresh.
+
+    checkpoint_every: int
+        The number of impacts processed between checkpoints. With the
+        'dask' backend, at least ``chunksize`` times the number of worker
+        threads, so that the workers run in parallel between checkpoints.
+
+    If the planet was created with an outcome emulator, the outcomes of
+    all the scenarios are interpolated from its precomputed table instead
+    of being solved one at a time. The damage zones of each batch of
+    impacts are always found in one vectorized pass, but the postcodes and
+    population inside them are still queried one impact at a time, so with
+    an emulator these locator queries dominate the run time.
+
+    Run inside `deepimpact.profile()` to record the time spent in each
+    stage (data_load, solve, energy, outcome, damage_radii,
+    postcode_query and population_query) of the serial backend.
+
     Returns
     -------
     probability: DataFrame
@@ -336,60 +753,332 @@ def impact_risk(
     if not isinstance(pressure, (int, float, complex)):
         return (False, False)
 
+    profiler = get_profiler()
+
     # read senario
-    data = pd.read_csv(impact_file)
+    with profiler.stage("data_load"):
+        data = read_impacts(impact_file)
     data = data.iloc[:nsamples]
-    postcodes_all = []
-    population_all = []
-
-    # run model to get the postcode and popoluartion in different
-    # pressure level
-    for i in range(data.shape[0]):
-        result = planet.solve_atmospheric_entry(
-            radius=data.loc[i, "radius"],
-            angle=data.loc[i, "angle"],
-            strength=data.loc[i, "strength"],
-            density=data.loc[i, "density"],
-            velocity=data.loc[i, "velocity"],
-        )
-        result = planet.calculate_energy(result)
-        outcome = planet.analyse_outcome(result)
-
-        # calculate the damage radius and surface zero point
-        blast_lat, blast_lon, damage_rad = damage_zones(
-            outcome,
-            lat=data.loc[i, "entry latitude"],
-            lon=data.loc[i, "entry longitude"],
-            bearing=data.loc[i, "bearing"],
-            pressures=[pressure],
+
+    # the postcode and census data only need to be loaded once
+    if locator is None:
+        locator = deepimpact.GeospatialLocator()
+
+    if backend == "dask":
+        from .parallel import DaskTallier
+
+        # one client, and one copy of the planet and locator on the
+        # workers, for every block
+        tallier = DaskTallier(planet, locator, pressure, client, chunksize)
+
+    elif backend == "serial":
+
+        def tally_block(block):
+            return tally_impacts(planet, locator, block, pressure)
+
+        tallier = nullcontext(tally_block)
+
+    else:
+        raise ValueError("backend must be 'serial' or 'dask'")
+
+    with tallier as tally_block:
+        if checkpoint is None:
+            return finalise_tally(tally_block(data))
+        if backend == "dask":
+            # each block is split into tasks of chunksize impacts, so give
+            # every worker thread a task between checkpoints
+            checkpoint_every = max(checkpoint_every, chunksize * tally_block.nthreads)
+        return _checkpointed_risk(
+            tally_block, data, pressure, checkpoint, checkpoint_every
         )
 
-        # get the postcode and population in the damage radius
-        locators = deepimpact.GeospatialLocator()
-        postcodes = locators.get_postcodes_by_radius(
-            (blast_lat, blast_lon), radii=damage_rad
+
+def _checkpointed_risk(tally_block, data, pressure, checkpoint, checkpoint_every):
+    """
+    Tally a table of impacts in blocks of ``checkpoint_every`` impacts,
+    resuming from and writing the checkpoint file (see `impact_risk`).
+    """
+
+    # the checkpoint is only valid for the same impacts and pressure
+    fingerprint = hashlib.sha1(repr(float(pressure)).encode())
+    fingerprint.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    fingerprint = fingerprint.hexdigest()
+
+    tally, cursor = empty_tally(), 0
+    if os.path.isfile(checkpoint):
+        tally, cursor = read_checkpoint(checkpoint, fingerprint)
+
+    while cursor < data.shape[0]:
+        block = data.iloc[slice(cursor, cursor + checkpoint_every)]
+        tally = merge_tallies(tally, tally_block(block))
+        cursor += block.shape[0]
+        write_checkpoint(checkpoint, tally, cursor, fingerprint)
+
+    # only an interrupted run is resumed
+    if os.path.isfile(checkpoint):
+        os.remove(checkpoint)
+    return finalise_tally(tally)
+
+
+def write_checkpoint(filename, tally, cursor, fingerprint):
+    """
+    Atomically write an impact risk checkpoint.
+
+    The checkpoint is written to a temporary file in the same directory,
+    flushed to disk and renamed over the old checkpoint, so a crash at any
+    point leaves either the old or the new checkpoint, never a partial one.
+
+    Parameters
+    ----------
+    filename: str
+        Filename of the checkpoint
+    tally: dict
+        The tally of the impacts processed so far (see `empty_tally`)
+    cursor: int
+        The number of impacts (rows of the impact table) processed so far
+    fingerprint: str
+        Identifier of the impact table and pressure of the analysis
+    """
+    state = {
+        "fingerprint": fingerprint,
+        "cursor": cursor,
+        "nsamples": tally["nsamples"],
+        # a list of pairs, to keep the postcodes in the order first hit
+        "hits": list(tally["hits"].items()),
+        "population": tally["population"],
+    }
+    partial = f"{filename}.{os.getpid()}.tmp"
+    with open(partial, "w") as file:
+        json.dump(state, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(partial, filename)
+
+
+def read_checkpoint(filename, fingerprint):
+    """
+    Read an impact risk checkpoint written by `write_checkpoint`.
+
+    Parameters
+    ----------
+    filename: str
+        Filename of the checkpoint
+    fingerprint: str
+        Identifier of the impact table and pressure of the analysis, which
+        must match that of the checkpoint
+
+    Returns
+    -------
+    tally: dict
+        The tally of the impacts processed (see `empty_tally`)
+    cursor: int
+        The number of impacts processed
+    """
+    with open(filename) as file:
+        state = json.load(file)
+    if state["fingerprint"] != fingerprint:
+        raise ValueError(
+            f"Checkpoint {filename} is of a different impact list or pressure"
         )
-        population = locators.get_population_by_radius(
-            (blast_lat, blast_lon), radii=damage_rad
+    tally = {
+        "nsamples": state["nsamples"],
+        "hits": Counter(dict(state["hits"])),
+        "population": state["population"],
+    }
+    return tally, state["cursor"]
+
+
+def read_impacts(impacts):
+    """
+    Return a table of impact parameters as a DataFrame.
+
+    Parameters
+    ----------
+    impacts: str, DataFrame or dict
+        Filename of a .csv file of impact parameters, or the parameters
+        as a DataFrame or dictionary of arrays, which are used in memory
+
+    Returns
+    -------
+    DataFrame
+    """
+    if isinstance(impacts, pd.DataFrame):
+        return impacts
+    if isinstance(impacts, (str, os.PathLike)):
+        return pd.read_csv(impacts)
+    return pd.DataFrame(impacts)
+
+
+def empty_tally():
+    """
+    Return an empty impact risk tally.
+
+    A tally accumulates the results of a batch of impacts: the number of
+    impacts ``nsamples``, a Counter of the number of impacts which hit
+    each postcode ``hits`` and the integer moments of the affected
+    population ``population`` (count, sum and sum of squares). Tallies of
+    separate batches can be combined exactly with `merge_tallies`.
+
+    Returns
+    -------
+    dict
+    """
+    return {"nsamples": 0, "hits": Counter(), "population": [0, 0, 0]}
+
+
+def merge_tallies(first, second):
+    """
+    Combine the tallies of two batches of impacts.
+
+    The postcodes of the first tally come first, so merging the tallies of
+    consecutive batches in order gives the same result as tallying all of
+    the impacts at once.
+
+    Parameters
+    ----------
+    first, second: dict
+        Tallies, as returned by `tally_impacts`
+
+    Returns
+    -------
+    dict
+        The combined tally
+    """
+    hits = Counter(first["hits"])
+    hits.update(second["hits"])
+    return {
+        "nsamples": first["nsamples"] + second["nsamples"],
+        "hits": hits,
+        "population": [
+            a + b for a, b in zip(first["population"], second["population"])
+        ],
+    }
+
+
+def tally_impacts(planet, locator, data, pressure):
+    """
+    Find the postcodes and population inside the damage zone of each
+    impact in a table of impact parameters.
+
+    Parameters
+    ----------
+    planet: deepimpact.Planet instance
+        The Planet instance from which to solve the atmospheric entry
+
+    locator: deepimpact.GeospatialLocator instance
+        The locator used to find the postcodes and population
+
+    data: DataFrame
+        Impact parameters, with the columns of the impact_risk input file
+
+    pressure: float
+        The pressure at which to calculate the damage zone for each impact
+
+    Returns
+    -------
+    dict
+        The tally of the impacts (see `empty_tally`)
+    """
+    data = data.reset_index(drop=True)
+    tally = empty_tally()
+    tally["nsamples"] = data.shape[0]
+    count, total, squares = tally["population"]
+
+    profiler = get_profiler()
+
+    # with an outcome emulator, interpolate all the outcomes in one pass
+    if getattr(planet, "emulator", None) is not None:
+        with profiler.stage("outcome"):
+            outcomes = planet.emulate_outcome(
+                radius=data["radius"].values,
+                velocity=data["velocity"].values,
+                density=data["density"].values,
+                strength=data["strength"].values,
+                angle=data["angle"].values,
+            )
+    else:
+        # run model to get the outcome of each scenario
+        outcomes = []
+        for i in range(data.shape[0]):
+            with profiler.stage("solve"):
+                result = planet.solve_atmospheric_entry(
+                    radius=data.loc[i, "radius"],
+                    angle=data.loc[i, "angle"],
+                    strength=data.loc[i, "strength"],
+                    density=data.loc[i, "density"],
+                    velocity=data.loc[i, "velocity"],
+                )
+            with profiler.stage("energy"):
+                result = planet.calculate_energy(result)
+            with profiler.stage("outcome"):
+                outcomes.append(planet.analyse_outcome(result))
+        outcomes = {
+            key: [outcome[key] for outcome in outcomes]
+            for key in ("burst_altitude", "burst_energy", "burst_distance")
+        }
+
+    # calculate the damage radii and surface zero points of all the
+    # impacts at once, NaN where the pressure isn't reached
+    with profiler.stage("damage_radii"):
+        blast_lat, blast_lon, damage_rad = batch_damage_zones(
+            outcomes,
+            lat=data["entry latitude"].values,
+            lon=data["entry longitude"].values,
+            bearing=data["bearing"].values,
+            pressures=[pressure],
         )
 
-        # check did the the highest pressure reach 30kp
-        if len(postcodes) != 0:
-            postcodes_all = postcodes_all + postcodes[-1]
-            population_all.append(population[-1])
+    # get the postcode and population in the damage radius of each impact
+    # which reached the pressure
+    for i in np.flatnonzero(damage_rad[:, 0] > 0):
+        centre = (blast_lat[i], blast_lon[i])
+        postcodes = locator.get_postcodes_by_radius(centre, radii=damage_rad[i])
+        population = locator.get_population_by_radius(centre, radii=damage_rad[i])
+
+        tally["hits"].update(postcodes[-1])
+        count += 1
+        total += int(population[-1])
+        squares += int(population[-1]) ** 2
+
+    tally["population"] = [count, total, squares]
+    return tally
+
+
+def finalise_tally(tally):
+    """
+    Convert a tally into the impact_risk outputs.
+
+    The population moments are accumulated as exact integers, so the
+    result does not depend on how the impacts were split into batches.
+
+    Parameters
+    ----------
+    tally: dict
+        The tally of all the impacts (see `empty_tally`)
 
+    Returns
+    -------
+    probability: DataFrame
+        A pandas DataFrame with columns for postcode and the
+        probability the postcode was inside the blast radius.
+    population: dict
+        A dictionary containing the mean and standard deviation of the
+        population affected by the impact, with keys 'mean' and 'stdev'.
+    """
     # calculate the possibility
-    element_counts = Counter(postcodes_all)
-    postcodes_code = list(element_counts.keys())
-    postcodes_prob = list(element_counts.values())
-    postcodes_prob = [i / data.shape[0] for i in postcodes_prob]
+    postcodes_code = list(tally["hits"].keys())
+    postcodes_prob = [i / tally["nsamples"] for i in tally["hits"].values()]
+
+    count, total, squares = tally["population"]
+    if count == 0:
+        mean = stdev = float("nan")
+    else:
+        mean = total / count
+        stdev = math.sqrt((count * squares - total**2) / count**2)
 
     return (
         pd.DataFrame({"Postcode": postcodes_code, "probability": postcodes_prob}),
-        {
-            "mean": float(np.mean(population_all)),
-            "stdev": float(np.std(population_all)),
-        },
+        {"mean": float(mean), "stdev": float(stdev)},
     )
 
 
@@ -430,7 +1119,10 @@ def impact_risk_plot(probability):
         how="left",
     )
 
-    # plot map
+    # plot map (folium is slow to import, so only load it here)
+    import folium
+    from folium.plugins import HeatMap
+
     m = folium.Map(
         location=[data_with_weights.Latitude[0], data_with_weights.Longitude[0]],
         zoom_start=13,
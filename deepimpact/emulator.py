@@ -0,0 +1,493 @@
+"""
+This module contains a precomputed outcome emulator for the Deep Impact
+project, used to approximate the airburst solver for very large ensembles
+"""
+import numpy as np
+
+__all__ = ["OutcomeEmulator"]
+
+# Entry parameters spanned by the emulator, in the order used by the table
+PARAMETERS = ("radius", "velocity", "density", "strength", "angle")
+
+# Parameters which are tabulated and interpolated in log space
+LOG_PARAMETERS = ("radius", "strength")
+
+# Outcome values stored in the table, as returned by Planet.analyse_outcome
+OUTPUTS = ("burst_peak_dedz", "burst_altitude", "burst_distance", "burst_energy")
+
+# Outcome values which vary over orders of magnitude and are interpolated
+# in log space
+LOG_OUTPUTS = ("burst_peak_dedz", "burst_energy")
+
+# Default parameter ranges, covering the distributions in the
+# resources/impact_parameter_list.csv file with a generous margin
+DEFAULT_RANGES = {
+    "radius": (10.0, 100.0),
+    "velocity": (15e3, 25e3),
+    "density": (2000.0, 4000.0),
+    "strength": (1e6, 1e8),
+    "angle": (30.0, 60.0),
+}
+
+# Floor used before taking logarithms of non-positive outcome values
+_TINY = 1e-12
+
+
+def _solve_outcomes(planet, points, init_altitude, dt):
+    """
+    Solve the atmospheric entry for each row of an (n, 5) array of entry
+    parameters and return the outcome values and airburst indicator.
+    """
+    values = {key: np.empty(len(points)) for key in OUTPUTS}
+    airburst = np.empty(len(points))
+    for i, point in enumerate(points):
+        result = planet.solve_atmospheric_entry(
+            *point, init_altitude=init_altitude, dt=dt
+        )
+        result = planet.calculate_energy(result)
+        outcome = planet.analyse_outcome(result)
+        for key in OUTPUTS:
+            values[key][i] = outcome[key]
+        airburst[i] = outcome["outcome"] == "Airburst"
+    return values, airburst
+
+
+class OutcomeEmulator:
+    """
+    The class called OutcomeEmulator holds a table of precomputed
+    `Planet.analyse_outcome` results over the entry parameter space
+    (radius, velocity, density, strength and angle) and interpolates it
+    to approximate the outcome of new scenarios without solving them.
+
+    The table is either a regular grid, interpolated multilinearly, or a
+    sparse (Latin hypercube) design, interpolated with radial basis
+    functions. Radius and strength are interpolated in log space, as are
+    the peak energy deposition and burst energy. Queries outside the
+    tabulated ranges are clipped to the nearest edge of the table.
+    """
+
+    def __init__(self, points, values, airburst, design="grid", axes=None, error=None):
+        """
+        Set up an emulator from a precomputed table. Use
+        `OutcomeEmulator.build` to compute a new table or
+        `OutcomeEmulator.load` to read one from disk.
+
+        Parameters
+        ----------
+        points : array_like
+            (n, 5) array of entry parameters (radius, velocity, density,
+            strength, angle) at which the outcomes were computed.
+
+        values : dict
+            Dictionary mapping each of ``burst_peak_dedz``,
+            ``burst_altitude``, ``burst_distance`` and ``burst_energy``
+            to an array of n outcome values.
+
+        airburst : array_like
+            Array of n values, 1 where the outcome was an airburst and 0
+            otherwise.
+
+        design : string, optional
+            Either 'grid' (the points form a regular grid over ``axes``)
+            or 'sparse' (the points are scattered).
+
+        axes : dict, optional
+            For a grid design, dictionary mapping each parameter to the
+            sorted 1D array of grid values along that axis.
+
+        error : dict, optional
+            Interpolation error report, as returned by
+            `OutcomeEmulator.validate`.
+        """
+        if design not in ("grid", "sparse"):
+            raise ValueError("design must be 'grid' or 'sparse'")
+
+        self.points = np.atleast_2d(np.asarray(points, dtype=float))
+        self.values = {key: np.asarray(values[key], dtype=float) for key in OUTPUTS}
+        self.airburst = np.asarray(airburst, dtype=float)
+        self.design = design
+        self.axes = (
+            None
+            if axes is None
+            else {key: np.asarray(axes[key], dtype=float) for key in PARAMETERS}
+        )
+        self.error = error
+        self.lower = self.points.min(axis=0)
+        self.upper = self.points.max(axis=0)
+        self._interpolators = None
+
+    def __getstate__(self):
+        """
+        Return the pickled form of the emulator, without the cached
+        interpolators (they are rebuilt on first use).
+        """
+        state = self.__dict__.copy()
+        state["_interpolators"] = None
+        return state
+
+    @classmethod
+    def build(
+        cls,
+        planet,
+        ranges=None,
+        npoints=5,
+        design="grid",
+        nsamples=None,
+        seed=None,
+        init_altitude=100e3,
+        dt=0.25,
+    ):
+        """
+        Precompute the outcome table by solving the atmospheric entry
+        with the existing solver at every design point.
+
+        Parameters
+        ----------
+        planet : deepimpact.Planet instance
+            The Planet instance from which to solve the atmospheric entry
+
+        ranges : dict, optional
+            Dictionary mapping parameter names to a (low, high) pair, or
+            to a single value to hold that parameter fixed. Missing
+            parameters use `DEFAULT_RANGES`.
+
+        npoints : int or dict, optional
+            Number of grid points along each varying axis (grid design),
+            either as one value or per parameter.
+
+        design : string, optional
+            'grid' for a regular grid or 'sparse' for a Latin hypercube
+            design of ``nsamples`` points.
+
+        nsamples : int, optional
+            Number of design points for the sparse design. Defaults to
+            ``npoints ** 5``.
+
+        seed : int, optional
+            Seed for the sparse design.
+
+        init_altitude : float, optional
+            Initial altitude of the solves (m).
+
+        dt : float, optional
+            Output timestep of the solves (s).
+
+        Returns
+        -------
+        OutcomeEmulator
+
+        Examples
+        --------
+        >>> planet = Planet()
+        >>> emulator = OutcomeEmulator.build(planet, npoints=3)
+        >>> emulator.save("outcomes.npz")
+        """
+        ranges = dict(DEFAULT_RANGES, **(ranges or {}))
+        bounds = {
+            key: np.broadcast_to(np.asarray(ranges[key], float), (2,))
+            for key in PARAMETERS
+        }
+
+        if design == "grid":
+            if not isinstance(npoints, dict):
+                npoints = {key: npoints for key in PARAMETERS}
+            axes = {}
+            for key in PARAMETERS:
+                low, high = bounds[key]
+                num = 1 if low == high else npoints[key]
+                if key in LOG_PARAMETERS:
+                    axes[key] = np.geomspace(low, high, num)
+                else:
+                    axes[key] = np.linspace(low, high, num)
+            mesh = np.meshgrid(*(axes[key] for key in PARAMETERS), indexing="ij")
+            points = np.stack([m.ravel() for m in mesh], axis=1)
+        elif design == "sparse":
+            axes = None
+            if nsamples is None:
+                nsamples = npoints ** len(PARAMETERS)
+            rng = np.random.default_rng(seed)
+            # Latin hypercube design in the (log-)transformed space
+            unit = (
+                rng.permuted(
+                    np.tile(np.arange(nsamples), (len(PARAMETERS), 1)), axis=1
+                ).T
+                + rng.random((nsamples, len(PARAMETERS)))
+            ) / nsamples
+            low = _transform(np.array([bounds[key][0] for key in PARAMETERS]))
+            high = _transform(np.array([bounds[key][1] for key in PARAMETERS]))
+            points = _inverse_transform(low + unit * (high - low))
+        else:
+            raise ValueError("design must be 'grid' or 'sparse'")
+
+        values, airburst = _solve_outcomes(planet, points, init_altitude, dt)
+
+        return cls(points, values, airburst, design=design, axes=axes)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Read an emulator table written by `OutcomeEmulator.save`.
+
+        Parameters
+        ----------
+        filename : string
+            Name of the .npz file to read.
+
+        Returns
+        -------
+        OutcomeEmulator
+        """
+        with np.load(filename) as data:
+            design = str(data["design"])
+            axes = (
+                {key: data["axis_" + key] for key in PARAMETERS}
+                if design == "grid"
+                else None
+            )
+            error = None
+            if "error_keys" in data.files:
+                error = {
+                    key: dict(zip(("max_abs", "rms", "max_rel"), row))
+                    for key, row in zip(data["error_keys"], data["error_values"])
+                }
+                error["outcome_mismatch"] = float(data["error_mismatch"])
+                error["nsamples"] = int(data["error_nsamples"])
+            return cls(
+                data["points"],
+                {key: data[key] for key in OUTPUTS},
+                data["airburst"],
+                design=design,
+                axes=axes,
+                error=error,
+            )
+
+    def save(self, filename):
+        """
+        Write the emulator table (and error report, if any) to a .npz file.
+
+        Parameters
+        ----------
+        filename : string
+            Name of the .npz file to write.
+        """
+        arrays = dict(self.values)
+        arrays["points"] = self.points
+        arrays["airburst"] = self.airburst
+        arrays["design"] = np.array(self.design)
+        if self.axes is not None:
+            for key in PARAMETERS:
+                arrays["axis_" + key] = self.axes[key]
+        if self.error is not None:
+            arrays["error_keys"] = np.array(OUTPUTS)
+            arrays["error_values"] = np.array(
+                [
+                    [self.error[key][stat] for stat in ("max_abs", "rms", "max_rel")]
+                    for key in OUTPUTS
+                ]
+            )
+            arrays["error_mismatch"] = np.array(self.error["outcome_mismatch"])
+            arrays["error_nsamples"] = np.array(self.error["nsamples"])
+        np.savez(filename, **arrays)
+
+    def _build_interpolators(self):
+        """
+        Construct (and cache) one interpolator per tabulated quantity.
+        """
+        from scipy.interpolate import RegularGridInterpolator, RBFInterpolator
+
+        targets = {key: _transform_output(key, self.values[key]) for key in OUTPUTS}
+        targets["airburst"] = self.airburst
+
+        if self.design == "grid":
+            # Axes with a single value are held fixed and dropped
+            varying = [i for i, key in enumerate(PARAMETERS) if len(self.axes[key]) > 1]
+            grid = tuple(_transform(self.axes[PARAMETERS[i]], i) for i in varying)
+            shape = tuple(len(self.axes[key]) for key in PARAMETERS)
+            self._varying = varying
+            self._interpolators = {
+                key: RegularGridInterpolator(
+                    grid,
+                    value.reshape(shape).squeeze(
+                        axis=tuple(
+                            i for i in range(len(PARAMETERS)) if i not in varying
+                        )
+                    ),
+                )
+                for key, value in targets.items()
+            }
+        else:
+            low, high = _transform(self.lower), _transform(self.upper)
+            self._varying = [i for i in range(len(PARAMETERS)) if high[i] > low[i]]
+            self._scale = (low, np.where(high > low, high - low, 1.0))
+            unit = self._normalise(self.points)
+            self._interpolators = {
+                key: RBFInterpolator(
+                    unit,
+                    value,
+                    neighbors=min(50, len(unit)),
+                    kernel="thin_plate_spline",
+                )
+                for key, value in targets.items()
+            }
+
+    def _normalise(self, points):
+        """
+        Map sparse design points onto the unit hypercube of the varying
+        parameters.
+        """
+        low, scale = self._scale
+        return ((_transform(points) - low) / scale)[:, self._varying]
+
+    def predict(self, radius, velocity, density, strength, angle):
+        """
+        Interpolate the outcome for one or many sets of entry parameters.
+
+        Parameters
+        ----------
+        radius, velocity, density, strength, angle : float or array_like
+            Entry parameters, in the same units as
+            `Planet.solve_atmospheric_entry` (angle in degrees).
+            Arrays are broadcast against one another.
+
+        Returns
+        -------
+        dict
+            Dictionary with the keys of `Planet.analyse_outcome`, each
+            holding an array of interpolated values (``outcome`` holds
+            an array of 'Airburst' or 'Cratering' strings).
+        """
+        if self._interpolators is None:
+            self._build_interpolators()
+
+        arrays = np.broadcast_arrays(
+            *(
+                np.asarray(x, dtype=float)
+                for x in (radius, velocity, density, strength, angle)
+            )
+        )
+        shape = arrays[0].shape
+        points = np.stack([a.ravel() for a in arrays], axis=1)
+        points = np.clip(points, self.lower, self.upper)
+
+        if self.design == "grid":
+            query = _transform(points)[:, self._varying]
+        else:
+            query = self._normalise(points)
+
+        prediction = {}
+        for key in OUTPUTS:
+            value = self._interpolators[key](query)
+            prediction[key] = _inverse_transform_output(key, value).reshape(shape)
+        airburst = self._interpolators["airburst"](query).reshape(shape)
+        prediction["outcome"] = np.where(airburst >= 0.5, "Airburst", "Cratering")
+        prediction["burst_altitude"] = np.where(
+            airburst >= 0.5, prediction["burst_altitude"], 0.0
+        )
+        return prediction
+
+    def outcome(self, radius, velocity, density, strength, angle):
+        """
+        Interpolate the outcome for a single set of entry parameters.
+
+        Returns
+        -------
+        outcome : Dict
+            Dictionary in the same form as `Planet.analyse_outcome`.
+        """
+        prediction = self.predict(radius, velocity, density, strength, angle)
+        outcome = {"outcome": str(prediction["outcome"])}
+        outcome.update({key: float(prediction[key]) for key in OUTPUTS})
+        return outcome
+
+    def validate(self, planet, nsamples=20, seed=None, init_altitude=100e3, dt=0.25):
+        """
+        Measure the interpolation error against held-out true solves at
+        random points inside the tabulated ranges, and store the report
+        on the emulator (it is written out by `OutcomeEmulator.save`).
+
+        Parameters
+        ----------
+        planet : deepimpact.Planet instance
+            The Planet instance from which to solve the atmospheric entry
+
+        nsamples : int, optional
+            Number of held-out scenarios to solve.
+
+        seed : int, optional
+            Seed for the held-out points.
+
+        Returns
+        -------
+        dict
+            For each outcome value, a dictionary with the maximum
+            absolute error ``max_abs``, the root mean square error
+            ``rms`` and the maximum relative error ``max_rel``, plus the
+            fraction of scenarios with the wrong outcome type
+            ``outcome_mismatch`` and the number of samples ``nsamples``.
+        """
+        rng = np.random.default_rng(seed)
+        low, high = _transform(self.lower), _transform(self.upper)
+        points = _inverse_transform(
+            low + rng.random((nsamples, len(PARAMETERS))) * (high - low)
+        )
+
+        values, airburst = _solve_outcomes(planet, points, init_altitude, dt)
+        prediction = self.predict(*points.T)
+
+        error = {}
+        for key in OUTPUTS:
+            diff = np.abs(prediction[key] - values[key])
+            error[key] = {
+                "max_abs": float(diff.max()),
+                "rms": float(np.sqrt(np.mean(diff**2))),
+                "max_rel": float(np.max(diff / np.maximum(np.abs(values[key]), _TINY))),
+            }
+        error["outcome_mismatch"] = float(
+            np.mean((prediction["outcome"] == "Airburst") != airburst.astype(bool))
+        )
+        error["nsamples"] = int(nsamples)
+
+        self.error = error
+        return error
+
+
+def _transform(points, index=None):
+    """
+    Map entry parameters to the space in which they are interpolated.
+    """
+    points = np.array(points, dtype=float)
+    if index is not None:
+        return np.log(points) if PARAMETERS[index] in LOG_PARAMETERS else points
+    for i, key in enumerate(PARAMETERS):
+        if key in LOG_PARAMETERS:
+            points[..., i] = np.log(points[..., i])
+    return points
+
+
+def _inverse_transform(points):
+    """
+    Map interpolation-space coordinates back to entry parameters.
+    """
+    points = np.array(points, dtype=float)
+    for i, key in enumerate(PARAMETERS):
+        if key in LOG_PARAMETERS:
+            points[..., i] = np.exp(points[..., i])
+    return points
+
+
+def _transform_output(key, value):
+    """
+    Map an outcome value to the space in which it is interpolated.
+    """
+    if key in LOG_OUTPUTS:
+        return np.log(np.maximum(value, _TINY))
+    return np.asarray(value, dtype=float)
+
+
+def _inverse_transform_output(key, value):
+    """
+    Map an interpolated outcome value back to physical units.
+    """
+    if key in LOG_OUTPUTS:
+        return np.exp(value)
+    return value
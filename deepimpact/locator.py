@@ -3,9 +3,18 @@
 import numpy as np
 import pandas as pd
 import os
-from scipy.spatial import KDTree
 
-__all__ = ["GeospatialLocator", "great_circle_distance"]
+from .profiling import get_profiler
+
+__all__ = ["GeospatialLocator", "SharedLocatorData", "great_circle_distance"]
+
+# Locator arrays published to shared memory by GeospatialLocator.share
+SHARED_ARRAYS = (
+    "postcode_names",
+    "postcode_coords",
+    "census_coords",
+    "census_population",
+)
 
 
 def great_circle_distance(latlon1, latlon2):
@@ -37,9 +46,11 @@ def great_circle_distance(latlon1, latlon2):
         print(great_circle_distance([[54.0, 0.0], [55, 0.0]], [55, 1.0]))
     [1.286e+05 6.378e+04]
     """
-    # Ensure latlon1 and latlon2 are at least 2-dimensional
-    latlon1 = np.atleast_2d(latlon1)
-    latlon2 = np.atleast_2d(latlon2)
+    # Ensure latlon1 and latlon2 are at least 2-dimensional, in double
+    # precision (the cosine of short distances is too close to 1 to be
+    # resolved in single precision)
+    latlon1 = np.atleast_2d(np.asarray(latlon1, dtype=np.float64))
+    latlon2 = np.atleast_2d(np.asarray(latlon2, dtype=np.float64))
 
     # Validate latitude and longitude values
     for latlon in [latlon1, latlon2]:
@@ -78,6 +89,45 @@ def great_circle_distance(latlon1, latlon2):
     return distance
 
 
+class SharedLocatorData(object):
+    """
+    Picklable handle to locator arrays published in shared memory by
+    `GeospatialLocator.share`. Pass it to worker processes and create
+    their locators with `GeospatialLocator.attach`.
+    """
+
+    def __init__(self, segments, norm):
+        """
+        Parameters
+        ----------
+
+        segments : dict
+            Dictionary mapping each array name to a tuple of the shared
+            memory segment name, the array shape and the array dtype.
+
+        norm : function
+            Python function defining the distance between points in
+            latitude-longitude space.
+        """
+        self.segments = segments
+        self.norm = norm
+
+
+def _open_shared_memory(name):
+    """
+    Attach to an existing shared memory segment without registering it
+    with this process's resource tracker (where supported), so that a
+    worker exiting does not remove a segment still owned by its parent.
+    """
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # track was added in Python 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
 class GeospatialLocator(object):
     """
     Class to interact with a postcode database file and a population grid file.
@@ -97,6 +147,7 @@ class GeospatialLocator(object):
             )
         ),
         norm=great_circle_distance,
+        dtype=np.float64,
     ):
         """
         Parameters
@@ -114,13 +165,311 @@ class GeospatialLocator(object):
             Python function defining the distance between points in
             latitude-longitude space.
 
+        dtype : numpy dtype, optional
+            Precision in which the postcode and census coordinates are
+            stored. np.float32 halves their memory (and that shared with
+            workers) and rounds them by at most about 0.2 m in the UK;
+            distances are still calculated in double precision. Only
+            queries which depend on which of several (almost) equidistant
+            census cells is nearest can change, such as populations within
+            radii of 500 m to 1 km, by a fraction of a cell's population.
+
         """
 
         self.postcode_file = postcode_file
         self.census_file = census_file
         self.norm = norm
-        self.postcodes = self.load_postcode_data()
-        self.census = self.load_census_data()
+        self.dtype = np.dtype(dtype)
+        self._census_tree = None
+        with get_profiler().stage("data_load"):
+            self.postcodes = self.load_postcode_data()
+        with get_profiler().stage("data_load"):
+            self.census = self.load_census_data()
+
+    @classmethod
+    def from_data(cls, postcodes, census, norm=great_circle_distance, dtype=np.float64):
+        """
+        Create a locator from postcode and census data which has already
+        been loaded, without reading any files.
+
+        Parameters
+        ----------
+
+        postcodes : pandas.DataFrame
+            Postcode data, with columns 'Postcode', 'Latitude' and
+            'Longitude', as in `GeospatialLocator.postcodes`.
+
+        census : pandas.DataFrame
+            Census data, with columns 'Latitude', 'Longitude' and
+            'Population', as in `GeospatialLocator.census`.
+
+        norm : function
+            Python function defining the distance between points in
+            latitude-longitude space.
+
+        dtype : numpy dtype, optional
+            Precision in which the coordinates are stored (see
+            `GeospatialLocator`).
+
+        Returns
+        -------
+        GeospatialLocator
+
+        Examples
+        --------
+
+        >>> locator = GeospatialLocator()
+        >>> copy = GeospatialLocator.from_data(locator.postcodes, locator.census)
+        """
+        locator = cls.__new__(cls)
+        locator.postcode_file = None
+        locator.census_file = None
+        locator.norm = norm
+        locator.dtype = np.dtype(dtype)
+        locator.postcodes = postcodes
+        locator.census = census
+        return locator
+
+    @classmethod
+    def from_arrays(
+        cls,
+        postcode_names,
+        postcode_coords,
+        census_coords,
+        census_population,
+        norm=great_circle_distance,
+    ):
+        """
+        Create a locator directly from the arrays it queries, without
+        copying them or reading any files.
+
+        Parameters
+        ----------
+
+        postcode_names : numpy.ndarray
+            (n,) array of postcode strings.
+
+        postcode_coords : numpy.ndarray
+            (n, 2) array of postcode latitudes and longitudes.
+
+        census_coords : numpy.ndarray
+            (m, 2) array of census grid cell latitudes and longitudes.
+
+        census_population : numpy.ndarray
+            (m,) array of census grid cell populations.
+
+        norm : function
+            Python function defining the distance between points in
+            latitude-longitude space.
+
+        Returns
+        -------
+        GeospatialLocator
+            A locator storing the coordinates in the precision of the
+            census_coords array.
+        """
+        locator = cls.__new__(cls)
+        locator.postcode_file = None
+        locator.census_file = None
+        locator.norm = norm
+        locator.dtype = np.asarray(census_coords).dtype
+        locator._postcodes = None
+        locator.postcode_names = postcode_names
+        locator.postcode_coords = postcode_coords
+        locator._census = None
+        locator._census_tree = None
+        locator.census_coords = census_coords
+        locator.census_population = census_population
+        return locator
+
+    def save(self, filename):
+        """
+        Write the postcode and census arrays to a .npz file, which
+        `GeospatialLocator.load` reads much faster than the original
+        .csv and .asc files.
+
+        Parameters
+        ----------
+
+        filename : str
+            Name of the .npz file to write.
+        """
+        np.savez(filename, **{key: getattr(self, key) for key in SHARED_ARRAYS})
+
+    @classmethod
+    def load(cls, filename, norm=great_circle_distance, dtype=None):
+        """
+        Create a locator from a .npz file written by `GeospatialLocator.save`.
+
+        Parameters
+        ----------
+
+        filename : str
+            Name of the .npz file to read.
+
+        norm : function
+            Python function defining the distance between points in
+            latitude-longitude space.
+
+        dtype : numpy dtype, optional
+            Precision in which the coordinates are stored (see
+            `GeospatialLocator`). Default is the precision they were saved in.
+
+        Returns
+        -------
+        GeospatialLocator
+
+        Examples
+        --------
+
+        >>> GeospatialLocator().save("locator.npz")
+        >>> locator = GeospatialLocator.load("locator.npz")
+        """
+        with get_profiler().stage("data_load"):
+            with np.load(filename) as data:
+                arrays = {key: data[key] for key in SHARED_ARRAYS}
+        if dtype is not None:
+            for key in ("postcode_coords", "census_coords"):
+                arrays[key] = arrays[key].astype(dtype, copy=False)
+        return cls.from_arrays(norm=norm, **arrays)
+
+    @property
+    def postcodes(self):
+        """
+        pandas.DataFrame of the postcode data, with columns 'Postcode',
+        'Latitude' and 'Longitude'.
+        """
+        if self._postcodes is None:
+            self._postcodes = pd.DataFrame(
+                {
+                    "Postcode": self.postcode_names,
+                    "Latitude": self.postcode_coords[:, 0],
+                    "Longitude": self.postcode_coords[:, 1],
+                },
+                copy=False,
+            )
+        return self._postcodes
+
+    @postcodes.setter
+    def postcodes(self, df):
+        self._postcodes = df
+        if df.empty:
+            self.postcode_names = np.empty(0, dtype=str)
+            self.postcode_coords = np.empty((0, 2), dtype=self.dtype)
+        else:
+            self.postcode_names = df["Postcode"].to_numpy(dtype=str)
+            self.postcode_coords = df[["Latitude", "Longitude"]].to_numpy(
+                dtype=self.dtype
+            )
+
+    @property
+    def census(self):
+        """
+        pandas.DataFrame of the census data, with columns 'Latitude',
+        'Longitude' and 'Population'.
+        """
+        if self._census is None:
+            self._census = pd.DataFrame(
+                {
+                    "Latitude": self.census_coords[:, 0],
+                    "Longitude": self.census_coords[:, 1],
+                    "Population": self.census_population,
+                },
+                copy=False,
+            )
+        return self._census
+
+    @census.setter
+    def census(self, df):
+        self._census = df
+        self._census_tree = None
+        self.census_coords = df[["Latitude", "Longitude"]].to_numpy(dtype=self.dtype)
+        self.census_population = df["Population"].to_numpy(dtype=float)
+
+    def share(self):
+        """
+        Publish the postcode and census arrays of this locator into
+        `multiprocessing.shared_memory` segments, so that locators in
+        worker processes can attach to them without copying.
+
+        The segments stay alive until `GeospatialLocator.close_shared` is
+        called on this (owning) locator.
+
+        Returns
+        -------
+        SharedLocatorData
+            Picklable handle to the shared arrays, to be passed to
+            `GeospatialLocator.attach` in the workers.
+
+        Examples
+        --------
+
+        >>> locator = GeospatialLocator()
+        >>> handle = locator.share()
+        >>> with multiprocessing.Pool(4, initializer=init, initargs=(handle,)) as pool:
+        ...     pool.map(work, jobs)
+        >>> locator.close_shared()
+        """
+        if getattr(self, "_shared", None) is not None:
+            return self._shared
+
+        from multiprocessing import shared_memory
+
+        segments = {}
+        memory = []
+        for name in SHARED_ARRAYS:
+            array = np.ascontiguousarray(getattr(self, name))
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+            segments[name] = (shm.name, array.shape, array.dtype.str)
+            memory.append(shm)
+
+        self._shared_memory = memory
+        self._shared = SharedLocatorData(segments, self.norm)
+        return self._shared
+
+    def close_shared(self):
+        """
+        Release and remove the shared memory segments published by
+        `GeospatialLocator.share`. Locators attached to them must not be
+        used afterwards.
+        """
+        for shm in getattr(self, "_shared_memory", []):
+            shm.close()
+            shm.unlink()
+        self._shared_memory = []
+        self._shared = None
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        Create a locator whose postcode and census arrays are read-only
+        views onto shared memory segments published by
+        `GeospatialLocator.share`, so no data is copied or read from disk.
+
+        Parameters
+        ----------
+
+        handle : SharedLocatorData
+            The handle returned by `GeospatialLocator.share`.
+
+        Returns
+        -------
+        GeospatialLocator
+        """
+        memory = []
+        arrays = {}
+        for name, (segment, shape, dtype) in handle.segments.items():
+            shm = _open_shared_memory(segment)
+            array = np.ndarray(shape, dtype, buffer=shm.buf)
+            array.flags.writeable = False
+            arrays[name] = array
+            memory.append(shm)
+
+        locator = cls.from_arrays(norm=handle.norm, **arrays)
+        # keep the segments mapped for as long as the locator is alive
+        locator._attached_memory = memory
+        return locator
 
     def load_postcode_data(self):
         """
@@ -177,25 +526,27 @@ class GeospatialLocator(object):
         >>> locator.get_postcodes_by_radius((51.4981, -0.1773),
                                             [1.5e3, 4.0e3])
         """
-        # Return an empty list for empty postcodes
-        if self.postcodes.empty:
-            return [[] for _ in radii]
+        with get_profiler().stage("postcode_query"):
+            # Return an empty list for empty postcodes
+            if len(self.postcode_names) == 0:
+                return [[] for _ in radii]
 
-        result = []
-        for radius in radii:
-            if radius <= 0:
-                # Return an empty list for non-positive radius values
-                result.append([])
-                continue
+            distances = None
+            result = []
+            for radius in radii:
+                if radius <= 0:
+                    # Return an empty list for non-positive radius values
+                    result.append([])
+                    continue
 
-            # Calculating distances to all postcodes
-            distances = self.norm(self.postcodes[["Latitude", "Longitude"]].values, [X])
+                # Calculating distances to all postcodes, once for all radii
+                if distances is None:
+                    distances = self.norm(self.postcode_coords, [X])[:, 0]
 
-            # Filter postcodes within the radius
-            within_radius = self.postcodes[distances[:, 0] <= radius]
-            result.append(within_radius["Postcode"].tolist())
+                # Filter postcodes within the radius
+                result.append(self.postcode_names[distances <= radius].tolist())
 
-        return result
+            return result
 
     def load_census_data(self):
         """
@@ -269,14 +620,18 @@ class GeospatialLocator(object):
         This method uses a KDTree for efficient nearest neighbor searching.
         The distances returned are calculated using the great_circle_distance function.
         """
-        # Convert census data to a KDTree for efficient nearest neighbor search
-        tree = KDTree(self.census[["Latitude", "Longitude"]].values)
+        # Convert census data to a KDTree for efficient nearest neighbor
+        # search, built on first use and reused for later queries
+        if self._census_tree is None:
+            from scipy.spatial import KDTree
+
+            self._census_tree = KDTree(self.census_coords)
 
         # Query the tree for the nearest neighbors
-        distances, indices = tree.query(X, k=num_coords)
+        distances, indices = self._census_tree.query(X, k=num_coords)
 
         # Retrieve the nearest coordinates and their distances
-        nearest_coords = self.census.iloc[indices][["Latitude", "Longitude"]].values
+        nearest_coords = self.census_coords[indices]
         near_dist = [self.norm([X], [coord])[0, 0] for coord in nearest_coords]
 
         return nearest_coords, near_dist
@@ -317,10 +672,10 @@ class GeospatialLocator(object):
             if distance + radius < half_diagonal:
                 intersection_percentage = (np.pi * radius**2) / (1000 * 1000)
                 # Retrieve the population for this grid center
-                grid_population = self.census[
-                    (self.census["Latitude"] == grid_center[0])
-                    & (self.census["Longitude"] == grid_center[1])
-                ]["Population"].values[0]
+                grid_population = self.census_population[
+                    (self.census_coords[:, 0] == grid_center[0])
+                    & (self.census_coords[:, 1] == grid_center[1])
+                ][0]
 
                 # Entire population of this grid is impacted
                 impacted_populations += intersection_percentage * grid_population
@@ -339,10 +694,10 @@ class GeospatialLocator(object):
                     )
 
             # Retrieve the population for the grid center from the census data
-            grid_population = self.census[
-                (self.census["Latitude"] == grid_center[0])
-                & (self.census["Longitude"] == grid_center[1])
-            ]["Population"].values[0]
+            grid_population = self.census_population[
+                (self.census_coords[:, 0] == grid_center[0])
+                & (self.census_coords[:, 1] == grid_center[1])
+            ][0]
 
             # Calculate the impacted population from intersection percentage
             impacted_pop = grid_population * intersection_percentage
@@ -373,40 +728,37 @@ class GeospatialLocator(object):
         >>> loc.get_population_by_radius((51.4981, -0.1773), [1e2, 5e2, 1e3])
 
         """
-        # Calculate distances from X to each point in the census data
-        self.census["distance"] = self.norm(
-            self.census[["Latitude", "Longitude"]].values, [X]
-        )[:, 0]
+        with get_profiler().stage("population_query"):
+            # Calculate distances from X to each point in the census data
+            distances = self.norm(self.census_coords, [X])[:, 0]
 
-        populations_by_radius = []
-        for radius in radii:
-            if radius <= 0:
-                populations_by_radius.append(0)
-                continue
+            populations_by_radius = []
+            for radius in radii:
+                if radius <= 0:
+                    populations_by_radius.append(0)
+                    continue
 
-            # Sum population for points within the radius
+                # Sum population for points within the radius
 
-            if radius <= 500:
-                # Find the 4 nearest coordinates
-                nearest_coords, distance = self.find_nearest_coordinates(X, 4)
+                if radius <= 500:
+                    # Find the 4 nearest coordinates
+                    nearest_coords, distance = self.find_nearest_coordinates(X, 4)
 
-                total_population = self.calculate_impacted_population(
-                    radius, nearest_coords, distance
-                )
+                    total_population = self.calculate_impacted_population(
+                        radius, nearest_coords, distance
+                    )
 
-            elif radius > 500 and radius <= 1000:
-                # Find the 4 nearest coordinates
-                nearest_coords, distance = self.find_nearest_coordinates(X, 10)
+                elif radius > 500 and radius <= 1000:
+                    # Find the 4 nearest coordinates
+                    nearest_coords, distance = self.find_nearest_coordinates(X, 10)
 
-                total_population = self.calculate_impacted_population(
-                    radius, nearest_coords, distance
-                )
+                    total_population = self.calculate_impacted_population(
+                        radius, nearest_coords, distance
+                    )
 
-            else:
-                total_population = self.census[self.census["distance"] <= radius][
-                    "Population"
-                ].sum()
+                else:
+                    total_population = self.census_population[distances <= radius].sum()
 
-            populations_by_radius.append(int(total_population))
+                populations_by_radius.append(int(total_population))
 
-        return populations_by_radius
+            return populations_by_radius
@@ -1,5 +1,4 @@
 """This module contains some useful mapping functions"""
-import folium
 
 __all__ = ["plot_circle"]
 
@@ -32,6 +31,9 @@ def plot_circle(lat, lon, radius, fmap=None, **kwargs):
     >>> deepimpact.plot_circle(52.79, -2.95, 1e3, map=None)
     """
 
+    # folium is slow to import, so only load it when a map is drawn
+    import folium
+
     if not fmap:
         fmap = folium.Map(location=[lat, lon], control_scale=True)
 
@@ -0,0 +1,224 @@
+"""Module to run the impact risk analysis on a dask cluster"""
+from .damage import empty_tally, merge_tallies, tally_impacts
+from .locator import GeospatialLocator, SHARED_ARRAYS
+
+__all__ = ["DaskTallier", "dask_impact_risk"]
+
+# Locator built on this (worker) process from the scattered postcode and
+# census data, keyed by the key of the scattered data
+_warm_locator = {}
+
+
+def get_warm_locator(key, data):
+    """
+    Return the locator for a set of scattered postcode and census data,
+    building it on the first call in this process and reusing it for every
+    later task which uses the same data.
+
+    Parameters
+    ----------
+    key: str
+        The key of the scattered data
+    data: dict
+        The scattered locator arrays and norm, as keyword arguments of
+        `GeospatialLocator.from_arrays`
+
+    Returns
+    -------
+    GeospatialLocator
+    """
+    locator = _warm_locator.get(key)
+    if locator is None:
+        # only keep the locator for the most recent data alive
+        _warm_locator.clear()
+        locator = GeospatialLocator.from_arrays(**data)
+        _warm_locator[key] = locator
+    return locator
+
+
+def risk_task(key, planet, data, chunk, pressure):
+    """
+    Dask task tallying the impacts in one chunk of the impact list.
+    """
+    locator = get_warm_locator(key, data)
+    return tally_impacts(planet, locator, chunk, pressure)
+
+
+def tree_reduce(client, futures):
+    """
+    Merge a list of tally futures pairwise on the cluster, keeping
+    neighbouring chunks together so the postcode order is preserved.
+    """
+    while len(futures) > 1:
+        merged = [
+            client.submit(merge_tallies, first, second)
+            for first, second in zip(futures[::2], futures[1::2])
+        ]
+        if len(futures) % 2:
+            merged.append(futures[-1])
+        futures = merged
+    return futures[0]
+
+
+class DaskTallier:
+    """
+    Tally blocks of impacts on a dask cluster, reusing one client and one
+    copy of the planet and locator data on the workers for every block.
+
+    Used as a context manager: on entry the current client is used (or a
+    temporary LocalCluster is started) and the planet and the postcode and
+    census arrays are scattered to every worker once. Each worker keeps a
+    warm locator built from them for all the blocks. A cluster started on
+    entry is closed on exit.
+
+    Parameters
+    ----------
+    planet: deepimpact.Planet instance
+        The Planet instance from which to solve the atmospheric entry
+
+    locator: deepimpact.GeospatialLocator instance
+        The locator whose postcode and census data are sent to the workers
+
+    pressure: float
+        The pressure at which to calculate the damage zone for each impact
+
+    client: distributed.Client or None
+        The client to submit tasks to. If None, the current client is used,
+        or a temporary LocalCluster is started.
+
+    chunksize: int
+        The number of impacts in each task
+
+    Examples
+    --------
+    >>> with DaskTallier(planet, locator, 30e3, chunksize=50) as tally_block:
+    ...     tally = merge_tallies(tally_block(first), tally_block(second))
+    """
+
+    def __init__(self, planet, locator, pressure, client=None, chunksize=100):
+        self.planet = planet
+        self.locator = locator
+        self.pressure = pressure
+        self.client = client
+        self.chunksize = chunksize
+        self._cluster = None
+        self._scattered = None
+
+    def __enter__(self):
+        try:
+            from distributed import Client, LocalCluster, get_client
+        except ImportError:
+            raise ImportError(
+                "The dask backend requires the dask and distributed packages"
+            )
+
+        if self.client is None:
+            try:
+                self.client = get_client()
+            except ValueError:
+                self._cluster = LocalCluster()
+                self.client = Client(self._cluster)
+
+        # send the planet and locator data to every worker once, under keys
+        # of their own, so that a tallier releasing its data on exit never
+        # races with another scattering the same data
+        shared = {name: getattr(self.locator, name) for name in SHARED_ARRAYS}
+        shared["norm"] = self.locator.norm
+        self._scattered = self.client.scatter(
+            [self.planet, shared], broadcast=True, hash=False
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        self._scattered = None
+        if self._cluster is not None:
+            self.client.close()
+            self._cluster.close()
+            self._cluster = self.client = None
+
+    @property
+    def nthreads(self):
+        """
+        The number of tasks the cluster runs at once.
+        """
+        return max(sum(self.client.nthreads().values()), 1)
+
+    def __call__(self, data):
+        """
+        Tally a table of impacts, partitioned into tasks of ``chunksize``
+        impacts whose tallies are tree-reduced on the cluster, so only the
+        final tally is returned to the client.
+
+        Parameters
+        ----------
+        data: DataFrame
+            Impact parameters, with the columns of the impact_risk input file
+
+        Returns
+        -------
+        dict
+            The tally of the impacts (see `deepimpact.damage.empty_tally`)
+        """
+        if data.shape[0] == 0:
+            return empty_tally()
+
+        planet_future, shared_future = self._scattered
+        futures = [
+            self.client.submit(
+                risk_task,
+                shared_future.key,
+                planet_future,
+                shared_future,
+                data.iloc[slice(start, start + self.chunksize)],
+                self.pressure,
+            )
+            for start in range(0, data.shape[0], self.chunksize)
+        ]
+
+        return tree_reduce(self.client, futures).result()
+
+
+def dask_impact_risk(planet, locator, data, pressure, client=None, chunksize=100):
+    """
+    Tally a table of impacts on a dask cluster.
+
+    The impact list is partitioned into tasks of ``chunksize`` impacts.
+    The planet and the postcode and census arrays are scattered to every
+    worker once, and each worker keeps a warm locator built from them.
+    The tallies of the tasks are tree-reduced on the cluster, so only the
+    final tally is returned to the client (see `DaskTallier`).
+
+    Parameters
+    ----------
+    planet: deepimpact.Planet instance
+        The Planet instance from which to solve the atmospheric entry
+
+    locator: deepimpact.GeospatialLocator instance
+        The locator whose postcode and census data are sent to the workers
+
+    data: DataFrame
+        Impact parameters, with the columns of the impact_risk input file
+
+    pressure: float
+        The pressure at which to calculate the damage zone for each impact
+
+    client: distributed.Client or None
+        The client to submit tasks to. If None, the current client is used,
+        or a temporary LocalCluster is started for the call.
+
+    chunksize: int
+        The number of impacts in each task
+
+    Returns
+    -------
+    dict
+        The tally of all the impacts (see `deepimpact.damage.empty_tally`)
+
+    Examples
+    --------
+    >>> from distributed import Client, LocalCluster
+    >>> client = Client(LocalCluster(n_workers=4))
+    >>> impact_risk(planet, backend="dask", client=client, chunksize=50)
+    """
+    with DaskTallier(planet, locator, pressure, client, chunksize) as tally_block:
+        return tally_block(data)
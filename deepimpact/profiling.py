@@ -0,0 +1,194 @@
+"""Module to time the stages of the impact risk pipeline"""
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+__all__ = ["Profiler", "ProfileReport", "profile", "get_profiler"]
+
+
+class ProfileReport(object):
+    """
+    Structured summary of a profiled run: the number of calls and time
+    spent in each stage, plus any event counters (e.g. solver steps).
+    """
+
+    def __init__(self, stages, counters, wall_time):
+        """
+        Parameters
+        ----------
+        stages : dict
+            Dictionary mapping each stage name to a dictionary with the
+            number of ``calls``, the ``total`` time (s) and the ``mean``
+            time per call (s).
+
+        counters : dict
+            Dictionary mapping each counter name to its integer count.
+
+        wall_time : float
+            Wall-clock time (s) of the whole profiled run.
+        """
+        self.stages = stages
+        self.counters = counters
+        self.wall_time = wall_time
+
+    def to_dict(self):
+        """
+        Return the report as a dictionary of plain Python types.
+        """
+        return {
+            "wall_time": self.wall_time,
+            "stages": self.stages,
+            "counters": self.counters,
+        }
+
+    def to_json(self, filename=None):
+        """
+        Return the report as a JSON string, optionally also writing it to
+        a file.
+
+        Parameters
+        ----------
+        filename : str, optional
+            Name of the file to write the JSON report to.
+
+        Returns
+        -------
+        str
+        """
+        text = json.dumps(self.to_dict(), indent=2)
+        if filename is not None:
+            with open(filename, "w") as file:
+                file.write(text + "\n")
+        return text
+
+    def __str__(self):
+        lines = [
+            f"{'stage':<20} {'calls':>8} {'total (s)':>11} {'mean (ms)':>11}",
+            "-" * 53,
+        ]
+        for name, stage in sorted(self.stages.items(), key=lambda x: -x[1]["total"]):
+            lines.append(
+                f"{name:<20} {stage['calls']:>8d} {stage['total']:>11.3f}"
+                f" {stage['mean'] * 1e3:>11.3f}"
+            )
+        for name, count in self.counters.items():
+            lines.append(f"{name:<20} {count:>8d}")
+        lines.append(f"{'wall time':<20} {'':>8} {self.wall_time:>11.3f}")
+        return "\n".join(lines)
+
+
+class Profiler(object):
+    """
+    Accumulates per-stage timers and event counters. Activate it with
+    `profile` to instrument the solver, locator and `impact_risk`.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.totals = {}
+        self.calls = {}
+        self.counters = {}
+        self.start = time.perf_counter()
+        self.stop = None
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Context manager timing one call of a stage.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage, e.g. 'solve' or 'postcode_query'.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds, calls=1):
+        """
+        Record time spent in a stage.
+        """
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def count(self, name, n=1):
+        """
+        Increment an event counter.
+        """
+        self.counters[name] = self.counters.get(name, 0) + int(n)
+
+    def report(self):
+        """
+        Return a `ProfileReport` of everything recorded so far.
+        """
+        stop = self.stop if self.stop is not None else time.perf_counter()
+        stages = {
+            name: {
+                "calls": self.calls[name],
+                "total": total,
+                "mean": total / self.calls[name],
+            }
+            for name, total in self.totals.items()
+        }
+        return ProfileReport(stages, dict(self.counters), stop - self.start)
+
+
+class _NullProfiler(object):
+    """
+    Profiler used when profiling is disabled; every method is a no-op.
+    """
+
+    enabled = False
+
+    def stage(self, name):
+        return _null_stage
+
+    def add(self, name, seconds, calls=1):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+
+_null_stage = nullcontext()
+_active_profiler = ContextVar("deepimpact_profiler", default=_NullProfiler())
+
+
+def get_profiler():
+    """
+    Return the active profiler (a no-op profiler when profiling is off).
+    """
+    return _active_profiler.get()
+
+
+@contextmanager
+def profile(profiler=None):
+    """
+    Context manager which activates a profiler for the code it wraps.
+
+    Parameters
+    ----------
+    profiler : Profiler, optional
+        The profiler to activate. A new one is created if not given.
+
+    Examples
+    --------
+    >>> import deepimpact
+    >>> with deepimpact.profile() as profiler:
+    ...     deepimpact.impact_risk(deepimpact.Planet(), nsamples=10)
+    >>> print(profiler.report())
+    >>> profiler.report().to_json("timings.json")
+    """
+    if profiler is None:
+        profiler = Profiler()
+    token = _active_profiler.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active_profiler.reset(token)
+        profiler.stop = time.perf_counter()
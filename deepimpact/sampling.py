@@ -0,0 +1,131 @@
+"""
+Module to sample ensembles of impact parameters in memory, as input to
+`deepimpact.impact_risk`
+"""
+import numpy as np
+
+__all__ = ["sample_impacts"]
+
+# Columns of an impact parameter table (see resources/impact_parameter_list.csv)
+IMPACT_PARAMETERS = (
+    "radius",
+    "angle",
+    "strength",
+    "density",
+    "velocity",
+    "entry latitude",
+    "entry longitude",
+    "bearing",
+)
+
+# Default distributions, fitted to resources/impact_parameter_list.csv
+DEFAULT_DISTRIBUTIONS = {
+    "radius": ("normal", 35.0, 0.8),
+    "angle": ("normal", 45.0, 0.7),
+    "strength": ("lognormal", 1e7, 0.4),
+    "density": ("normal", 3000.0, 400.0),
+    "velocity": ("normal", 19.4e3, 1e3),
+    "entry latitude": ("normal", 53.0, 0.03),
+    "entry longitude": ("normal", -2.49, 0.03),
+    "bearing": ("normal", 115.2, 0.2),
+}
+
+METHODS = ("random", "lhs", "sobol")
+
+
+def _inverse_cdf(spec, u):
+    """
+    Map uniform samples on (0, 1) through the inverse CDF of a
+    distribution specification (see `sample_impacts`).
+    """
+    if hasattr(spec, "ppf"):
+        return np.asarray(spec.ppf(u), dtype=float)
+
+    kind, a, b = spec
+    if kind == "uniform":
+        return a + u * (b - a)
+    if kind == "loguniform":
+        return np.exp(np.log(a) + u * (np.log(b) - np.log(a)))
+
+    from scipy.special import ndtri
+
+    if kind == "normal":
+        return a + b * ndtri(u)
+    if kind == "lognormal":
+        return a * np.exp(b * ndtri(u))
+    raise ValueError(f"Unknown distribution {kind!r}")
+
+
+def sample_impacts(nsamples, distributions=None, method="lhs", seed=None):
+    """
+    Sample a table of impact parameters from given distributions.
+
+    The uniform design of every parameter which is not fixed is drawn at
+    once, as a Monte Carlo sample, a Latin hypercube or a scrambled Sobol
+    sequence, and mapped through the inverse CDF of its distribution. The
+    whole table is generated here from the seed, so the result of
+    `impact_risk` does not depend on how it is later split between
+    workers.
+
+    Parameters
+    ----------
+    nsamples : int
+        Number of impacts.
+
+    distributions : dict, optional
+        Dictionary mapping parameter names (the columns of
+        resources/impact_parameter_list.csv) to a distribution: a number
+        to hold the parameter fixed, a tuple ('uniform', low, high),
+        ('loguniform', low, high), ('normal', mean, stdev) or
+        ('lognormal', median, sigma), or any object with a ``ppf``
+        method, such as a frozen scipy.stats distribution. Missing
+        parameters use `DEFAULT_DISTRIBUTIONS`.
+
+    method : str, optional
+        The design: 'random', 'lhs' (Latin hypercube) or 'sobol'.
+
+    seed : int, optional
+        Seed of the design.
+
+    Returns
+    -------
+    dict
+        An array of nsamples values for each parameter, in the column
+        order of the impact parameter table. Can be passed directly as the
+        impacts of `impact_risk`.
+
+    Examples
+    --------
+    >>> impacts = sample_impacts(1000, {"radius": ("uniform", 10, 50)}, seed=0)
+    >>> impact_risk(planet, impacts, locator=locator)
+    """
+    distributions = dict(DEFAULT_DISTRIBUTIONS, **(distributions or {}))
+    unknown = set(distributions) - set(IMPACT_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown impact parameters {sorted(unknown)}")
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}")
+
+    varying = [key for key in IMPACT_PARAMETERS if not np.isscalar(distributions[key])]
+    d = len(varying)
+    if method == "random":
+        unit = np.random.default_rng(seed).random((nsamples, d))
+    else:
+        from scipy.stats import qmc
+
+        if method == "lhs":
+            sampler = qmc.LatinHypercube(d, seed=seed)
+        else:
+            sampler = qmc.Sobol(d, scramble=True, seed=seed)
+        unit = sampler.random(nsamples)
+    # keep the inverse CDFs of unbounded distributions finite
+    unit = np.clip(unit, np.finfo(float).tiny, 1 - np.finfo(float).epsneg)
+
+    samples = {}
+    for key in IMPACT_PARAMETERS:
+        spec = distributions[key]
+        if key in varying:
+            samples[key] = _inverse_cdf(spec, unit[:, varying.index(key)])
+        else:
+            samples[key] = np.full(nsamples, float(spec))
+    return samples
@@ -0,0 +1,288 @@
+"""
+Module for variance-based (Sobol) global sensitivity analysis of the
+airburst outcome and damaged population to the entry parameters
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .damage import batch_damage_zones
+from .emulator import DEFAULT_RANGES, LOG_PARAMETERS, PARAMETERS
+
+__all__ = ["sobol_design", "sobol_indices", "sensitivity_analysis"]
+
+# Outcome values analysed by default
+DEFAULT_OUTPUTS = ("burst_altitude", "burst_energy", "burst_distance")
+
+
+def sobol_design(nsamples, ranges=None, seed=None):
+    """
+    Generate the sample design of Saltelli's scheme for Sobol indices.
+
+    Two independent base samples A and B of the varying parameters are
+    drawn from a scrambled Sobol sequence, and for each varying parameter
+    i a sample AB_i is made from A with column i taken from B. Parameters
+    in `LOG_PARAMETERS` are sampled uniformly in log space.
+
+    Parameters
+    ----------
+    nsamples : int
+        Number of base samples N (a power of 2 keeps the Sobol sequence
+        balanced).
+
+    ranges : dict, optional
+        Dictionary mapping parameter names to a (low, high) pair, or to a
+        single value to hold that parameter fixed. Missing parameters use
+        `deepimpact.emulator.DEFAULT_RANGES`.
+
+    seed : int, optional
+        Seed for the scrambling of the sequence.
+
+    Returns
+    -------
+    points : numpy.ndarray
+        (N * (d + 2), 5) entry parameters (radius, velocity, density,
+        strength, angle), for d varying parameters: A, then B, then each
+        AB_i in turn.
+
+    varying : list of str
+        Names of the d varying parameters, in the order of the AB_i.
+    """
+    from scipy.stats import qmc
+
+    ranges = dict(DEFAULT_RANGES, **(ranges or {}))
+    bounds = {
+        key: np.broadcast_to(np.asarray(ranges[key], float), (2,)) for key in PARAMETERS
+    }
+    varying = [key for key in PARAMETERS if bounds[key][0] != bounds[key][1]]
+    d = len(varying)
+
+    # both base samples from one sequence of twice the dimension, so that
+    # they are independent
+    sampler = qmc.Sobol(2 * d, scramble=True, seed=seed)
+    if nsamples & (nsamples - 1) == 0:
+        unit = sampler.random_base2(int(np.log2(nsamples)))
+    else:
+        unit = sampler.random(nsamples)
+    A, B = unit[:, :d], unit[:, d:]
+    blocks = [A, B]
+    for i in range(d):
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        blocks.append(AB)
+    unit = np.concatenate(blocks)
+
+    points = np.empty((unit.shape[0], len(PARAMETERS)))
+    for j, key in enumerate(PARAMETERS):
+        low, high = bounds[key]
+        if key not in varying:
+            points[:, j] = low
+            continue
+        u = unit[:, varying.index(key)]
+        if key in LOG_PARAMETERS:
+            points[:, j] = np.exp(np.log(low) + u * (np.log(high) - np.log(low)))
+        else:
+            points[:, j] = low + u * (high - low)
+    return points, varying
+
+
+def sobol_indices(values, nparameters, nbootstrap=100, confidence=0.95, seed=None):
+    """
+    Estimate first-order and total Sobol indices from the model values on a
+    `sobol_design`, with bootstrap confidence intervals.
+
+    The first-order indices use the estimator of Saltelli et al. (2010) and
+    the total indices that of Jansen (1999). Every index, and every
+    bootstrap resample, reuses the same model values.
+
+    Parameters
+    ----------
+    values : array_like
+        (N * (d + 2),) model values at the design points, in the order
+        returned by `sobol_design`.
+
+    nparameters : int
+        Number of varying parameters d.
+
+    nbootstrap : int, optional
+        Number of bootstrap resamples of the N base samples.
+
+    confidence : float, optional
+        Confidence level of the intervals.
+
+    seed : int, optional
+        Seed for the bootstrap resampling.
+
+    Returns
+    -------
+    dict
+        Arrays of length d: 'S1' and 'ST', the first-order and total
+        indices, and 'S1_low', 'S1_high', 'ST_low' and 'ST_high', the
+        bounds of their confidence intervals.
+    """
+    values = np.asarray(values, dtype=float)
+    f = values.reshape(nparameters + 2, -1)
+    fA, fB, fAB = f[0], f[1], f[2:]
+
+    def estimate(rows):
+        a, b, ab = fA[..., rows], fB[..., rows], fAB[:, rows]
+        variance = np.var(np.concatenate([a, b], axis=-1), axis=-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            first = np.mean(b * (ab - a), axis=-1) / variance
+            total = 0.5 * np.mean((a - ab) ** 2, axis=-1) / variance
+        return first, total
+
+    first, total = estimate(np.arange(fA.size))
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, fA.size, (nbootstrap, fA.size))
+    # (d, nbootstrap) indices of every resample at once
+    first_boot, total_boot = estimate(rows)
+    tail = 100 * (1 - confidence) / 2
+    S1_low, S1_high = np.nanpercentile(first_boot, [tail, 100 - tail], axis=-1)
+    ST_low, ST_high = np.nanpercentile(total_boot, [tail, 100 - tail], axis=-1)
+    return {
+        "S1": first,
+        "S1_low": S1_low,
+        "S1_high": S1_high,
+        "ST": total,
+        "ST_low": ST_low,
+        "ST_high": ST_high,
+    }
+
+
+def _batch_outcomes(planet, points, solve_args):
+    """
+    Return the outcome table of each row of an (n, 5) array of entry
+    parameters, solved as one ensemble (or emulated, if the planet has an
+    outcome emulator).
+    """
+    if getattr(planet, "emulator", None) is not None:
+        outcomes = planet.emulate_outcome(*points.T)
+        return pd.DataFrame(outcomes)
+    ensemble = planet.solve_ensemble(*points.T, **solve_args)
+    return ensemble.calculate_energy().analyse_outcome()
+
+
+def sensitivity_analysis(
+    planet,
+    nsamples=256,
+    ranges=None,
+    outputs=DEFAULT_OUTPUTS,
+    locator=None,
+    lat=51.5,
+    lon=-0.1,
+    bearing=0.0,
+    pressure=30e3,
+    workers=1,
+    nbootstrap=100,
+    confidence=0.95,
+    seed=None,
+    **solve_args,
+):
+    """
+    Run a Sobol sensitivity analysis of the airburst outcome (and, with a
+    locator, the population inside the damage zone) to the entry
+    parameters.
+
+    The design is generated by `sobol_design`, solved as ensembles split
+    between worker processes, passed through `batch_damage_zones` in one
+    call, and the indices of every output are estimated from the same
+    solved samples.
+
+    Parameters
+    ----------
+    planet : deepimpact.Planet instance
+        The Planet instance from which to solve the atmospheric entry. If
+        it has an outcome emulator, the outcomes are interpolated instead.
+
+    nsamples : int, optional
+        Number of base samples N. The model is evaluated N * (d + 2)
+        times for d varying parameters.
+
+    ranges : dict, optional
+        Parameter ranges, as for `sobol_design`.
+
+    outputs : sequence of str, optional
+        Outcome values (keys of `Planet.analyse_outcome`) to analyse.
+
+    locator : deepimpact.GeospatialLocator instance, optional
+        If given, the population inside the damage zone at the given
+        pressure is analysed too, as the output 'population'.
+
+    lat, lon, bearing : float, optional
+        Entry point and bearing (degrees) used for the damage zones.
+
+    pressure : float, optional
+        Damage pressure (Pa) defining the damage zone.
+
+    workers : int, optional
+        Number of worker processes solving the design.
+
+    nbootstrap, confidence : optional
+        Bootstrap settings, as for `sobol_indices`.
+
+    seed : int, optional
+        Seed of the design and the bootstrap.
+
+    **solve_args
+        Passed on to `Planet.solve_ensemble` (e.g. dt or max_step).
+
+    Returns
+    -------
+    dict
+        A DataFrame per output, indexed by the varying parameters, with
+        the columns returned by `sobol_indices`.
+
+    Examples
+    --------
+    >>> planet = Planet()
+    >>> indices = sensitivity_analysis(planet, nsamples=64, workers=4, seed=0)
+    >>> indices["burst_altitude"]["ST"]
+    """
+    rng = np.random.default_rng(seed)
+    points, varying = sobol_design(
+        nsamples, ranges, seed=rng.integers(2**32) if seed is not None else None
+    )
+
+    if workers > 1:
+        chunks = np.array_split(points, workers)
+        with ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            outcomes = pd.concat(
+                executor.map(
+                    _batch_outcomes,
+                    [planet] * workers,
+                    chunks,
+                    [solve_args] * workers,
+                ),
+                ignore_index=True,
+            )
+    else:
+        outcomes = _batch_outcomes(planet, points, solve_args)
+
+    values = {key: outcomes[key].to_numpy(dtype=float) for key in outputs}
+    if locator is not None:
+        blat, blon, damrad = batch_damage_zones(
+            outcomes, lat, lon, bearing, [pressure], fill_value=0.0
+        )
+        values["population"] = np.array(
+            [
+                locator.get_population_by_radius((x, y), [r])[0]
+                for x, y, r in zip(blat, blon, damrad[:, 0])
+            ],
+            dtype=float,
+        )
+
+    bootstrap_seed = rng.integers(2**32) if seed is not None else None
+    return {
+        key: pd.DataFrame(
+            sobol_indices(
+                value, len(varying), nbootstrap, confidence, seed=bootstrap_seed
+            ),
+            index=pd.Index(varying, name="parameter"),
+        )
+        for key, value in values.items()
+    }
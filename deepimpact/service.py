@@ -0,0 +1,361 @@
+"""
+Module providing a long-lived local HTTP/JSON service, which keeps a Planet,
+a GeospatialLocator and a cache of solved outcomes warm between requests.
+
+Start it with ``deepimpact serve`` (see `deepimpact.cli`) or::
+
+    >>> import deepimpact
+    >>> deepimpact.RiskService().serve(port=8765)
+
+and POST JSON to its endpoints, e.g.::
+
+    curl -d '{"radius": 35, "velocity": 19e3, "density": 3000,
+              "strength": 1e7, "angle": 45}' localhost:8765/solve
+
+Endpoints
+---------
+GET  /health      service status and cache statistics
+POST /solve       outcome (and optionally the trajectory) of one scenario
+POST /damage      surface zero point and damage radii of one scenario
+POST /postcodes   postcodes within radii of a point
+POST /population  population within radii of a point
+POST /risk        postcode probabilities and population for a list of impacts
+"""
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from .damage import batch_damage_zones, finalise_tally, tally_impacts
+from .locator import GeospatialLocator
+from .solver import Planet
+
+__all__ = ["RiskService"]
+
+# Parameters identifying a scenario in request bodies
+SCENARIO = ("radius", "velocity", "density", "strength", "angle")
+
+
+class RiskService(object):
+    """
+    Holds the warm state shared by every request to the local service: the
+    Planet, the GeospatialLocator (with its spatial index) and an LRU cache
+    of solved outcomes. Identical requests arriving while one is already
+    being computed wait for, and share, its result.
+    """
+
+    def __init__(self, planet=None, locator=None, cache_size=4096, **locator_args):
+        """
+        Parameters
+        ----------
+        planet : Planet, optional
+            The planet to solve scenarios for. Default is Planet().
+
+        locator : GeospatialLocator, optional
+            The locator for postcode and population queries. If None, one
+            is loaded when the service is created, passing on locator_args
+            (e.g. postcode_file and census_file).
+
+        cache_size : int, optional
+            Maximum number of solved outcomes to keep.
+        """
+        self.planet = Planet() if planet is None else planet
+        self.locator = GeospatialLocator(**locator_args) if locator is None else locator
+        self.cache_size = cache_size
+        self._outcomes = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "cache_hits": 0, "coalesced": 0}
+
+    def warm_up(self):
+        """
+        Run one query of each kind so that lazily built state (the
+        atmosphere interpolator, the census KDTree) is ready before the
+        first user request.
+        """
+        X = tuple(self.locator.census_coords[len(self.locator.census_coords) // 2])
+        self.locator.get_postcodes_by_radius(X, [1e3])
+        self.locator.get_population_by_radius(X, [500.0])
+        self.outcome(
+            dict(radius=10, velocity=20e3, density=3000, strength=1e5, angle=45)
+        )
+
+    def coalesce(self, key, func):
+        """
+        Return func(), sharing a single call between all the threads asking
+        for the same key at the same time.
+
+        Parameters
+        ----------
+        key : hashable
+            Identifies the work, e.g. the endpoint and canonical request.
+
+        func : callable
+            Function computing the result.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.stats["coalesced"] += 1
+
+        if leader:
+            try:
+                future.set_result(func())
+            except BaseException as error:
+                future.set_exception(error)
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+        return future.result()
+
+    def outcome(self, scenario, init_altitude=100e3, dt=0.25, result=None):
+        """
+        Return the outcome dictionary of a scenario, from the cache if it
+        has been solved before.
+
+        Parameters
+        ----------
+        scenario : dict
+            Dictionary with keys radius, velocity, density, strength and angle.
+
+        init_altitude, dt : float, optional
+            Passed on to `Planet.solve_atmospheric_entry`.
+
+        result : DataFrame, optional
+            The trajectory of the scenario, if it has already been solved,
+            to analyse instead of solving it again. Its dedz column is
+            updated in place.
+        """
+        key = tuple(float(scenario[name]) for name in SCENARIO) + (
+            float(init_altitude),
+            float(dt),
+        )
+        with self._lock:
+            if key in self._outcomes:
+                self._outcomes.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return self._outcomes[key]
+
+        def solve():
+            if self.planet.emulator is not None:
+                return self.planet.emulate_outcome(*key[:5])
+            trajectory = result
+            if trajectory is None:
+                trajectory = self.planet.solve_atmospheric_entry(
+                    *key[:5], init_altitude=init_altitude, dt=dt
+                )
+            return self.planet.analyse_outcome(self.planet.calculate_energy(trajectory))
+
+        outcome = self.coalesce(("outcome", key), solve)
+        with self._lock:
+            self._outcomes[key] = outcome
+            while len(self._outcomes) > self.cache_size:
+                self._outcomes.popitem(last=False)
+        return outcome
+
+    def solve(self, request):
+        """
+        Handle a /solve request.
+        """
+        init_altitude = request.get("init_altitude", 100e3)
+        dt = request.get("dt", 0.25)
+        if not request.get("trajectory", False):
+            return {"outcome": self.outcome(request, init_altitude, dt)}
+
+        # solve once, for both the trajectory and (if it isn't cached) the
+        # outcome
+        result = self.planet.solve_atmospheric_entry(
+            *(request[name] for name in SCENARIO),
+            init_altitude=init_altitude,
+            dt=dt,
+        )
+        trajectory = result.to_dict(orient="list")
+        return {
+            "outcome": self.outcome(request, init_altitude, dt, result),
+            "trajectory": trajectory,
+        }
+
+    def damage(self, request):
+        """
+        Handle a /damage request. There is one damage radius for each
+        pressure, null where the pressure isn't reached.
+        """
+        outcome = self.outcome(
+            request, request.get("init_altitude", 100e3), request.get("dt", 0.25)
+        )
+        blat, blon, radii = batch_damage_zones(
+            {key: [value] for key, value in outcome.items()},
+            request["lat"],
+            request["lon"],
+            request["bearing"],
+            request.get("pressures", [1e3, 3.5e3, 27e3, 43e3]),
+        )
+        return {
+            "outcome": outcome,
+            "blast_lat": float(blat[0]),
+            "blast_lon": float(blon[0]),
+            "damage_radii": [None if np.isnan(r) else float(r) for r in radii[0]],
+        }
+
+    def postcodes(self, request):
+        """
+        Handle a /postcodes request.
+        """
+        X = (request["lat"], request["lon"])
+        return {"postcodes": self.locator.get_postcodes_by_radius(X, request["radii"])}
+
+    def population(self, request):
+        """
+        Handle a /population request.
+        """
+        X = (request["lat"], request["lon"])
+        radii = request["radii"]
+        return {"population": self.locator.get_population_by_radius(X, radii)}
+
+    def risk(self, request):
+        """
+        Handle a /risk request. The impacts are given either as a list of
+        records ("impacts") or the name of a .csv file ("impact_file").
+        """
+        if "impacts" in request:
+            data = pd.DataFrame(request["impacts"])
+        else:
+            data = pd.read_csv(request["impact_file"])
+        data = data.iloc[: request.get("nsamples")]
+        tally = tally_impacts(
+            self.planet, self.locator, data, request.get("pressure", 30e3)
+        )
+        probability, population = finalise_tally(tally)
+        return {
+            "probability": dict(
+                zip(probability["Postcode"], probability["probability"])
+            ),
+            "population": population,
+        }
+
+    def health(self):
+        """
+        Handle a /health request.
+        """
+        with self._lock:
+            return dict(self.stats, status="ok", cached_outcomes=len(self._outcomes))
+
+    def handle(self, endpoint, request):
+        """
+        Dispatch a request to an endpoint, coalescing identical requests.
+
+        Parameters
+        ----------
+        endpoint : str
+            Name of the endpoint, e.g. 'solve'.
+
+        request : dict
+            The decoded JSON request body.
+
+        Returns
+        -------
+        dict
+            The JSON-serialisable response.
+        """
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{endpoint}'")
+        with self._lock:
+            self.stats["requests"] += 1
+        key = (endpoint, json.dumps(request, sort_keys=True))
+        return self.coalesce(key, lambda: getattr(self, endpoint)(request))
+
+    def make_server(self, host="127.0.0.1", port=8765):
+        """
+        Return a threading HTTP server for this service (not yet started).
+        """
+        handler = type("Handler", (_RequestHandler,), {"service": self})
+        return ThreadingHTTPServer((host, port), handler)
+
+    def serve(self, host="127.0.0.1", port=8765, warm_up=True):
+        """
+        Serve requests until interrupted.
+
+        Parameters
+        ----------
+        host : str, optional
+            Address to listen on. The default only accepts local connections.
+
+        port : int, optional
+            Port to listen on.
+
+        warm_up : bool, optional
+            Whether to call `warm_up` before accepting requests.
+        """
+        if warm_up:
+            self.warm_up()
+        with self.make_server(host, port) as server:
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+
+
+ENDPOINTS = ("solve", "damage", "postcodes", "population", "risk")
+
+
+def json_default(value):
+    """
+    Convert numpy types for json.dumps.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    Decodes JSON requests and passes them to the RiskService.
+    """
+
+    service = None
+
+    def send_json(self, status, body):
+        data = json.dumps(body, default=json_default).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            self.send_json(200, self.service.health())
+        else:
+            self.send_json(404, {"error": f"Unknown endpoint '{self.path}'"})
+
+    def do_POST(self):
+        endpoint = self.path.strip("/")
+        if endpoint not in ENDPOINTS:
+            self.send_json(404, {"error": f"Unknown endpoint '{self.path}'"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            response = self.service.handle(endpoint, request)
+        except KeyError as error:
+            self.send_json(400, {"error": f"Missing parameter {error}"})
+        except (ValueError, TypeError, IndexError, OSError) as error:
+            # e.g. a missing impact_file
+            self.send_json(400, {"error": str(error)})
+        except Exception as error:
+            self.send_json(500, {"error": f"{type(error).__name__}: {error}"})
+        else:
+            self.send_json(200, response)
+
+    def log_message(self, format, *args):
+        # keep the console quiet; errors are reported to the client
+        pass
@@ -0,0 +1,291 @@
+"""
+Module to generate synthetic postcode and census data, in the file formats
+read by GeospatialLocator, for offline testing and benchmarking
+"""
+import os
+import string
+
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    "synthetic_census",
+    "synthetic_postcodes",
+    "write_census",
+    "write_postcodes",
+    "generate_synthetic_data",
+]
+
+# Approximate size of the real UK data sets
+UK_CENTRE = (55.4, -3.2)
+UK_ROWS = 1220
+UK_COLUMNS = 700
+UK_POPULATION = 63e6
+UK_CITIES = 60
+
+# Number of postcodes per resident (about 1.7 million postcodes in the UK)
+POSTCODE_DENSITY = 0.027
+
+# Grid cell size (m) and the Earth radius used by great_circle_distance
+CELL_SIZE = 1000.0
+R_EARTH = 6371000.0
+
+NODATA_VALUE = -9999
+
+
+def synthetic_census(
+    scale=1.0,
+    centre=UK_CENTRE,
+    population=None,
+    ncities=None,
+    seed=None,
+):
+    """
+    Generate a synthetic 1 km x 1 km population grid.
+
+    The population is concentrated in cities with a Zipf distribution of
+    sizes and Gaussian density profiles, on a rural background. Cells more
+    than 60 km from every city are treated as sea and given no data.
+
+    Parameters
+    ----------
+    scale : float, optional
+        Size of the grid relative to the UK grid (about 850,000 cells).
+        The number of cities and total population scale with it. Large
+        grids are widened in longitude to stay within +/-80 degrees
+        latitude.
+
+    centre : tuple, optional
+        Latitude and longitude of the centre of the grid (degrees).
+
+    population : float, optional
+        Total population. Defaults to the UK population times scale.
+
+    ncities : int, optional
+        Number of cities. Defaults to 60 times scale.
+
+    seed : int, optional
+        Seed for the random number generator.
+
+    Returns
+    -------
+    latitude, longitude, population : numpy.ndarray
+        (nrows, ncols) arrays of the latitude and longitude of the centre
+        of each cell (degrees) and its population (NODATA_VALUE at sea).
+
+    Examples
+    --------
+    >>> lat, lon, pop = synthetic_census(scale=0.01, seed=0)
+    >>> lat.shape
+    (122, 70)
+    """
+    rng = np.random.default_rng(seed)
+    if population is None:
+        population = UK_POPULATION * scale
+    if ncities is None:
+        ncities = max(1, int(round(UK_CITIES * scale)))
+
+    dlat = np.degrees(CELL_SIZE / R_EARTH)
+    dlon = dlat / np.cos(np.radians(centre[0]))
+    ncells = UK_ROWS * UK_COLUMNS * scale
+    nrows = int(min(round(UK_ROWS * np.sqrt(scale)), (80 - abs(centre[0])) * 2 / dlat))
+    nrows = max(nrows, 1)
+    ncols = int(min(max(round(ncells / nrows), 1), 359.0 / dlon))
+
+    latitude = centre[0] + (nrows / 2 - 0.5 - np.arange(nrows)) * dlat
+    longitude = centre[1] + (np.arange(ncols) - ncols / 2 + 0.5) * dlon
+    latitude, longitude = np.meshgrid(latitude, longitude, indexing="ij")
+    longitude = (longitude + 180) % 360 - 180
+
+    # city sizes follow Zipf's law, with widths growing with their size
+    sizes = 1.0 / np.arange(1, ncities + 1)
+    rows = rng.integers(0, nrows, ncities)
+    cols = rng.integers(0, ncols, ncities)
+    widths = 2.0 + 10.0 * np.sqrt(sizes / sizes[0])
+
+    density = np.zeros((nrows, ncols))
+    land = np.zeros((nrows, ncols), dtype=bool)
+    for row, col, size, width in zip(rows, cols, sizes, widths):
+        reach = int(max(4 * width, 60))
+        r0, r1 = max(row - reach, 0), min(row + reach + 1, nrows)
+        c0, c1 = max(col - reach, 0), min(col + reach + 1, ncols)
+        dr = np.arange(r0, r1)[:, None] - row
+        dc = np.arange(c0, c1)[None, :] - col
+        distance2 = dr**2 + dc**2
+        land[r0:r1, c0:c1] |= distance2 <= 60**2
+        density[r0:r1, c0:c1] += size / width**2 * np.exp(-distance2 / (2 * width**2))
+
+    # rural background, and noise so that no two cells are identical
+    density += land * 0.002 * density.max()
+    density *= rng.lognormal(0.0, 0.5, density.shape)
+    counts = np.round(density * population / density[land].sum())
+    counts[~land] = NODATA_VALUE
+
+    return latitude, longitude, counts
+
+
+def synthetic_postcodes(
+    latitude,
+    longitude,
+    population,
+    npostcodes=None,
+    density=POSTCODE_DENSITY,
+    seed=None,
+):
+    """
+    Generate synthetic postcodes scattered over a census grid in proportion
+    to its population.
+
+    Postcodes are named in the UK format (e.g. 'AB12 3CD'), numbered in
+    grid order so that nearby postcodes share their area and district.
+
+    Parameters
+    ----------
+    latitude, longitude, population : numpy.ndarray
+        Census grid, as returned by `synthetic_census`.
+
+    npostcodes : int, optional
+        Number of postcodes. Defaults to density times the total population.
+
+    density : float, optional
+        Number of postcodes per resident, used when npostcodes is not given.
+
+    seed : int, optional
+        Seed for the random number generator.
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with columns 'Postcode', 'Latitude' and 'Longitude'.
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.where(population > 0, population, 0).ravel()
+    if npostcodes is None:
+        npostcodes = int(round(density * weights.sum()))
+
+    cells = np.sort(rng.choice(weights.size, npostcodes, p=weights / weights.sum()))
+    dlat = np.abs(np.diff(latitude[:, 0]).mean()) if latitude.shape[0] > 1 else 0.009
+    dlon = np.abs(np.diff(longitude[0]).mean()) if longitude.shape[1] > 1 else 0.016
+    lat = latitude.ravel()[cells] + rng.uniform(-0.5, 0.5, npostcodes) * dlat
+    lon = longitude.ravel()[cells] + rng.uniform(-0.5, 0.5, npostcodes) * dlon
+    lon = (lon + 180) % 360 - 180
+
+    return pd.DataFrame(
+        {"Postcode": postcode_names(npostcodes), "Latitude": lat, "Longitude": lon}
+    )
+
+
+def postcode_names(n):
+    """
+    Return n distinct UK-format postcodes in order, e.g. 'AA0 0AA', 'AA0 0AB'.
+    """
+    letters = np.array(list(string.ascii_uppercase))
+    index = np.arange(n)
+    unit, index = index % 676, index // 676
+    sector, index = index % 10, index // 10
+    district, area = index % 100, index // 100
+    if n and area.max() >= 676:
+        raise ValueError("Too many postcodes to name")
+
+    return [
+        f"{letters[a // 26]}{letters[a % 26]}{d} {s}{letters[u // 26]}{letters[u % 26]}"
+        for a, d, s, u in zip(area, district, sector, unit)
+    ]
+
+
+def write_census(filename, latitude, longitude, population, nodata=NODATA_VALUE):
+    """
+    Write a census grid as an .asc file in the format read by
+    `GeospatialLocator.load_census_data`: a header with the number of
+    columns and rows and the no data value, three label lines, and then
+    the latitude, longitude and population arrays one after the other.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the file to write.
+
+    latitude, longitude, population : numpy.ndarray
+        (nrows, ncols) arrays, as returned by `synthetic_census`.
+
+    nodata : float, optional
+        Value marking cells with no data.
+    """
+    nrows, ncols = population.shape
+    with open(filename, "w") as file:
+        file.write(f"ncols {ncols}\n")
+        file.write(f"nrows {nrows}\n")
+        file.write(f"NODATA_value {nodata}\n")
+        file.write("Latitude\nLongitude\nPopulation\n")
+        np.savetxt(file, latitude, fmt="%.6f")
+        np.savetxt(file, longitude, fmt="%.6f")
+        np.savetxt(file, population, fmt="%d")
+
+
+def write_postcodes(filename, postcodes):
+    """
+    Write postcodes as a .csv file in the format read by
+    `GeospatialLocator.load_postcode_data`.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the file to write.
+
+    postcodes : pandas.DataFrame
+        Postcode data, as returned by `synthetic_postcodes`.
+    """
+    postcodes.to_csv(filename, index=False, float_format="%.6f")
+
+
+def generate_synthetic_data(directory, scale=1.0, seed=0, **kwargs):
+    """
+    Write a synthetic postcode .csv file and census .asc file to a
+    directory, ready to be loaded by `GeospatialLocator`.
+
+    Parameters
+    ----------
+    directory : str
+        Directory to write the files to (created if necessary).
+
+    scale : float, optional
+        Size of the data relative to the UK data (see `synthetic_census`).
+
+    seed : int, optional
+        Seed for the random number generator.
+
+    **kwargs
+        Passed on to `synthetic_census` (centre, population, ncities) and
+        `synthetic_postcodes` (npostcodes, density).
+
+    Returns
+    -------
+    postcode_file, census_file : str
+        Names of the files written.
+
+    Examples
+    --------
+    >>> import deepimpact
+    >>> files = generate_synthetic_data("synthetic", scale=0.1)
+    >>> locator = deepimpact.GeospatialLocator(*files)
+    """
+    census_args = {
+        key: kwargs.pop(key)
+        for key in ("centre", "population", "ncities")
+        if key in kwargs
+    }
+    rng = np.random.default_rng(seed)
+    latitude, longitude, population = synthetic_census(
+        scale=scale, seed=rng.integers(2**32), **census_args
+    )
+    postcodes = synthetic_postcodes(
+        latitude, longitude, population, seed=rng.integers(2**32), **kwargs
+    )
+
+    os.makedirs(directory, exist_ok=True)
+    postcode_file = os.sep.join((directory, "full_postcodes.csv"))
+    census_file = os.sep.join((directory, "UK_residential_population_2011_latlon.asc"))
+    write_postcodes(postcode_file, postcodes)
+    write_census(census_file, latitude, longitude, population)
+
+    return postcode_file, census_file
@@ -0,0 +1,489 @@
+"""
+This module contains containers for solved atmospheric entry trajectories,
+which can be evaluated and resampled after the solve
+"""
+import numpy as np
+import pandas as pd
+
+__all__ = ["DenseTrajectory", "TrajectoryEnsemble"]
+
+# State variables of the solver, in the order of its state vector
+STATE = ("velocity", "mass", "angle", "altitude", "distance", "radius")
+
+# Columns of the DataFrame returned by Planet.solve_atmospheric_entry
+COLUMNS = ("time",) + STATE
+
+
+def hermite(s, h, y0, y1, dydt0, dydt1):
+    """
+    Evaluate the cubic Hermite interpolant of a step of length h, from
+    state y0 to y1 with time derivatives dydt0 and dydt1, at the fraction
+    s of the step.
+    """
+    s2, s3 = s**2, s**3
+    return (
+        (2 * s3 - 3 * s2 + 1) * y0
+        + (s3 - 2 * s2 + s) * h * dydt0
+        + (3 * s2 - 2 * s3) * y1
+        + (s3 - s2) * h * dydt1
+    )
+
+
+class DenseTrajectory(object):
+    """
+    Continuous representation of a solved trajectory.
+
+    The state and its time derivative are kept at every internal step of
+    the solver, and the state between two steps is given by the cubic
+    Hermite interpolant matching both, which has the same order of
+    accuracy as the steps themselves. The trajectory can then be sampled
+    at any times or altitudes without integrating again.
+
+    Examples
+    --------
+    >>> planet = Planet()
+    >>> result, dense = planet.solve_atmospheric_entry(
+    ...     35, 19e3, 3000, 1e7, 45, dense_output=True
+    ... )
+    >>> fine = dense.resample(0.01)
+    >>> bins = dense.at_altitudes(np.arange(40e3, 20e3, -1e3))
+    """
+
+    def __init__(self, t, y, dydt):
+        """
+        Parameters
+        ----------
+        t : array_like
+            (n,) increasing times of the internal steps (s).
+
+        y : array_like
+            (n, 6) state at each time, in the order velocity, mass, angle
+            (radians), altitude, distance and radius.
+
+        dydt : array_like
+            (n, 6) time derivative of the state at each time.
+        """
+        self.t = np.asarray(t, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.dydt = np.asarray(dydt, dtype=float)
+        if self.y.shape != (self.t.size, len(STATE)) or self.dydt.shape != self.y.shape:
+            raise ValueError("y and dydt must have shape (len(t), 6)")
+
+    @property
+    def t_min(self):
+        """Start time of the trajectory (s)."""
+        return self.t[0]
+
+    @property
+    def t_max(self):
+        """End time of the trajectory (s)."""
+        return self.t[-1]
+
+    def _locate(self, t):
+        """
+        Return the index of the step containing each time and the
+        fractional position within it.
+        """
+        index = np.clip(
+            np.searchsorted(self.t, t, side="right") - 1, 0, max(self.t.size - 2, 0)
+        )
+        if self.t.size == 1:
+            return index, np.zeros_like(t)
+        h = self.t[index + 1] - self.t[index]
+        return index, (t - self.t[index]) / h
+
+    def _hermite(self, index, s, columns=slice(None)):
+        """
+        Evaluate the interpolant of the given columns at fractional
+        positions s within steps index.
+        """
+        if self.t.size == 1:
+            return np.broadcast_to(
+                self.y[0, columns], s.shape + self.y[0, columns].shape
+            )
+        return hermite(
+            s[:, None],
+            (self.t[index + 1] - self.t[index])[:, None],
+            self.y[index, columns],
+            self.y[index + 1, columns],
+            self.dydt[index, columns],
+            self.dydt[index + 1, columns],
+        )
+
+    def __call__(self, t):
+        """
+        Evaluate the state at the given times.
+
+        Parameters
+        ----------
+        t : float or array_like
+            Times (s), within [t_min, t_max]. Times outside are extrapolated
+            from the first or last step.
+
+        Returns
+        -------
+        numpy.ndarray
+            (..., 6) state at each time (angle in radians).
+        """
+        t = np.asarray(t, dtype=float)
+        index, s = self._locate(t.ravel())
+        return self._hermite(index, s).reshape(t.shape + (len(STATE),))
+
+    def sample(self, times):
+        """
+        Evaluate the trajectory at the given times.
+
+        Parameters
+        ----------
+        times : array_like
+            Times (s), within [t_min, t_max].
+
+        Returns
+        -------
+        DataFrame
+            DataFrame with the same columns as returned by
+            `Planet.solve_atmospheric_entry` (angle in degrees).
+        """
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        return self._frame(times, self(times))
+
+    def resample(self, dt, t_start=None, t_end=None):
+        """
+        Evaluate the trajectory at a regular interval.
+
+        Parameters
+        ----------
+        dt : float
+            Output interval (s).
+
+        t_start, t_end : float, optional
+            Time range to sample (s). Defaults to the whole trajectory.
+
+        Returns
+        -------
+        DataFrame
+            As returned by `sample`.
+        """
+        t_start = self.t_min if t_start is None else max(t_start, self.t_min)
+        t_end = self.t_max if t_end is None else min(t_end, self.t_max)
+        count = int(np.floor((t_end - t_start) / dt * (1 + 1e-12))) + 1
+        return self.sample(t_start + dt * np.arange(max(count, 0)))
+
+    def at_altitudes(self, altitudes, maxiter=8):
+        """
+        Evaluate the trajectory where it passes the given altitudes.
+
+        Parameters
+        ----------
+        altitudes : array_like
+            Altitudes (m). Altitudes outside the range descended through
+            give rows of NaN.
+
+        maxiter : int, optional
+            Number of Newton iterations refining each crossing time.
+
+        Returns
+        -------
+        DataFrame
+            As returned by `sample`, with one row per altitude.
+        """
+        altitudes = np.atleast_1d(np.asarray(altitudes, dtype=float))
+        # the altitude falls monotonically, apart from rounding at the end
+        z = np.minimum.accumulate(self.y[:, 3])
+        valid = (altitudes <= z[0]) & (altitudes >= z[-1])
+        if self.t.size < 2:
+            times = np.full(altitudes.shape, self.t_min)
+            state = np.array(self(times))
+            times[~valid] = np.nan
+            state[~valid] = np.nan
+            return self._frame(times, state)
+
+        index = np.searchsorted(-z, -altitudes, side="left") - 1
+        index = np.clip(index, 0, self.t.size - 2)
+        # start from linear interpolation, and refine with Newton's method
+        z0, z1 = self.y[index, 3], self.y[index + 1, 3]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = np.where(z1 != z0, (altitudes - z0) / (z1 - z0), 0.0)
+        s = np.clip(s, 0.0, 1.0)
+        h = self.t[index + 1] - self.t[index]
+        for _ in range(maxiter):
+            residual = self._hermite(index, s, slice(3, 4))[:, 0] - altitudes
+            s2 = s**2
+            slope = (
+                (6 * s2 - 6 * s) * (z0 - z1)
+                + (3 * s2 - 4 * s + 1) * h * self.dydt[index, 3]
+                + (3 * s2 - 2 * s) * h * self.dydt[index + 1, 3]
+            )
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = np.where(slope != 0, residual / slope, 0.0)
+            s = np.clip(s - step, 0.0, 1.0)
+
+        times = self.t[index] + s * h
+        state = self._hermite(index, s)
+        times[~valid] = np.nan
+        state[~valid] = np.nan
+        return self._frame(times, state)
+
+    @staticmethod
+    def _frame(times, state):
+        """
+        Return a DataFrame in the format of the solver output.
+        """
+        result = pd.DataFrame(np.column_stack([times, state]), columns=list(COLUMNS))
+        result["angle"] = np.degrees(result["angle"])
+        return result
+
+
+class TrajectoryEnsemble(object):
+    """
+    Many solved trajectories stored together, compressed sparse row style:
+    each column is one flat array holding every trajectory one after the
+    other, and trajectory i occupies rows offsets[i] to offsets[i + 1].
+
+    Compared with a list of DataFrames this needs one allocation per column
+    rather than per trajectory, gives views of each trajectory without
+    copying, and lets the energy and outcome calculations run over the
+    whole ensemble at once.
+
+    Examples
+    --------
+    >>> planet = Planet()
+    >>> ensemble = planet.solve_ensemble([10, 20, 30], 19e3, 3000, 1e5, 45)
+    >>> outcomes = ensemble.calculate_energy().analyse_outcome()
+    >>> ensemble.frame(1).head()
+    """
+
+    def __init__(self, columns, offsets, parameters=None):
+        """
+        Parameters
+        ----------
+        columns : dict
+            Flat arrays of equal length, keyed by column name (e.g. the
+            columns of `Planet.solve_atmospheric_entry`).
+
+        offsets : array_like
+            (n + 1,) start of each of the n trajectories in the columns,
+            followed by the total length.
+
+        parameters : dict, optional
+            (n,) arrays of per-trajectory values, e.g. the entry parameters.
+        """
+        self.columns = {key: np.asarray(value) for key, value in columns.items()}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.parameters = {
+            key: np.asarray(value) for key, value in (parameters or {}).items()
+        }
+        size = self.offsets[-1] if self.offsets.size else 0
+        if self.offsets.size == 0 or self.offsets[0] != 0:
+            raise ValueError("offsets must start with 0")
+        if np.any(np.diff(self.offsets) < 0):
+            raise ValueError("offsets must be non-decreasing")
+        if any(value.shape != (size,) for value in self.columns.values()):
+            raise ValueError("columns must be flat arrays of length offsets[-1]")
+        if any(value.shape[:1] != (len(self),) for value in self.parameters.values()):
+            raise ValueError("parameters must have one value per trajectory")
+
+    @classmethod
+    def from_frames(cls, frames, parameters=None):
+        """
+        Pack a list of trajectory DataFrames into an ensemble.
+
+        Parameters
+        ----------
+        frames : list of DataFrame
+            Trajectories with the same columns, e.g. as returned by
+            `Planet.solve_atmospheric_entry`.
+
+        parameters : dict, optional
+            Per-trajectory values, as for the constructor.
+
+        Returns
+        -------
+        TrajectoryEnsemble
+        """
+        lengths = [len(frame) for frame in frames]
+        names = list(frames[0].columns) if frames else list(COLUMNS)
+        columns = {
+            name: (
+                np.concatenate([frame[name].to_numpy(dtype=float) for frame in frames])
+                if frames
+                else np.empty(0)
+            )
+            for name in names
+        }
+        return cls(columns, np.concatenate([[0], np.cumsum(lengths)]), parameters)
+
+    def __len__(self):
+        return self.offsets.size - 1
+
+    @property
+    def lengths(self):
+        """Number of rows of each trajectory."""
+        return np.diff(self.offsets)
+
+    def member(self, i):
+        """
+        Return trajectory i as a dictionary of views of the columns (no
+        data is copied).
+        """
+        if not -len(self) <= i < len(self):
+            raise IndexError("trajectory index out of range")
+        i = i % len(self)
+        rows = slice(self.offsets[i], self.offsets[i + 1])
+        return {key: value[rows] for key, value in self.columns.items()}
+
+    def frame(self, i):
+        """
+        Return trajectory i as a DataFrame, in the format returned by
+        `Planet.solve_atmospheric_entry`.
+        """
+        return pd.DataFrame(self.member(i))
+
+    def __getitem__(self, i):
+        return self.member(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.member(i)
+
+    def _double(self, name):
+        """
+        Return a column in double precision (without copying it if it is
+        already).
+        """
+        return self.columns[name].astype(np.float64, copy=False)
+
+    def _first_rows(self):
+        """
+        Return the index of the first row of each non-empty trajectory, and
+        the mask of non-empty trajectories.
+        """
+        nonempty = self.lengths > 0
+        return self.offsets[:-1][nonempty], nonempty
+
+    def calculate_energy(self):
+        """
+        Add (or update) the 'dedz' column of every trajectory, exactly as
+        `Planet.calculate_energy` would for each trajectory separately.
+
+        The differences are taken in double precision, and the column is
+        stored in the precision of the mass and velocity columns.
+
+        Returns
+        -------
+        TrajectoryEnsemble
+            The ensemble itself.
+        """
+        mass, velocity = self._double("mass"), self._double("velocity")
+        energy = 0.5 * mass * velocity**2 / 4.184e12
+        altitude = self._double("altitude")
+        energy_diff = np.diff(energy, prepend=energy[:1])
+        altitude_diff = np.diff(altitude, prepend=altitude[:1])
+        # differences start again at the first row of each trajectory
+        first, _ = self._first_rows()
+        energy_diff[first] = 0.0
+        altitude_diff[first] = 0.0
+        altitude_diff[altitude_diff == 0] = 1e-6
+        dtype = np.result_type(self.columns["mass"], self.columns["velocity"])
+        self.columns["dedz"] = (energy_diff / (altitude_diff / 1000)).astype(
+            dtype, copy=False
+        )
+        return self
+
+    def analyse_outcome(self):
+        """
+        Find the outcome of every trajectory, exactly as
+        `Planet.analyse_outcome` would for each trajectory separately. The
+        ensemble must have a 'dedz' column (see `calculate_energy`).
+
+        Returns
+        -------
+        DataFrame
+            One row per trajectory, with the columns 'outcome',
+            'burst_peak_dedz', 'burst_altitude', 'burst_distance' and
+            'burst_energy'. Empty trajectories have the outcome 'Unknown'.
+        """
+        dedz = self.columns["dedz"]
+        altitude = self.columns["altitude"]
+        distance = self.columns["distance"]
+        energy = 0.5 * self._double("mass") * self._double("velocity") ** 2
+
+        first, nonempty = self._first_rows()
+        lengths = self.lengths[nonempty]
+        rows = np.arange(dedz.size)
+
+        # first row of the largest dedz of each trajectory (like idxmax,
+        # which skips NaN)
+        peak = np.fmax.reduceat(dedz, first) if first.size else np.empty(0)
+        at_peak = dedz == np.repeat(peak, lengths)
+        index = np.minimum.reduceat(np.where(at_peak, rows, dedz.size), first)
+        index[index == dedz.size] = first[index == dedz.size]
+
+        # trajectories whose peak is on the ground crater at the first
+        # row on the ground instead
+        crater = altitude[index] <= 0
+        grounded = np.minimum.reduceat(np.where(altitude <= 0, rows, dedz.size), first)
+        index = np.where(crater, grounded, index)
+
+        initial = energy[first]
+        burst = energy[index]
+        result = {
+            "outcome": np.where(crater, "Cratering", "Airburst"),
+            "burst_peak_dedz": dedz[index],
+            "burst_altitude": np.where(crater, 0.0, altitude[index]),
+            "burst_distance": distance[index],
+            "burst_energy": np.maximum(initial - burst, burst) / 4.184e12,
+        }
+
+        outcomes = pd.DataFrame(
+            {
+                "outcome": np.full(len(self), "Unknown", dtype=object),
+                "burst_peak_dedz": 0.0,
+                "burst_altitude": 0.0,
+                "burst_distance": 0.0,
+                "burst_energy": 0.0,
+            }
+        )
+        for key, value in result.items():
+            outcomes.loc[nonempty, key] = value
+        return outcomes
+
+    def save(self, filename):
+        """
+        Write the ensemble to a compressed .npz file.
+
+        Parameters
+        ----------
+        filename : string
+            Name of the .npz file to write.
+        """
+        arrays = {"offsets": self.offsets}
+        arrays.update(("column_" + key, value) for key, value in self.columns.items())
+        arrays.update(
+            ("parameter_" + key, value) for key, value in self.parameters.items()
+        )
+        np.savez_compressed(filename, **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Read an ensemble written by `TrajectoryEnsemble.save`.
+
+        Parameters
+        ----------
+        filename : string
+            Name of the .npz file to read.
+
+        Returns
+        -------
+        TrajectoryEnsemble
+        """
+        with np.load(filename) as data:
+            columns, parameters = {}, {}
+            for key in data.files:
+                kind, _, name = key.partition("_")
+                if kind == "column":
+                    columns[name] = data[key]
+                elif kind == "parameter":
+                    parameters[name] = data[key]
+            return cls(columns, data["offsets"], parameters)
@@ -1,6 +1,7 @@
 import deepimpact
 import os
 import time
+from contextlib import nullcontext
 
 
 def run_scenario(file_suffix):
@@ -12,9 +13,17 @@ def run_scenario(file_suffix):
     impact_file_path = os.sep.join(
         (os.path.dirname(__file__), "..", "impact_parameter_lists", impact_file_name)
     )
-    probability, population = deepimpact.impact_risk(
-        earth, impact_file=impact_file_path
-    )
+    # optionally profile the run, and keep its timings in the directory
+    # named by the DEEPIMPACT_TIMINGS environment variable
+    timings_dir = os.environ.get("DEEPIMPACT_TIMINGS")
+    with deepimpact.profile() if timings_dir else nullcontext() as profiler:
+        # resume from the last checkpoint if an earlier run was interrupted
+        # (it is removed once the run completes)
+        probability, population = deepimpact.impact_risk(
+            earth,
+            impact_file=impact_file_path,
+            checkpoint=f"checkpoint_{file_suffix}.json",
+        )
 
     # Sort the probability Df the 'Probability' col in descending order
     probability_sorted = probability.sort_values(by="probability", ascending=False)
@@ -39,6 +48,13 @@ def run_scenario(file_suffix):
         file.write(output_str1 + "\n\n")
         file.write(output_str2 + "\n")
         file.write(output_str3 + "\n")
+        if timings_dir:
+            file.write("\n" + str(profiler.report()) + "\n")
+
+    if timings_dir:
+        profiler.report().to_json(
+            os.sep.join((timings_dir, f"timings_{file_suffix}.json"))
+        )
 
     print(f"Output for {file_suffix} written to {output_file}")
 
@@ -0,0 +1,21 @@
+import argparse
+import os
+
+from deepimpact.synthetic import generate_synthetic_data
+
+parser = argparse.ArgumentParser(
+    description="Write synthetic postcode and census data for offline use"
+)
+parser.add_argument(
+    "--output",
+    default=os.sep.join([".", "resources", "synthetic"]),
+    help="directory to write the data to",
+)
+parser.add_argument(
+    "--scale", type=float, default=1.0, help="size relative to the UK data"
+)
+parser.add_argument("--seed", type=int, default=0, help="random seed")
+args = parser.parse_args()
+
+for filename in generate_synthetic_data(args.output, scale=args.scale, seed=args.seed):
+    print(filename)
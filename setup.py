@@ -12,4 +12,5 @@ setup(
     description="Asteroid atmospheric entry solver",
     author="ACSE project",
     packages=["deepimpact"],
+    entry_points={"console_scripts": ["deepimpact = deepimpact.cli:main"]},
 )
@@ -0,0 +1,23 @@
+from pytest import fixture
+
+
+@fixture(scope="session")
+def synthetic_geodata(tmp_path_factory):
+    # A small synthetic postcode and census grid around the impact sites of
+    # resources/impact_parameter_list.csv, written once for every test module
+    from deepimpact import generate_synthetic_data
+
+    return generate_synthetic_data(
+        str(tmp_path_factory.mktemp("geodata")),
+        scale=0.005,
+        centre=(52.65, -1.3),
+        ncities=5,
+        npostcodes=500,
+    )
+
+
+@fixture(scope="module")
+def loc(synthetic_geodata):
+    from deepimpact import GeospatialLocator
+
+    return GeospatialLocator(*synthetic_geodata)
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from pytest import fixture
+
+IMPACT_FILE = os.sep.join(
+    (os.path.dirname(__file__), "..", "resources", "impact_parameter_list.csv")
+)
+SCENARIO = (35.0, 19e3, 3000.0, 1e7, 45.0)
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_pipeline(deepimpact, loc, executor):
+    planet = deepimpact.Planet()
+    expected = planet.analyse_outcome(
+        planet.calculate_energy(planet.solve_atmospheric_entry(*SCENARIO))
+    )
+
+    async def main():
+        async with deepimpact.AsyncPipeline(
+            planet, loc, executor=executor, max_workers=2
+        ) as pipeline:
+            result = await pipeline.solve_atmospheric_entry(*SCENARIO)
+            outcome = await pipeline.outcome(*SCENARIO)
+            zones = await pipeline.damage_zones(outcome, 52.65, -1.3, 135, [30e3])
+            postcodes, population = await asyncio.gather(
+                pipeline.get_postcodes_by_radius((52.65, -1.3), [5e3]),
+                pipeline.get_population_by_radius((52.65, -1.3), [5e3]),
+            )
+            return result, outcome, zones, postcodes, population
+
+    result, outcome, zones, postcodes, population = asyncio.run(main())
+
+    assert result.shape[1] == 7
+    assert outcome["burst_altitude"] == pytest.approx(expected["burst_altitude"])
+    assert len(zones[2]) == 1
+    assert postcodes == loc.get_postcodes_by_radius((52.65, -1.3), [5e3])
+    assert population == loc.get_population_by_radius((52.65, -1.3), [5e3])
+
+
+def test_caller_shared_locator(deepimpact, loc):
+    handle = loc.share()
+
+    async def main():
+        async with deepimpact.AsyncPipeline(
+            locator=loc, executor="process", max_workers=1
+        ) as pipeline:
+            return await pipeline.get_population_by_radius((52.65, -1.3), [5e3])
+
+    try:
+        population = asyncio.run(main())
+        # the pipeline leaves the segments it did not create
+        attached = deepimpact.GeospatialLocator.attach(handle)
+        assert population == attached.get_population_by_radius((52.65, -1.3), [5e3])
+    finally:
+        loc.close_shared()
+
+
+def test_impact_risk(deepimpact, loc):
+    planet = deepimpact.Planet()
+
+    async def main():
+        async with deepimpact.AsyncPipeline(planet, loc, executor="thread") as pipeline:
+            return await pipeline.impact_risk(IMPACT_FILE, nsamples=4, chunksize=1)
+
+    probability, population = asyncio.run(main())
+    serial = deepimpact.impact_risk(
+        planet, impact_file=IMPACT_FILE, nsamples=4, locator=loc
+    )
+    pd.testing.assert_frame_equal(probability, serial[0])
+    assert population == serial[1]
+
+
+def test_concurrency_and_cancellation(deepimpact):
+    from deepimpact import aio
+
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def slow(state, seconds):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(seconds)
+        with lock:
+            running.pop()
+        return seconds
+
+    async def main():
+        async with deepimpact.AsyncPipeline(
+            executor="thread", max_workers=4, max_concurrency=2
+        ) as pipeline:
+            results = await asyncio.gather(
+                *(pipeline.run("slow", 0.05) for _ in range(6))
+            )
+
+            # calls cancelled while waiting for a slot never run
+            tasks = [asyncio.create_task(pipeline.run("slow", 0.2)) for _ in range(4)]
+            await asyncio.sleep(0.05)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            return results, [task.cancelled() for task in tasks]
+
+    aio._TASKS["slow"] = slow
+    try:
+        results, cancelled = asyncio.run(main())
+    finally:
+        del aio._TASKS["slow"]
+
+    assert results == [0.05] * 6
+    assert max(peak) == 2
+    assert all(cancelled)
+    # only the two calls which had a slot started
+    assert len(peak) == 6 + 2
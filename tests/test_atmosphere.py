@@ -0,0 +1,64 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pytest import fixture
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+def test_atmosphere_models(deepimpact):
+    z = np.array([0.0, 8000.0])
+
+    exponential = deepimpact.ExponentialAtmosphere(rho0=1.2, H=8000.0)
+    assert np.allclose(exponential(z), [1.2, 1.2 / np.e])
+
+    constant = deepimpact.ConstantAtmosphere(rho0=1.2)
+    assert constant(1e4) == 1.2
+    assert np.allclose(constant(z), [1.2, 1.2])
+
+    tabular = deepimpact.TabularAtmosphere([0.0, 1e3, 2e3, 3e3], [1.2, 1.1, 1.0, 0.9])
+    assert np.isclose(tabular(500.0), 1.15)
+
+
+def test_pickle_planet(deepimpact):
+    for atmos_func in ("exponential", "tabular", "constant"):
+        planet = deepimpact.Planet(atmos_func=atmos_func)
+        copy = pickle.loads(pickle.dumps(planet))
+
+        z = np.linspace(0, 1e5, 11)
+        assert np.allclose(copy.rhoa(z), planet.rhoa(z))
+        assert copy.Cd == planet.Cd and copy.H == planet.H
+
+
+def test_unpickle_does_not_read_table(deepimpact, tmp_path):
+    filename = tmp_path / "table.csv"
+    filename.write_text("# Altitude Density\n0 1.2\n1000 1.1\n2000 1.0\n3000 0.9\n")
+
+    planet = deepimpact.Planet(atmos_func="tabular", atmos_filename=str(filename))
+    data = pickle.dumps(planet)
+    filename.unlink()
+
+    copy = pickle.loads(data)
+    assert np.isclose(copy.rhoa(500.0), 1.15)
+    assert np.isclose(copy.interpolate_density(500.0), 1.15)
+
+
+def solve(planet):
+    return planet.solve_atmospheric_entry(10.0, 19e3, 3000.0, 1e5, 45.0, dt=1.0)
+
+
+def test_planet_in_worker(deepimpact):
+    planet = deepimpact.Planet(atmos_func="tabular")
+
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        result = executor.submit(solve, planet).result()
+
+    pd.testing.assert_frame_equal(result, solve(planet))
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from pytest import fixture
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+@fixture(scope="module")
+def calibration(deepimpact):
+    # start just above the curve, with larger steps, to keep the solves quick
+    return deepimpact.Calibration(init_altitude=50e3, max_step=0.05)
+
+
+def test_load_energy_curve(deepimpact):
+    curve = deepimpact.load_energy_curve()
+    assert list(curve.columns) == ["altitude", "dedz"]
+    assert (np.diff(curve["altitude"]) <= 0).all()
+    assert 20e3 < curve["altitude"].min() < curve["altitude"].max() < 45e3
+    assert 70 < curve["dedz"].max() < 90
+
+
+def test_misfit_cache(calibration):
+    nsolves = calibration.nsolves
+    radius = np.array([8.0, 9.0, 9.0])
+    strength = np.array([1e6, 2e6, 2e6])
+    first = calibration.misfit(radius, strength)
+    assert first.shape == (3,)
+    assert first[1] == first[2]
+    assert calibration.nsolves == nsolves + 2
+
+    again = calibration.misfit(radius[::-1], strength[::-1])
+    assert np.array_equal(again, first[::-1])
+    assert calibration.nsolves == nsolves + 2
+
+
+def test_parallel_curves(calibration):
+    from concurrent.futures import ProcessPoolExecutor
+
+    serial = calibration.curves([8.0, 9.0, 10.0], 2e6)
+    with ProcessPoolExecutor(2) as executor:
+        parallel = calibration.curves(
+            [8.0, 9.0, 10.0], 2e6, map=executor.map, nchunks=2
+        )
+    assert np.array_equal(serial, parallel)
+
+
+def test_fit(deepimpact, calibration):
+    # recover the parameters of a curve made by the model itself
+    curve = calibration.curves(9.0, 2e6)[0]
+    synthetic = deepimpact.Calibration(
+        observed=pd.DataFrame({"altitude": calibration.altitudes, "dedz": curve}),
+        init_altitude=50e3,
+        max_step=0.05,
+    )
+    fit = synthetic.fit(
+        bounds={"radius": (7.0, 11.0), "strength": (5e5, 1e7)},
+        seed=0,
+        popsize=5,
+        maxiter=10,
+        polish=False,
+    )
+    assert np.isclose(fit["radius"], 9.0, rtol=0.05)
+    assert np.isclose(fit["strength"], 2e6, rtol=0.2)
+    assert fit["misfit"] < 0.05 * curve.max()
+    assert fit["nsolves"] <= fit["nfev"]
+
+    # a second fit finds every candidate in the cache
+    assert (
+        synthetic.fit(
+            bounds={"radius": (7.0, 11.0), "strength": (5e5, 1e7)},
+            seed=0,
+            popsize=5,
+            maxiter=10,
+            polish=False,
+        )["nsolves"]
+        == 0
+    )
@@ -0,0 +1,90 @@
+import json
+import os
+
+import pandas as pd
+
+from pytest import fixture
+
+IMPACT_FILE = os.sep.join(
+    (os.path.dirname(__file__), "..", "resources", "impact_parameter_list.csv")
+)
+SCENARIO = [
+    "--radius=35",
+    "--velocity=19e3",
+    "--density=3000",
+    "--strength=1e7",
+    "--angle=45",
+]
+
+
+@fixture(scope="module")
+def cli():
+    from deepimpact import cli
+
+    return cli
+
+
+@fixture(scope="module")
+def geodata(synthetic_geodata):
+    postcode_file, census_file = synthetic_geodata
+    return ["--postcode-file", postcode_file, "--census-file", census_file]
+
+
+def test_solve(cli, tmp_path):
+    output = tmp_path / "solve.json"
+    assert cli.main(["solve", *SCENARIO, "--format=json", "-o", str(output)]) == 0
+
+    with open(output) as file:
+        result = json.load(file)
+    assert result["outcome"]["outcome"] in ("Airburst", "Cratering")
+    assert result["trajectory"]["altitude"][0] == 100e3
+
+
+def test_damage(cli, tmp_path):
+    output = tmp_path / "damage.csv"
+    args = ["damage", *SCENARIO, "--lat=52.79", "--lon=-2.95", "--bearing=135"]
+    pressures = ["1e3", "1e9", "27e3"]
+    assert cli.main([*args, "--pressures", *pressures, "-o", str(output)]) == 0
+
+    result = pd.read_csv(output)
+    assert list(result["pressure"]) == [1e3, 1e9, 27e3]
+    assert result["damage_radius"][0] > result["damage_radius"][2]
+    # an unreached pressure keeps its row
+    assert pd.isna(result["damage_radius"][1])
+
+    output = tmp_path / "damage.json"
+    args += ["--pressures", *pressures, "--format=json"]
+    assert cli.main([*args, "-o", str(output)]) == 0
+    with open(output) as file:
+        result = json.load(file)
+    assert result["damage_radii"][1] is None
+
+
+def test_risk(cli, geodata, tmp_path):
+    output = tmp_path / "risk.json"
+    timings = tmp_path / "timings.json"
+    cache = tmp_path / "cache"
+    args = ["risk", IMPACT_FILE, IMPACT_FILE, "--nsamples=2", *geodata]
+    args += ["--cache-dir", str(cache), "--timings", str(timings)]
+
+    assert cli.main([*args, "--format=json", "-o", str(output)]) == 0
+    assert len(os.listdir(cache)) == 1
+
+    with open(output) as file:
+        result = json.load(file)
+    assert len(result) == 2
+    assert result[0] == result[1]
+    assert result[0]["population"]["mean"] > 0
+
+    with open(timings) as file:
+        summary = json.load(file)
+    assert summary["command"] == "risk"
+    assert len(summary["jobs"]) == 2
+    assert summary["profile"]["stages"]["solve"]["calls"] == 4
+
+    # a second run reads the cached locator and gives the same csv
+    output = tmp_path / "risk.csv"
+    assert cli.main([*args, "-o", str(output)]) == 0
+    probability = pd.read_csv(output)
+    assert list(probability.columns) == ["impact_file", "Postcode", "probability"]
+    assert len(probability) == 2 * len(result[0]["probability"])
@@ -2,7 +2,7 @@ import pandas as pd
 import numpy as np
 import os
 
-from pytest import fixture
+from pytest import approx, fixture
 
 
 # Use pytest fixtures to generate objects we know we'll reuse.
@@ -194,6 +194,123 @@ def test_extremely_large_inputs(deepimpact, example_outcome):
     assert isinstance(blat, float) and isinstance(blon, float)
 
 
+def test_find_destinations(deepimpact):
+    from deepimpact.damage import find_destination, find_destinations
+
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(-80, 80, 100)
+    lon = rng.uniform(-180, 180, 100)
+    bearing = rng.uniform(0, 360, 100)
+    distance = rng.uniform(0, 200e3, 100)
+
+    # entries at the poles and next to the antimeridian
+    lat[:2], lon[2:4] = [90, -90], [179.9, -179.9]
+    bearing[2:4] = [90, 270]
+
+    zero_lat, zero_lon = find_destinations(lat, lon, bearing, distance)
+    expected = np.array(
+        [find_destination(*args) for args in zip(lat, lon, bearing, distance)]
+    )
+    assert np.allclose(zero_lat, expected[:, 0])
+    assert np.allclose(zero_lon, expected[:, 1])
+    assert zero_lon[2] < 0 < zero_lon[3]
+
+    # past the pole, where the arctan of find_destination is a half turn out
+    zero_lat, zero_lon = find_destinations(89.9, 179.9, 45, 50e3)
+    assert zero_lat == approx(89.6145, abs=1e-4)
+    assert zero_lon == approx(-55.6694, abs=1e-4)
+
+    # scalars broadcast against arrays
+    zero_lat, zero_lon = find_destinations(52.79, -2.95, [0, 135], 90e3)
+    assert zero_lat.shape == (2,)
+    assert zero_lat[1] == find_destination(52.79, -2.95, 135, 90e3)[0]
+
+
+def test_batch_damage_zones(deepimpact):
+    outcomes = pd.DataFrame(
+        {
+            "burst_altitude": [8e3, 9e3, 30e3],
+            "burst_energy": [7e3, 6e3, 100.0],
+            "burst_distance": [90e3, 0.0, 50e3],
+        }
+    )
+    lat, lon, bearing = [52.79, 55.0, 51.5], [-2.95, 0.0, -0.1], [135, 90, 0]
+    pressures = [1e3, 3.5e3, 27e3, 43e3]
+
+    blat, blon, damrad = deepimpact.batch_damage_zones(
+        outcomes, lat, lon, bearing, pressures
+    )
+    assert blat.shape == blon.shape == (3,)
+    assert damrad.shape == (3, 4)
+
+    for i, outcome in outcomes.iterrows():
+        expected = deepimpact.damage_zones(
+            outcome.to_dict(), lat[i], lon[i], bearing[i], pressures
+        )
+        assert np.isclose(blat[i], expected[0])
+        assert np.isclose(blon[i], expected[1])
+        # levels which aren't reached are NaN rather than dropped
+        reached = ~np.isnan(damrad[i])
+        assert np.allclose(damrad[i][reached], expected[2], rtol=1e-5)
+
+    assert np.isnan(damrad[2, -1])
+
+    # columnar dict input without burst distances, and zero fill
+    _, _, zeros = deepimpact.batch_damage_zones(
+        {"burst_altitude": [20e3], "burst_energy": [1e3]},
+        51.5,
+        -0.1,
+        0,
+        [1e3, 43e3],
+        fill_value=0.0,
+    )
+    assert zeros[0, 1] == 0.0 and zeros[0, 0] > 0
+
+
+def test_brent_roots(deepimpact):
+    from deepimpact.damage import brent_roots
+
+    calls = []
+
+    def f(x, c):
+        calls.append(x.size)
+        return np.exp(x) - c
+
+    c = np.geomspace(0.1, 1e3, 50)
+    roots, converged = brent_roots(f, -5.0, 10.0, args=(c,), xtol=1e-12)
+    assert converged.all()
+    assert np.allclose(roots, np.log(c), rtol=0, atol=1e-11)
+    # one evaluation per iteration, on the unconverged elements only
+    assert calls[0] == calls[1] == 50
+    assert all(n <= m for n, m in zip(calls[2:], calls[1:]))
+
+    # brackets without a sign change, and roots at the bracket ends
+    roots, converged = brent_roots(lambda x: x - 1, [2.0, 0.0, 1.0], [3.0, 1.0, 5.0])
+    assert np.isnan(roots[0]) and not converged[0]
+    assert list(roots[1:]) == [1.0, 1.0]
+
+
+def test_blast_model(deepimpact):
+    from deepimpact.damage import airblast_func, blast_radii
+
+    z_b, E_k = np.array([8e3, 20e3, 30e3]), np.array([7e3, 1e3, 10.0])
+    pressures = [1e3, 3.5e3, 27e3, 43e3]
+
+    radii = blast_radii(
+        pressures, z_b, E_k, model=lambda r, z_b, E_k: airblast_func(r, z_b, E_k, 0)
+    )
+    expected = blast_radii(pressures, z_b, E_k)
+    assert np.array_equal(np.isnan(radii), np.isnan(expected))
+    assert np.allclose(radii, expected, rtol=1e-6, equal_nan=True)
+
+    # a simple alternative model, p = 1e9 * E_k / (r**2 + z_b**2)
+    radii = blast_radii(
+        [1e3, 1e4, 1e7], 1e3, 1e3, model=lambda r, z_b, E_k: 1e9 * E_k / (r**2 + z_b**2)
+    )
+    assert np.allclose(radii[0, :2], np.sqrt(1e12 / np.array([1e3, 1e4]) - 1e6))
+    assert np.isnan(radii[0, 2])
+
+
 def test_impact_risk(deepimpact, planet):
     probability, population = deepimpact.impact_risk(planet)
 
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from pytest import fixture
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+@fixture(scope="module")
+def planet(deepimpact):
+    return deepimpact.Planet()
+
+
+@fixture(scope="module")
+def ranges():
+    # Only radius varies, to keep the number of solves small
+    return {
+        "radius": (30.0, 40.0),
+        "velocity": 19e3,
+        "density": 3000.0,
+        "strength": 1e7,
+        "angle": 45.0,
+    }
+
+
+@fixture(scope="module")
+def emulator(deepimpact, planet, ranges):
+    return deepimpact.OutcomeEmulator.build(planet, ranges=ranges, npoints=3)
+
+
+def test_build_grid(emulator):
+    assert emulator.design == "grid"
+    assert emulator.points.shape == (3, 5)
+    assert len(emulator.axes["radius"]) == 3
+    assert len(emulator.axes["velocity"]) == 1
+
+
+def test_predict_matches_table(emulator):
+    prediction = emulator.predict(*emulator.points.T)
+    for key, value in emulator.values.items():
+        assert np.allclose(prediction[key], value)
+
+
+def test_outcome_matches_solver(planet, emulator):
+    result = planet.solve_atmospheric_entry(35.0, 19e3, 3000.0, 1e7, 45.0)
+    result = planet.calculate_energy(result)
+    expected = planet.analyse_outcome(result)
+
+    outcome = emulator.outcome(35.0, 19e3, 3000.0, 1e7, 45.0)
+
+    assert type(outcome) is dict
+    assert outcome["outcome"] == expected["outcome"]
+    assert np.isclose(outcome["burst_altitude"], expected["burst_altitude"], rtol=0.05)
+    assert np.isclose(outcome["burst_energy"], expected["burst_energy"], rtol=0.05)
+
+
+def test_validate_and_save(deepimpact, planet, emulator, tmp_path):
+    error = emulator.validate(planet, nsamples=2, seed=42)
+    assert error["nsamples"] == 2
+    for key in ("burst_peak_dedz", "burst_altitude", "burst_distance", "burst_energy"):
+        assert error[key]["max_abs"] >= error[key]["rms"] >= 0
+
+    filename = str(tmp_path / "outcomes.npz")
+    emulator.save(filename)
+    loaded = deepimpact.OutcomeEmulator.load(filename)
+
+    assert loaded.error == emulator.error
+    assert np.allclose(loaded.points, emulator.points)
+    assert loaded.outcome(33.0, 19e3, 3000.0, 1e7, 45.0) == emulator.outcome(
+        33.0, 19e3, 3000.0, 1e7, 45.0
+    )
+
+    # the planet can load the emulator from file
+    planet = deepimpact.Planet(emulator=filename)
+    outcome = planet.emulate_outcome(np.array([31.0, 39.0]), 19e3, 3000.0, 1e7, 45.0)
+    assert outcome["burst_energy"].shape == (2,)
+
+
+def test_sparse_design(deepimpact, planet, ranges):
+    emulator = deepimpact.OutcomeEmulator.build(
+        planet, ranges=ranges, design="sparse", nsamples=4, seed=0
+    )
+    assert emulator.design == "sparse"
+    prediction = emulator.predict(*emulator.points.T)
+    assert np.allclose(prediction["burst_altitude"], emulator.values["burst_altitude"])
+
+
+def test_no_emulator(planet):
+    with pytest.raises(ValueError):
+        planet.emulate_outcome(35.0, 19e3, 3000.0, 1e7, 45.0)
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+BASE_PATH = os.sep.join((os.path.dirname(__file__), ".."))
+
+# Modules which should only be imported when first used
+LAZY_MODULES = (
+    "folium",
+    "scipy.spatial",
+    "scipy.interpolate",
+    "distributed",
+    "http.server",
+    "asyncio",
+    "multiprocessing.shared_memory",
+    "deepimpact.parallel",
+    "deepimpact.synthetic",
+    "deepimpact.service",
+    "deepimpact.aio",
+    "deepimpact.calibration",
+    "deepimpact.sensitivity",
+)
+
+# Budget (s) for `import deepimpact` in a fresh interpreter
+IMPORT_BUDGET = float(os.environ.get("DEEPIMPACT_IMPORT_BUDGET", 1.0))
+
+
+def run(code):
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BASE_PATH,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+def test_lazy_imports():
+    loaded = run(
+        "import sys, deepimpact\n"
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    assert loaded.strip() == ""
+
+
+def test_lazy_names():
+    import deepimpact
+
+    # the opt-in submodules' names are still reachable from the package
+    for name in ("AsyncPipeline", "RiskService", "generate_synthetic_data"):
+        assert name in dir(deepimpact)
+    assert deepimpact.DaskTallier is deepimpact.parallel.DaskTallier
+
+
+def test_import_budget():
+    times = [
+        float(
+            run(
+                "import time\n"
+                "start = time.perf_counter()\n"
+                "import deepimpact\n"
+                "print(time.perf_counter() - start)"
+            )
+        )
+        for _ in range(3)
+    ]
+    assert min(times) < IMPORT_BUDGET, f"import took {min(times):.3f} s"
@@ -0,0 +1,227 @@
+import json
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytest import fixture
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+@fixture(scope="module")
+def planet(deepimpact):
+    return deepimpact.Planet()
+
+
+def test_from_data(deepimpact, loc):
+    copy = deepimpact.GeospatialLocator.from_data(loc.postcodes, loc.census)
+
+    X = (52.65, -1.3)
+    assert copy.get_postcodes_by_radius(X, [5e3]) == loc.get_postcodes_by_radius(
+        X, [5e3]
+    )
+    assert copy.get_population_by_radius(X, [5e3]) == loc.get_population_by_radius(
+        X, [5e3]
+    )
+
+
+def test_float32_locator(deepimpact, loc):
+    single = deepimpact.GeospatialLocator.from_data(
+        loc.postcodes, loc.census, dtype=np.float32
+    )
+    assert single.postcode_coords.dtype == np.float32
+    assert single.census_coords.dtype == np.float32
+
+    X = (52.65, -1.3)
+    radii = [300, 2e3, 5e3, 20e3]
+    assert single.get_postcodes_by_radius(X, radii) == loc.get_postcodes_by_radius(
+        X, radii
+    )
+    assert np.allclose(
+        single.get_population_by_radius(X, radii),
+        loc.get_population_by_radius(X, radii),
+        rtol=1e-6,
+    )
+
+    # distances between single precision coordinates are still resolved
+    # to well under a metre
+    points = single.postcode_coords[:10]
+    assert np.allclose(
+        deepimpact.great_circle_distance(points, X),
+        deepimpact.great_circle_distance(points.astype(float), X),
+        rtol=0,
+        atol=1e-6,
+    )
+
+
+def test_merge_tallies():
+    from deepimpact.damage import empty_tally, merge_tallies, finalise_tally
+
+    first = empty_tally()
+    first["nsamples"] = 2
+    first["hits"].update(["A", "B"])
+    first["population"] = [2, 30, 500]
+
+    second = empty_tally()
+    second["nsamples"] = 2
+    second["hits"].update(["B", "C"])
+    second["population"] = [1, 5, 25]
+
+    merged = merge_tallies(first, second)
+    assert list(merged["hits"].items()) == [("A", 1), ("B", 2), ("C", 1)]
+
+    probability, population = finalise_tally(merged)
+    assert list(probability["probability"]) == [0.25, 0.5, 0.25]
+    assert np.isclose(population["mean"], np.mean([10, 20, 5]))
+    assert np.isclose(population["stdev"], np.std([10, 20, 5]))
+
+
+def test_serial_impact_risk(deepimpact, planet, loc):
+    probability, population = deepimpact.impact_risk(planet, nsamples=4, locator=loc)
+
+    assert type(probability) is pd.DataFrame
+    assert len(probability) > 0
+    assert all(0 < p <= 1 for p in probability["probability"])
+    assert type(population["mean"]) is float
+    assert population["mean"] > 0
+
+
+def test_dask_impact_risk(deepimpact, planet, loc, tmp_path, monkeypatch):
+    distributed = pytest.importorskip("distributed")
+
+    serial = deepimpact.impact_risk(planet, nsamples=4, locator=loc)
+    tally_block = deepimpact.parallel.DaskTallier.__call__
+    blocks, scatters = [], []
+
+    def record(self, data):
+        blocks.append(data.shape[0])
+        return tally_block(self, data)
+
+    with distributed.LocalCluster(
+        n_workers=2, threads_per_worker=1, dashboard_address=None
+    ) as cluster, distributed.Client(cluster) as client:
+        probability, population = deepimpact.impact_risk(
+            planet,
+            nsamples=4,
+            locator=loc,
+            backend="dask",
+            client=client,
+            chunksize=1,
+        )
+
+        # checkpointed blocks keep both workers busy, and share the data
+        # scattered to the workers once
+        scatter = client.scatter
+
+        def count_scatter(*args, **kwargs):
+            scatters.append(args)
+            return scatter(*args, **kwargs)
+
+        monkeypatch.setattr(deepimpact.parallel.DaskTallier, "__call__", record)
+        monkeypatch.setattr(client, "scatter", count_scatter)
+        checkpointed = deepimpact.impact_risk(
+            planet,
+            nsamples=4,
+            locator=loc,
+            backend="dask",
+            client=client,
+            chunksize=1,
+            checkpoint=str(tmp_path / "checkpoint.json"),
+            checkpoint_every=1,
+        )
+
+    pd.testing.assert_frame_equal(probability, serial[0])
+    assert population == serial[1]
+    assert blocks == [2, 2]
+    assert len(scatters) == 1
+    pd.testing.assert_frame_equal(checkpointed[0], serial[0])
+    assert checkpointed[1] == serial[1]
+
+
+def test_impact_risk_checkpoint(deepimpact, planet, loc, tmp_path, monkeypatch):
+    expected = deepimpact.impact_risk(planet, locator=loc)
+
+    # interrupt the run after two checkpoints
+    checkpoint = str(tmp_path / "checkpoint.json")
+    tally_impacts = deepimpact.damage.tally_impacts
+    calls = []
+
+    def crash(*args):
+        calls.append(args)
+        if len(calls) > 2:
+            raise KeyboardInterrupt
+        return tally_impacts(*args)
+
+    monkeypatch.setattr(deepimpact.damage, "tally_impacts", crash)
+    with pytest.raises(KeyboardInterrupt):
+        deepimpact.impact_risk(
+            planet, locator=loc, checkpoint=checkpoint, checkpoint_every=3
+        )
+    monkeypatch.undo()
+    assert not list(tmp_path.glob("*.tmp"))
+    with open(checkpoint) as file:
+        assert json.load(file)["cursor"] == 6
+
+    # a checkpoint only resumes the same impacts and pressure
+    with pytest.raises(ValueError):
+        deepimpact.impact_risk(
+            planet, locator=loc, pressure=10e3, checkpoint=checkpoint
+        )
+
+    probability, population = deepimpact.impact_risk(
+        planet, locator=loc, checkpoint=checkpoint, checkpoint_every=3
+    )
+    pd.testing.assert_frame_equal(probability, expected[0])
+    assert population == expected[1]
+    # and is removed once the run completes
+    assert not list(tmp_path.iterdir())
+
+
+def attach(handle):
+    global _worker_locator
+    from deepimpact import GeospatialLocator
+
+    _worker_locator = GeospatialLocator.attach(handle)
+
+
+def query(X):
+    return (
+        _worker_locator.get_postcodes_by_radius(X, [2e3, 5e3]),
+        _worker_locator.get_population_by_radius(X, [400, 800, 5e3]),
+    )
+
+
+def test_shared_locator(deepimpact, loc):
+    handle = loc.share()
+    try:
+        attached = deepimpact.GeospatialLocator.attach(handle)
+        assert not attached.census_coords.flags.writeable
+        assert attached.postcode_names.dtype == loc.postcode_names.dtype
+
+        X = (52.65, -1.3)
+        assert attached.get_postcodes_by_radius(X, [5e3]) == (
+            loc.get_postcodes_by_radius(X, [5e3])
+        )
+        assert attached.get_population_by_radius(X, [400, 5e3]) == (
+            loc.get_population_by_radius(X, [400, 5e3])
+        )
+        pd.testing.assert_frame_equal(attached.census, loc.census)
+        del attached
+
+        with multiprocessing.get_context("spawn").Pool(
+            2, initializer=attach, initargs=(handle,)
+        ) as pool:
+            results = pool.map(query, [(52.65, -1.3), (52.5, -1.0)])
+
+        for X, result in zip([(52.65, -1.3), (52.5, -1.0)], results):
+            assert result[0] == loc.get_postcodes_by_radius(X, [2e3, 5e3])
+            assert result[1] == loc.get_population_by_radius(X, [400, 800, 5e3])
+    finally:
+        loc.close_shared()
@@ -0,0 +1,77 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from pytest import fixture
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+@fixture(scope="module")
+def planet(deepimpact):
+    return deepimpact.Planet()
+
+
+@fixture(scope="module")
+def loc(deepimpact):
+    lat, lon = np.meshgrid(
+        np.linspace(52.3, 53.0, 20), np.linspace(-1.8, -0.8, 20), indexing="ij"
+    )
+    coords = np.stack([lat.ravel(), lon.ravel()], axis=1)
+    return deepimpact.GeospatialLocator.from_arrays(
+        postcode_names=np.array([f"P{i}" for i in range(len(coords))]),
+        postcode_coords=coords,
+        census_coords=coords,
+        census_population=np.full(len(coords), 100.0),
+    )
+
+
+def test_disabled_by_default(deepimpact):
+    profiler = deepimpact.get_profiler()
+    assert not profiler.enabled
+    with profiler.stage("solve"):
+        pass
+
+
+def test_profile_impact_risk(deepimpact, planet, loc, tmp_path):
+    from deepimpact.damage import tally_impacts
+
+    impact_file = os.sep.join(
+        (os.path.dirname(__file__), "..", "resources", "impact_parameter_list.csv")
+    )
+    data = pd.read_csv(impact_file).iloc[:2]
+
+    with deepimpact.profile() as profiler:
+        assert deepimpact.get_profiler() is profiler
+        tally_impacts(planet, loc, data, 30e3)
+
+    assert not deepimpact.get_profiler().enabled
+
+    report = profiler.report()
+    for stage in (
+        "solve",
+        "energy",
+        "outcome",
+        "postcode_query",
+        "population_query",
+    ):
+        assert report.stages[stage]["calls"] == 2
+        assert report.stages[stage]["total"] >= 0
+    # the damage zones of all the impacts are found at once
+    assert report.stages["damage_radii"]["calls"] == 1
+    assert report.counters["solver_steps"] > 0
+    assert report.wall_time >= report.stages["solve"]["total"]
+
+    filename = tmp_path / "timings.json"
+    report.to_json(str(filename))
+    with open(filename) as file:
+        assert json.load(file)["stages"]["solve"]["calls"] == 2
+
+    assert "postcode_query" in str(report)
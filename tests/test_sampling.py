@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pytest import fixture
+
+IMPACT_FILE = os.sep.join(
+    (os.path.dirname(__file__), "..", "resources", "impact_parameter_list.csv")
+)
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+@fixture(scope="module")
+def planet(deepimpact):
+    return deepimpact.Planet()
+
+
+@pytest.mark.parametrize("method", ["random", "lhs", "sobol"])
+def test_sample_impacts(deepimpact, method):
+    distributions = {
+        "radius": ("uniform", 10.0, 50.0),
+        "strength": ("loguniform", 1e5, 1e7),
+        "density": 3000.0,
+    }
+    samples = deepimpact.sample_impacts(64, distributions, method=method, seed=0)
+
+    assert list(samples) == list(pd.read_csv(IMPACT_FILE))
+    assert all(value.shape == (64,) for value in samples.values())
+    assert np.all((10 <= samples["radius"]) & (samples["radius"] <= 50))
+    assert np.all((1e5 <= samples["strength"]) & (samples["strength"] <= 1e7))
+    assert np.all(samples["density"] == 3000.0)
+    assert np.all(np.isfinite(samples["velocity"]))
+
+    again = deepimpact.sample_impacts(64, distributions, method=method, seed=0)
+    assert all(np.array_equal(samples[key], again[key]) for key in samples)
+
+    if method == "lhs":
+        # one sample in each of the 64 equal-probability strata
+        strata = np.floor((samples["radius"] - 10) / 40 * 64)
+        assert sorted(strata) == list(range(64))
+
+    with pytest.raises(ValueError):
+        deepimpact.sample_impacts(4, {"mass": 1.0})
+
+
+def test_impact_risk_in_memory(deepimpact, planet, loc, tmp_path):
+    distributions = {
+        "radius": ("uniform", 20.0, 40.0),
+        "entry latitude": 52.65,
+        "entry longitude": -2.8,
+        "bearing": 90.0,
+    }
+    impacts = deepimpact.sample_impacts(6, distributions, seed=1)
+    probability, population = deepimpact.impact_risk(planet, impacts, locator=loc)
+    assert len(probability) > 0
+    assert population["mean"] > 0
+
+    # the same as reading the table from a file
+    impact_file = str(tmp_path / "impacts.csv")
+    pd.DataFrame(impacts).to_csv(impact_file, index=False)
+    from_file = deepimpact.impact_risk(planet, impact_file, locator=loc)
+    pd.testing.assert_frame_equal(probability, from_file[0])
+    assert population == from_file[1]
+
+    # and independent of the number of workers
+    distributed = pytest.importorskip("distributed")
+    with distributed.LocalCluster(
+        n_workers=2, threads_per_worker=1, dashboard_address=None
+    ) as cluster, distributed.Client(cluster) as client:
+        parallel = deepimpact.impact_risk(
+            planet, impacts, locator=loc, backend="dask", client=client, chunksize=2
+        )
+    pd.testing.assert_frame_equal(probability, parallel[0])
+    assert population == parallel[1]
@@ -0,0 +1,97 @@
+import numpy as np
+
+from pytest import fixture
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+def test_sobol_indices(deepimpact):
+    # Ishigami function on [-pi, pi]^3, with known indices
+    a, b = 7.0, 0.1
+    ranges = {
+        "radius": (1.0, 1.0),
+        "strength": (1.0, 1.0),
+        "velocity": (-np.pi, np.pi),
+        "density": (-np.pi, np.pi),
+        "angle": (-np.pi, np.pi),
+    }
+    points, varying = deepimpact.sobol_design(4096, ranges, seed=0)
+    assert varying == ["velocity", "density", "angle"]
+    assert points.shape == (4096 * 5, 5)
+    assert np.all(points[:, 0] == 1.0)
+
+    x1, x2, x3 = points[:, 1], points[:, 2], points[:, 4]
+    values = np.sin(x1) + a * np.sin(x2) ** 2 + b * x3**4 * np.sin(x1)
+    indices = deepimpact.sobol_indices(values, 3, nbootstrap=200, seed=0)
+
+    variance = a**2 / 8 + b * np.pi**4 / 5 + b**2 * np.pi**8 / 18 + 0.5
+    V1 = 0.5 * (1 + b * np.pi**4 / 5) ** 2
+    V2 = a**2 / 8
+    VT3 = 8 * b**2 * np.pi**8 / 225
+    S1 = np.array([V1, V2, 0.0]) / variance
+    ST = np.array([V1 + VT3, V2, VT3]) / variance
+
+    assert np.allclose(indices["S1"], S1, atol=0.03)
+    assert np.allclose(indices["ST"], ST, atol=0.03)
+    assert np.all(indices["S1_low"] <= indices["S1"])
+    assert np.all(indices["S1"] <= indices["S1_high"])
+    assert np.all(indices["ST_low"] <= indices["ST"])
+    assert np.all(indices["ST"] <= indices["ST_high"])
+
+
+def test_sensitivity_analysis(deepimpact, loc):
+    planet = deepimpact.Planet()
+    ranges = {"velocity": 19e3, "density": 3000.0, "angle": 45.0}
+    indices = deepimpact.sensitivity_analysis(
+        planet,
+        nsamples=16,
+        ranges=ranges,
+        locator=loc,
+        lat=52.65,
+        lon=-2.8,
+        bearing=90.0,
+        nbootstrap=20,
+        seed=0,
+        max_step=0.05,
+    )
+
+    assert set(indices) == {
+        "burst_altitude",
+        "burst_energy",
+        "burst_distance",
+        "population",
+    }
+    for table in indices.values():
+        assert list(table.index) == ["radius", "strength"]
+        assert list(table.columns) == [
+            "S1",
+            "S1_low",
+            "S1_high",
+            "ST",
+            "ST_low",
+            "ST_high",
+        ]
+    # the burst energy and damaged population are dominated by the radius
+    for key in ("burst_energy", "population"):
+        assert indices[key].loc["radius", "ST"] > 0.5
+        assert indices[key].loc["strength", "ST"] < 0.1
+
+    again = deepimpact.sensitivity_analysis(
+        planet,
+        nsamples=16,
+        ranges=ranges,
+        locator=loc,
+        lat=52.65,
+        lon=-2.8,
+        bearing=90.0,
+        nbootstrap=20,
+        seed=0,
+        max_step=0.05,
+    )
+    for key, table in indices.items():
+        assert again[key].equals(table)
@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from pytest import fixture
+
+IMPACT_FILE = os.sep.join(
+    (os.path.dirname(__file__), "..", "resources", "impact_parameter_list.csv")
+)
+SCENARIO = {
+    "radius": 35.0,
+    "velocity": 19e3,
+    "density": 3000.0,
+    "strength": 1e7,
+    "angle": 45.0,
+}
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+@fixture(scope="module")
+def service(deepimpact, synthetic_geodata):
+    postcode_file, census_file = synthetic_geodata
+    service = deepimpact.RiskService(
+        postcode_file=postcode_file, census_file=census_file
+    )
+    service.warm_up()
+    return service
+
+
+@fixture(scope="module")
+def url(service):
+    server = service.make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, endpoint, body):
+    request = urllib.request.Request(
+        f"{url}/{endpoint}",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def test_solve(deepimpact, service, url):
+    planet = deepimpact.Planet()
+    expected = planet.analyse_outcome(
+        planet.calculate_energy(planet.solve_atmospheric_entry(**SCENARIO))
+    )
+
+    response = post(url, "solve", SCENARIO)
+    assert response["outcome"]["outcome"] == expected["outcome"]
+    assert response["outcome"]["burst_altitude"] == pytest.approx(
+        expected["burst_altitude"]
+    )
+
+    hits = service.stats["cache_hits"]
+    response = post(url, "solve", dict(SCENARIO, trajectory=True))
+    assert service.stats["cache_hits"] == hits + 1
+    assert response["trajectory"]["altitude"][0] == 100e3
+    assert "dedz" not in response["trajectory"]
+
+    # an uncached scenario is solved once for the trajectory and outcome
+    calls = []
+    solve = service.planet.solve_atmospheric_entry
+
+    def count_solve(*args, **kwargs):
+        calls.append(args)
+        return solve(*args, **kwargs)
+
+    service.planet.solve_atmospheric_entry = count_solve
+    try:
+        response = post(url, "solve", dict(SCENARIO, radius=30.0, trajectory=True))
+    finally:
+        del service.planet.solve_atmospheric_entry
+    assert len(calls) == 1
+    assert response["outcome"]["burst_altitude"] > 0
+
+
+def test_queries(service, url):
+    X = {"lat": 52.65, "lon": -1.3}
+    response = post(url, "postcodes", dict(X, radii=[2e3, 5e3]))
+    assert response["postcodes"] == service.locator.get_postcodes_by_radius(
+        (52.65, -1.3), [2e3, 5e3]
+    )
+    response = post(url, "population", dict(X, radii=[500, 5e3]))
+    assert response["population"] == service.locator.get_population_by_radius(
+        (52.65, -1.3), [500, 5e3]
+    )
+
+    response = post(url, "damage", dict(SCENARIO, bearing=135, **X))
+    assert len(response["damage_radii"]) == 4
+
+    # one radius per pressure, null where it isn't reached
+    request = dict(SCENARIO, bearing=135, pressures=[1e3, 1e9], dt=0.1, **X)
+    response = post(url, "damage", request)
+    assert response["damage_radii"][0] > 0
+    assert response["damage_radii"][1] is None
+
+
+def test_risk(deepimpact, service, url):
+    impacts = pd.read_csv(IMPACT_FILE).iloc[:2]
+    response = post(url, "risk", {"impacts": impacts.to_dict(orient="records")})
+
+    probability, population = deepimpact.impact_risk(
+        service.planet, impact_file=IMPACT_FILE, nsamples=2, locator=service.locator
+    )
+    assert response["probability"] == dict(
+        zip(probability["Postcode"], probability["probability"])
+    )
+    assert response["population"] == population
+
+
+def test_errors(url):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(url, "solve", {"radius": 10})
+    assert error.value.code == 400
+    assert "velocity" in json.load(error.value)["error"]
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(url, "unknown", {})
+    assert error.value.code == 404
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        post(url, "risk", {"impact_file": "missing.csv"})
+    assert error.value.code == 400
+    assert "missing.csv" in json.load(error.value)["error"]
+
+    with urllib.request.urlopen(f"{url}/health") as response:
+        assert json.load(response)["status"] == "ok"
+
+
+def test_coalesce(service):
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return len(calls)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.coalesce("key", slow)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [1, 1, 1, 1]
@@ -277,3 +277,131 @@ def test_outcome_empty_dataframe(planet):
     result = pd.DataFrame()
     outcome = planet.analyse_outcome(result)
     assert outcome["outcome"] == "Unknown"
+
+
+@fixture(scope="module")
+def dense(planet):
+    return planet.solve_atmospheric_entry(
+        35.0, 19e3, 3000.0, 1e7, 45.0, dense_output=True
+    )
+
+
+def test_dense_output(deepimpact, planet, dense):
+    result, trajectory = dense
+    assert isinstance(trajectory, deepimpact.DenseTrajectory)
+    assert result.equals(planet.solve_atmospheric_entry(35.0, 19e3, 3000.0, 1e7, 45.0))
+
+    # the dense output reproduces a solve at a finer output interval
+    fine = planet.solve_atmospheric_entry(35.0, 19e3, 3000.0, 1e7, 45.0, dt=0.05)
+    resampled = trajectory.sample(fine["time"])
+    assert list(resampled.columns) == list(fine.columns)
+    assert np.allclose(resampled, fine, rtol=1e-10)
+
+    resampled = trajectory.resample(0.05, 2.0, 4.0)
+    assert np.allclose(resampled["time"], np.arange(2.0, 4.01, 0.05))
+
+
+def test_dense_altitudes(planet, dense):
+    trajectory = dense[1]
+    altitudes = np.array([80e3, 40e3, 20e3, 10e3, 200e3])
+    resampled = trajectory.at_altitudes(altitudes)
+    assert np.allclose(resampled["altitude"][:4], altitudes[:4])
+    assert resampled.iloc[4].isna().all()
+    assert (np.diff(resampled["time"][:4]) > 0).all()
+    fine = planet.solve_atmospheric_entry(35.0, 19e3, 3000.0, 1e7, 45.0, dt=0.01)
+    assert np.allclose(
+        resampled["velocity"][:4],
+        np.interp(-altitudes[:4], -fine["altitude"], fine["velocity"]),
+        rtol=1e-4,
+    )
+
+
+def test_events(planet):
+    scenario = (35.0, 19e3, 3000.0, 1e7, 45.0)
+    result = planet.solve_atmospheric_entry(*scenario, events=True)
+    coarse = planet.solve_atmospheric_entry(*scenario, max_step=0.05, events=True)
+
+    for solution in (result, coarse):
+        events = solution.attrs["events"]
+        assert set(events) == {"fragmentation", "peak_dedz", "ground"}
+
+        # the outputs land on the output interval, and the last on the ground
+        times = solution["time"][:-1]
+        assert np.allclose(times, np.round(times / 0.25) * 0.25, atol=1e-9)
+        assert solution["altitude"].iloc[-1] == pytest.approx(0.0, abs=1e-6)
+        assert events["ground"]["time"] == solution["time"].iloc[-1]
+
+        fragmentation = events["fragmentation"]
+        assert planet.rhoa(fragmentation["altitude"]) * fragmentation[
+            "velocity"
+        ] ** 2 == pytest.approx(1e7)
+        # the radius only grows after the onset
+        assert fragmentation["radius"] == scenario[0]
+
+    # the events barely move with a five times larger step
+    for name in ("fragmentation", "peak_dedz"):
+        for key in ("time", "altitude", "velocity"):
+            assert result.attrs["events"][name][key] == pytest.approx(
+                coarse.attrs["events"][name][key], rel=1e-3
+            )
+    assert result.attrs["events"]["peak_dedz"]["dedz"] == pytest.approx(
+        coarse.attrs["events"]["peak_dedz"]["dedz"], rel=2e-3
+    )
+
+
+@pytest.mark.parametrize(
+    "scenario",
+    [
+        (35.0, 19e3, 3000.0, 1e7, 45.0),
+        (10.0, 20e3, 3000.0, 1e5, 30.0),
+        (5.0, 11e3, 3000.0, 1e6, 60.0),
+    ],
+)
+def test_events_fragmentation_ends(planet, scenario):
+    default = planet.solve_atmospheric_entry(*scenario)
+    located = planet.solve_atmospheric_entry(*scenario, events=True)
+
+    # the radius stops growing once the ram pressure falls below the
+    # strength again, as without events
+    n = min(len(default), len(located)) - 1
+    burst = default["radius"].iloc[:n] > scenario[0]
+    for key in ("velocity", "mass", "radius"):
+        assert np.allclose(
+            located[key].iloc[:n][burst], default[key].iloc[:n][burst], rtol=5e-3
+        )
+    assert located["radius"].iloc[-1] == pytest.approx(
+        default["radius"].iloc[-1], rel=1e-3
+    )
+
+
+def test_analytic_dedz(planet):
+    scenario = (35.0, 19e3, 3000.0, 1e7, 45.0)
+    result = planet.solve_atmospheric_entry(*scenario, dedz=True)
+    assert "dedz" in result.columns
+    assert result.drop(columns="dedz").equals(planet.solve_atmospheric_entry(*scenario))
+
+    # finite differences at a fine output interval converge to it (at the
+    # midpoints of the intervals)
+    fine = planet.calculate_energy(planet.solve_atmospheric_entry(*scenario, dt=0.01))
+    analytic = planet.solve_atmospheric_entry(*scenario, dt=0.01, dedz=True)["dedz"]
+    midpoints = 0.5 * (analytic[1:].to_numpy() + analytic[:-1].to_numpy())
+    assert np.allclose(fine["dedz"][1:], midpoints, atol=1e-3 * analytic.max())
+
+    outcome = planet.analyse_outcome(result)
+    assert outcome["outcome"] == "Airburst"
+    assert outcome["burst_peak_dedz"] == result["dedz"].max()
+
+
+def test_iter_atmospheric_entry(deepimpact, planet):
+    scenario = (35.0, 19e3, 3000.0, 1e7, 45.0)
+    result = planet.solve_atmospheric_entry(*scenario, dedz=True)
+
+    states = planet.iter_atmospheric_entry(*scenario)
+    first = next(states)
+    assert isinstance(first, deepimpact.EntryState)
+    assert first.altitude == 100e3 and first.angle == 45.0
+    assert np.array_equal(np.array([first] + list(states)), result.to_numpy())
+
+    blocks = list(planet.iter_atmospheric_entry(*scenario, chunksize=64))
+    assert [len(block) for block in blocks[:-1]] == [64] * (len(blocks) - 1)
+    assert np.array_equal(np.concatenate(blocks), result.to_numpy())
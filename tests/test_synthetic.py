@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from pytest import fixture
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+@fixture(scope="module")
+def files(deepimpact, tmp_path_factory):
+    return deepimpact.generate_synthetic_data(
+        str(tmp_path_factory.mktemp("synthetic")), scale=0.01, seed=1
+    )
+
+
+def test_synthetic_census(deepimpact):
+    lat, lon, population = deepimpact.synthetic_census(scale=0.01, seed=0)
+
+    assert lat.shape == lon.shape == population.shape
+    assert np.all(np.diff(lat[:, 0]) < 0)
+    assert np.all(np.diff(lon[0]) > 0)
+    assert np.isclose(population[population >= 0].sum(), 0.01 * 63e6, rtol=1e-3)
+    assert np.any(population == -9999)
+
+    again = deepimpact.synthetic_census(scale=0.01, seed=0)
+    assert np.array_equal(population, again[2])
+
+    # grids are widened in longitude rather than reaching the poles
+    lat, lon, population = deepimpact.synthetic_census(centre=(76.0, 0.0), ncities=1)
+    assert lat.max() < 80
+    assert np.isclose(lat.size, 1220 * 700, rtol=1e-2)
+
+
+def test_synthetic_postcodes(deepimpact):
+    lat, lon, population = deepimpact.synthetic_census(scale=0.01, seed=0)
+    postcodes = deepimpact.synthetic_postcodes(lat, lon, population, seed=0)
+
+    assert list(postcodes.columns) == ["Postcode", "Latitude", "Longitude"]
+    assert postcodes["Postcode"].is_unique
+    assert np.isclose(len(postcodes), 0.027 * population[population > 0].sum(), 1e-3)
+    assert postcodes["Latitude"].between(lat.min() - 0.01, lat.max() + 0.01).all()
+
+    postcodes = deepimpact.synthetic_postcodes(
+        lat, lon, population, npostcodes=10, seed=0
+    )
+    assert len(postcodes) == 10
+    assert postcodes["Postcode"][1] == "AA0 0AB"
+
+
+def test_load_synthetic_data(deepimpact, files):
+    loc = deepimpact.GeospatialLocator(*files)
+    postcodes = pd.read_csv(files[0])
+
+    assert loc.census.shape[1] == 3
+    assert len(loc.postcode_names) == len(postcodes)
+
+    X = tuple(postcodes[["Latitude", "Longitude"]].iloc[0])
+    assert postcodes["Postcode"][0] in loc.get_postcodes_by_radius(X, [1e3])[0]
+    population = loc.get_population_by_radius(X, [1e3, 50e3])
+    assert 0 < population[0] <= population[1]
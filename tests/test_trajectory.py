@@ -0,0 +1,126 @@
+import os
+
+import numpy as np
+import pandas as pd
+from pytest import fixture, raises
+
+
+@fixture(scope="module")
+def deepimpact():
+    import deepimpact
+
+    return deepimpact
+
+
+@fixture(scope="module")
+def planet(deepimpact):
+    return deepimpact.Planet()
+
+
+@fixture(scope="module")
+def parameters():
+    return {
+        "radius": np.array([5.0, 20.0, 30.0]),
+        "velocity": 19e3,
+        "density": 3000.0,
+        "strength": np.array([1e5, 1e7, 1e5]),
+        "angle": 45.0,
+    }
+
+
+@fixture(scope="module")
+def ensemble(planet, parameters):
+    return planet.solve_ensemble(**parameters, dt=0.5)
+
+
+@fixture(scope="module")
+def frames(planet, parameters):
+    scenarios = np.broadcast_arrays(*parameters.values())
+    return [
+        planet.solve_atmospheric_entry(*scenario, dt=0.5)
+        for scenario in zip(*scenarios)
+    ]
+
+
+def test_solve_ensemble(deepimpact, ensemble, frames):
+    assert isinstance(ensemble, deepimpact.TrajectoryEnsemble)
+    assert len(ensemble) == 3
+    assert list(ensemble.lengths) == [len(frame) for frame in frames]
+    assert list(ensemble.parameters["strength"]) == [1e5, 1e7, 1e5]
+
+    for i, frame in enumerate(frames):
+        pd.testing.assert_frame_equal(ensemble.frame(i), frame)
+
+    # members are views of the flat columns
+    member = ensemble[1]
+    assert np.shares_memory(member["altitude"], ensemble.columns["altitude"])
+    with raises(IndexError):
+        ensemble.member(3)
+
+
+def test_ensemble_outcomes(deepimpact, planet, ensemble, frames):
+    ensemble.calculate_energy()
+    for i, frame in enumerate(frames):
+        frame = planet.calculate_energy(frame.copy())
+        assert np.array_equal(ensemble[i]["dedz"], frame["dedz"])
+
+    outcomes = ensemble.analyse_outcome()
+    expected = pd.DataFrame(
+        [planet.analyse_outcome(planet.calculate_energy(frame)) for frame in frames]
+    )
+    pd.testing.assert_frame_equal(outcomes, expected, check_dtype=False)
+
+
+def test_ensemble_cratering(deepimpact, planet):
+    # a made up trajectory whose energy deposition peaks on the ground
+    crater = pd.DataFrame(
+        {
+            "time": [0.0, 1.0, 2.0, 3.0],
+            "velocity": [20e3, 19e3, 17e3, 14e3],
+            "mass": [1e6, 1e6, 1e6, 1e6],
+            "altitude": [3e3, 2e3, 1e3, 0.0],
+            "distance": [0.0, 1e3, 2e3, 3e3],
+        }
+    )
+    ensemble = deepimpact.TrajectoryEnsemble.from_frames([crater, crater.iloc[:0]])
+    outcomes = ensemble.calculate_energy().analyse_outcome()
+    expected = planet.analyse_outcome(planet.calculate_energy(crater.copy()))
+    assert outcomes["outcome"].tolist() == ["Cratering", "Unknown"]
+    for key in ("burst_peak_dedz", "burst_altitude", "burst_distance", "burst_energy"):
+        assert np.isclose(outcomes[key][0], expected[key])
+        assert outcomes[key][1] == 0.0
+
+
+def test_ensemble_save_load(deepimpact, ensemble, tmp_path):
+    filename = str(tmp_path / "ensemble.npz")
+    ensemble.save(filename)
+    loaded = deepimpact.TrajectoryEnsemble.load(filename)
+    assert np.array_equal(loaded.offsets, ensemble.offsets)
+    assert loaded.columns.keys() == ensemble.columns.keys()
+    for key, value in ensemble.columns.items():
+        assert np.array_equal(loaded.columns[key], value)
+    for key, value in ensemble.parameters.items():
+        assert np.array_equal(loaded.parameters[key], value)
+
+
+def test_ensemble_float32(planet):
+    # the scenario of tests/scenario.npz, stored in single precision
+    scenario = np.load(os.sep.join((os.path.dirname(__file__), "scenario.npz")))
+    inputs = dict(radius=35.0, velocity=19e3, density=3000.0, strength=1e7, angle=45.0)
+    double = planet.solve_ensemble(**inputs, dedz=True)
+    single = planet.solve_ensemble(**inputs, dedz=True, dtype=np.float32)
+
+    assert single.columns["distance"].dtype == np.float64
+    for key in scenario.files:
+        if key != "distance":
+            assert single.columns[key].dtype == np.float32
+        assert np.allclose(single.columns[key], double.columns[key], rtol=1e-7, atol=0)
+        n = scenario[key].size
+        assert np.allclose(single.columns[key][:n], scenario[key], rtol=2e-3)
+
+    outcomes = single.calculate_energy().analyse_outcome()
+    expected = double.calculate_energy().analyse_outcome()
+    assert single.columns["dedz"].dtype == np.float32
+    assert (outcomes["outcome"] == expected["outcome"]).all()
+    for key in ("burst_peak_dedz", "burst_altitude", "burst_distance", "burst_energy"):
+        assert np.allclose(outcomes[key], expected[key], rtol=1e-6, atol=0)
@@ -1,14 +1,170 @@
+import logging
+import traceback
+
+import numpy as np
+import pandas as pd
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
 from PyQt5.QtWidgets import (
     QApplication,
     QMainWindow,
     QTableWidgetItem,
     QCheckBox,
+    QProgressBar,
+    QPushButton,
 )
 from PyQt5.QtWebEngineWidgets import QWebEngineView
 from deepimpack_UI import Ui_MainWindow
 import deepimpact
 import folium
 
+# Damage pressures (Pa) of the rows of the damage table
+PRESSURES = [1e3, 4e3, 30e3, 50e3]
+
+# Longest time (ms) closing the window waits for computations to stop
+CLOSE_TIMEOUT = 2000
+
+logger = logging.getLogger(__name__)
+
+
+class Cancelled(Exception):
+    """Raised inside a worker's computation when it has been cancelled."""
+
+
+class WorkerSignals(QObject):
+    """
+    Signals of a Worker, delivered to the GUI thread. Each passes the
+    worker first, so that the window can tell current computations from
+    superseded ones.
+
+    progress: percentage complete and a description of the current stage
+    result: the return value of the computation
+    error: the traceback of an exception raised by the computation
+    finished: emitted last, whether the computation succeeded, failed or
+    was cancelled
+    """
+
+    progress = pyqtSignal(object, int, str)
+    result = pyqtSignal(object, object)
+    error = pyqtSignal(object, str)
+    finished = pyqtSignal(object)
+
+
+class Worker(QRunnable):
+    """
+    Runs a computation on a QThreadPool thread.
+
+    The computation is called as ``fn(report, *args)``, and should call
+    ``report(percent, message)`` between its stages: this emits the progress
+    signal, and raises Cancelled once `cancel` has been called, so a
+    cancelled computation stops at its next report and emits no result.
+    """
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = WorkerSignals()
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def report(self, percent, message):
+        if self.cancelled:
+            raise Cancelled()
+        self.signals.progress.emit(self, int(percent), message)
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            result = self.fn(self.report, *self.args)
+        except Cancelled:
+            pass
+        except Exception:
+            self.signals.error.emit(self, traceback.format_exc())
+        else:
+            if not self.cancelled:
+                self.signals.result.emit(self, result)
+        finally:
+            self.signals.finished.emit(self)
+
+
+def load_locator(report):
+    """
+    Load the postcode and census data (run once, in the background, at
+    startup).
+    """
+    report(0, "Loading postcode and census data")
+    return deepimpact.GeospatialLocator()
+
+
+def compute_damage(report, planet, locator, inputs, init_altitude=100e3):
+    """
+    Solve the scenario, analyse its outcome and find its damage zones (and,
+    if the locator has been loaded, the population inside them).
+    """
+    radius, angle, strength, density, velocity, lat, lon, bearing = inputs
+
+    # solve in blocks, reporting the altitude reached after each one
+    report(0, "Solving atmospheric entry")
+    blocks = []
+    for block in planet.iter_atmospheric_entry(
+        radius, velocity, density, strength, angle, init_altitude, chunksize=4
+    ):
+        blocks.append(block)
+        descended = 1 - max(block[-1, 4], 0.0) / init_altitude
+        report(70 * descended, "Solving atmospheric entry")
+    result = pd.DataFrame(np.concatenate(blocks), columns=deepimpact.EntryState._fields)
+    result = result.drop(columns="dedz")
+
+    report(70, "Analysing outcome")
+    result = planet.calculate_energy(result)
+    outcome = planet.analyse_outcome(result)
+
+    # Calculate the blast location and damage radius for several pressure levels
+    report(80, "Calculating damage zones")
+    blast_lat, blast_lon, damage_rad = deepimpact.damage_zones(
+        outcome, lat=lat, lon=lon, bearing=bearing, pressures=PRESSURES
+    )
+
+    population = None
+    if locator is not None and len(damage_rad):
+        report(90, "Finding population")
+        population = locator.get_population_by_radius(
+            (blast_lat, blast_lon), damage_rad
+        )
+
+    report(100, "Done")
+    return {
+        "outcome": outcome,
+        "blast_lat": blast_lat,
+        "blast_lon": blast_lon,
+        "damage_rad": damage_rad,
+        "population": population,
+    }
+
+
+def build_map(report, blast_lat, blast_lon, damage_rad, plot, colours):
+    """
+    Build the folium map of the damage zones and return it as HTML.
+    """
+    report(0, "Building map")
+    map = folium.Map(location=[blast_lat, blast_lon], control_scale=True, zoom_start=7)
+    for ii in range(len(damage_rad)):
+        if plot[ii]:
+            folium.Circle(
+                [blast_lat, blast_lon],
+                damage_rad[ii],
+                color=colours[ii],
+                fill=True,
+                fillOpacity=0.1,
+            ).add_to(map)
+
+    report(50, "Rendering map")
+    html_content = map.get_root().render()
+    report(100, "Done")
+    return html_content
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -59,8 +215,6 @@ class MainWindow(QMainWindow):
             self.ui.widget.height(),
         )
         # layout.addWidget(self.ui.browser)
-        print(self.ui.browser.size())
-        print(self.ui.browser.size())
         # color list
         self.circle_list = ["green", "cornflowerblue", "pink", "red"]
 
@@ -71,67 +225,141 @@ class MainWindow(QMainWindow):
         self.ui.checkbox3.stateChanged.connect(self.checkbox3)
         self.ui.checkbox4.stateChanged.connect(self.checkbox4)
 
+        # progress bar and cancel button in the status bar
+        self.progress = QProgressBar()
+        self.progress.setRange(0, 100)
+        self.progress.setMaximumWidth(200)
+        self.progress.hide()
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.hide()
+        self.cancel_button.clicked.connect(self.cancel)
+        self.statusBar().addPermanentWidget(self.progress)
+        self.statusBar().addPermanentWidget(self.cancel_button)
+
+        # the computations run on a thread pool, so the window stays
+        # responsive; at most one damage and one map computation are current
+        self.pool = QThreadPool.globalInstance()
+        self.workers = {"damage": None, "map": None}
+        self.damage = None
+
+        # the planet is created once and reused for every scenario, and the
+        # postcode and census data are loaded once, in the background
+        self.planet = deepimpact.Planet()
+        self.locator = None
+        self.locator_worker = Worker(load_locator)
+        self.locator_worker.signals.result.connect(self.locator_loaded)
+        self.locator_worker.signals.error.connect(self.locator_failed)
+        self.pool.start(self.locator_worker)
+
         # button
 
         self.ui.generate_buttom.clicked.connect(self.button_generation)
         self.ui.plot_button.clicked.connect(self.plot_html)
 
-    def button_generation(self):
-        self.input = []
-        # read data
-        self.input = [
-            float(self.ui.radius.text()),
-            float(self.ui.angle.text()),
-            float(self.ui.strength.text()),
-            float(self.ui.density.text()),
-            float(self.ui.velocity.text()),
-            float(self.ui.latitude.text()),
-            float(self.ui.longitude.text()),
-            float(self.ui.bearing.text()),
-        ]
+    def start(self, kind, worker, on_result):
+        """
+        Run a worker on the pool, cancelling the current worker of the same
+        kind first.
+        """
+        if self.workers[kind] is not None:
+            self.workers[kind].cancel()
+        self.workers[kind] = worker
+        worker.on_result = on_result
+        worker.signals.progress.connect(self.show_progress)
+        worker.signals.result.connect(self.worker_result)
+        worker.signals.error.connect(self.worker_error)
+        worker.signals.finished.connect(self.worker_finished)
+        self.progress.setValue(0)
+        self.progress.show()
+        self.cancel_button.show()
+        self.pool.start(worker)
+
+    def is_current(self, worker):
+        return worker in self.workers.values() and not worker.cancelled
+
+    def show_progress(self, worker, percent, message):
+        if self.is_current(worker):
+            self.progress.setValue(percent)
+            self.statusBar().showMessage(message)
 
-        # Generate result using deepimpact solver
+    def worker_result(self, worker, result):
+        # ignore the results of computations superseded meanwhile
+        if self.is_current(worker):
+            worker.on_result(result)
 
-        earth = deepimpact.Planet()
-        result = earth.solve_atmospheric_entry(
-            radius=self.input[0],
-            angle=self.input[1],
-            strength=self.input[2],
-            density=self.input[3],
-            velocity=self.input[4],
+    def worker_error(self, worker, message):
+        logger.error("Computation failed\n%s", message)
+        self.statusBar().showMessage(message.strip().splitlines()[-1])
+
+    def worker_finished(self, worker):
+        for kind, current in self.workers.items():
+            if current is worker:
+                self.workers[kind] = None
+        if all(current is None for current in self.workers.values()):
+            self.progress.hide()
+            self.cancel_button.hide()
+
+    def cancel(self):
+        for worker in self.workers.values():
+            if worker is not None:
+                worker.cancel()
+        self.statusBar().showMessage("Cancelled")
+
+    def locator_loaded(self, worker, locator):
+        self.locator = locator
+        self.statusBar().showMessage("Postcode and census data loaded")
+
+    def locator_failed(self, worker, message):
+        logger.error("Postcode and census data not loaded\n%s", message)
+        self.statusBar().showMessage(
+            "Postcode and census data not loaded: population is not shown"
         )
-        result = earth.calculate_energy(result)
-        outcome = earth.analyse_outcome(result)
-
-        # Calculate the blast location and damage radius for several pressure levels
-
-        pressures = [1e3, 4e3, 30e3, 50e3]
-        a = deepimpact.damage_zones(
-            outcome,
-            lat=self.input[5],
-            lon=self.input[6],
-            bearing=self.input[7],
-            pressures=pressures,
+
+    def button_generation(self):
+        # read data
+        try:
+            inputs = [
+                float(self.ui.radius.text()),
+                float(self.ui.angle.text()),
+                float(self.ui.strength.text()),
+                float(self.ui.density.text()),
+                float(self.ui.velocity.text()),
+                float(self.ui.latitude.text()),
+                float(self.ui.longitude.text()),
+                float(self.ui.bearing.text()),
+            ]
+        except ValueError:
+            self.statusBar().showMessage("The inputs must be numbers")
+            return
+
+        # Generate result using deepimpact solver, in the background
+        self.start(
+            "damage",
+            Worker(compute_damage, self.planet, self.locator, inputs),
+            self.show_damage,
         )
-        self.blast_lat = a[0]
-        self.blast_lon = a[1]
-        self.damage_rad = a[2]
+
+    def show_damage(self, damage):
+        self.damage = damage
+        self.blast_lat = damage["blast_lat"]
+        self.blast_lon = damage["blast_lon"]
+        self.damage_rad = damage["damage_rad"]
 
         self.damage_rad_num = len(self.damage_rad)
 
         # Display type + zero pint + radius
 
         # zero point
-        print(self.damage_rad)
         self.ui.type.clear()
         self.ui.zero_point1.clear()
         self.ui.zero_point2.clear()
-        self.ui.type.append(outcome["outcome"])
+        self.ui.type.append(damage["outcome"]["outcome"])
         self.ui.zero_point1.append(str(self.blast_lat))
         self.ui.zero_point2.append(str(self.blast_lon))
         # radius
-        for ii in range(self.damage_rad_num):
-            self.ui.table.setItem(ii, 1, QTableWidgetItem(str(self.damage_rad[ii])))
+        for ii in range(4):
+            text = str(self.damage_rad[ii]) if ii < self.damage_rad_num else ""
+            self.ui.table.setItem(ii, 1, QTableWidgetItem(text))
         # deal with checkbox with check or not
         for ii in range(4):
             if ii < self.damage_rad_num:
@@ -139,32 +367,31 @@ class MainWindow(QMainWindow):
             else:
                 self.ui.checkboxlist[ii].setChecked(False)
 
-        self.input = []
+        if damage["population"]:
+            pressure = PRESSURES[self.damage_rad_num - 1]
+            self.statusBar().showMessage(
+                f"Population inside the {pressure / 1e3:g} kPa zone: "
+                f"{damage['population'][-1]:,}"
+            )
 
     # Plots, based on the checkbox
 
     def plot_html(self):
-        map = folium.Map(
-            location=[self.blast_lat, self.blast_lon], control_scale=True, zoom_start=7
+        if self.damage is None:
+            self.statusBar().showMessage("Generate a scenario first")
+            return
+        self.start(
+            "map",
+            Worker(
+                build_map,
+                self.blast_lat,
+                self.blast_lon,
+                self.damage_rad,
+                list(self.plot),
+                self.circle_list,
+            ),
+            self.ui.browser.setHtml,
         )
-        # plot
-        for ii in range(self.damage_rad_num):
-            if self.plot[ii]:
-                folium.Circle(
-                    [self.blast_lat, self.blast_lon],
-                    self.damage_rad[ii],
-                    color=self.circle_list[ii],
-                    fill=True,
-                    fillOpacity=0.1,
-                ).add_to(map)
-
-        # save
-        map.save("ui_map.html")
-        # read
-
-        with open("./ui_map.html", "r", encoding="utf-8") as file:
-            html_content = file.read()
-        self.ui.browser.setHtml(html_content)
 
     # checkbox change
     def checkbox1(self):
@@ -179,7 +406,18 @@ class MainWindow(QMainWindow):
     def checkbox4(self):
         self.plot[3] = not self.plot[3]
 
+    def closeEvent(self, event):
+        # stop the computations at their next stage, but don't hold up
+        # closing for a stage which is still running (e.g. loading the
+        # postcode and census data, which has only one stage)
+        self.cancel()
+        self.locator_worker.cancel()
+        if not self.pool.waitForDone(CLOSE_TIMEOUT):
+            logger.warning("Closing with computations still running")
+        super().closeEvent(event)
+
 
+logging.basicConfig(level=logging.INFO)
 app = QApplication([])
 mainw = MainWindow()
 mainw.show()